@@ -0,0 +1,390 @@
+"""
+认证热路径微基准
+
+不依赖 PostgreSQL：DATABASE_URL 指向本地 SQLite 合成数据集（benchmarks/dataset.py），被测函数直接调用
+项目代码，覆盖 AuthMiddleware、jwt.decode、is_token_blacklisted、get_current_user、require_permission、
+create_access_token 和响应序列化。结果写入 JSON（带 commit），用 compare 子命令对比两次结果。
+
+    PYTHONPATH=src python benchmarks/bench_auth.py run --dataset small
+    PYTHONPATH=src python benchmarks/bench_auth.py run --dataset large --iterations 5000
+    python benchmarks/bench_auth.py compare benchmarks/results/a.json benchmarks/results/b.json
+
+SQLite 的绝对耗时与 PostgreSQL 不同，只用于同一台机器上不同 commit 之间的对比。
+"""
+
+import argparse
+import asyncio
+import gc
+import inspect
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Callable
+
+import dataset
+
+ROOT = Path(__file__).resolve().parent.parent
+RESULTS_DIR = ROOT / "benchmarks" / "results"
+DEFAULT_DATA_DIR = Path(tempfile.gettempdir()) / "console_server_bench"
+
+# 轮换使用的用户数：避免每次都命中同一行，同时让权限缓存能全部装下
+SAMPLE_USERS = 1000
+
+
+def _git(*args: str) -> str:
+    try:
+        return subprocess.run(
+            ["git", *args], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def _stats(samples_ns: list[int]) -> dict[str, float]:
+    samples = sorted(samples_ns)
+    total = sum(samples)
+
+    def pct(p: float) -> float:
+        return samples[min(int(len(samples) * p), len(samples) - 1)] / 1000
+
+    return {
+        "iterations": len(samples),
+        "ops_per_sec": round(len(samples) / (total / 1e9), 1) if total else 0.0,
+        "mean_us": round(total / len(samples) / 1000, 3),
+        "stdev_us": round(statistics.pstdev(samples) / 1000, 3),
+        "min_us": round(samples[0] / 1000, 3),
+        "p50_us": round(pct(0.50), 3),
+        "p95_us": round(pct(0.95), 3),
+        "p99_us": round(pct(0.99), 3),
+        "max_us": round(samples[-1] / 1000, 3),
+    }
+
+
+async def _measure(fn: Callable[[int], Any], iterations: int, warmup: int) -> dict:
+    """fn(i) 为同步函数或协程函数，i 为迭代序号（用于轮换输入）"""
+    is_async = inspect.iscoroutinefunction(fn)
+    for i in range(warmup):
+        result = fn(i)
+        if is_async:
+            await result
+    gc.collect()
+    samples: list[int] = []
+    for i in range(iterations):
+        start = time.perf_counter_ns()
+        result = fn(i)
+        if is_async:
+            await result
+        samples.append(time.perf_counter_ns() - start)
+    return _stats(samples)
+
+
+async def _run_cases(args: argparse.Namespace, scale: dataset.Scale) -> dict[str, dict]:
+    # 必须在设置环境变量之后导入项目代码
+    from fastapi import HTTPException
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.responses import JSONResponse
+    from jose import jwt
+    from sqlalchemy import select
+    from sqlalchemy.orm import selectinload
+
+    from console_server.core.config import settings
+    from console_server.core.tenant import set_tenant_id
+    from console_server.db import database
+    from console_server.middleware.auth import AuthMiddleware
+    from console_server.model.rbac import User
+    from console_server.schema.permission import PermissionResponse
+    from console_server.schema.role import UserRoleResponse
+    from console_server.schema.user import (
+        CurrentUserResponse,
+        UserInfoResponse,
+        UserListResponse,
+    )
+    from console_server.utils.auth import (
+        create_access_token,
+        get_current_user,
+        is_token_blacklisted,
+        permission_cache,
+        require_permission,
+    )
+
+    set_tenant_id(dataset.TENANT_ID)
+    step = max(scale.users // SAMPLE_USERS, 1)
+    user_ids = list(range(1, scale.users + 1, step))[:SAMPLE_USERS]
+    expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+
+    def claims(user_id: int) -> dict:
+        # 与登录接口签发的 access token 相同
+        return {
+            "sub": dataset.user_email(user_id),
+            "is_active": True,
+            "tid": dataset.TENANT_ID,
+        }
+
+    tokens = [create_access_token(claims(uid), expires) for uid in user_ids]
+
+    db = database.AsyncSessionLocal()
+    result = await db.execute(
+        select(User)
+        .options(
+            selectinload(User.active_roles), selectinload(User.effective_permissions)
+        )
+        .where(User.id.in_(user_ids))
+        .order_by(User.id)
+    )
+    users = list(result.scalars().all())
+
+    # 每个用户挑一个自己拥有的权限，对应的 require_permission 校验应通过
+    allowed_checkers = []
+    for user in users:
+        _, path, method = user.effective_permissions[0].name.split(":")
+        allowed_checkers.append(require_permission(path, f"api:{path}:{method}"))
+    denied_checker = require_permission("nobody", "api:nobody:get")
+    # 预先填充权限缓存，cached / denied 用例从第一次迭代起就命中缓存
+    for user, checker in zip(users, allowed_checkers):
+        await checker(user, db)
+
+    async def asgi_app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    middleware = AuthMiddleware(asgi_app)
+    middleware_scopes = [
+        {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": "/api/v1/self/current",
+            "raw_path": b"/api/v1/self/current",
+            "root_path": "",
+            "query_string": b"",
+            "headers": [(b"authorization", f"Bearer {token}".encode())],
+            "client": ("127.0.0.1", 50000),
+            "server": ("testserver", 80),
+        }
+        for token in tokens
+    ]
+    statuses: list[int] = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            statuses.append(message["status"])
+
+    def n(i: int) -> int:
+        return i % len(users)
+
+    async def bench_middleware(i: int) -> None:
+        await middleware(middleware_scopes[n(i)], receive, send)
+
+    def bench_jwt_decode(i: int) -> None:
+        jwt.decode(tokens[n(i)], settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+
+    def bench_create_access_token(i: int) -> None:
+        create_access_token(claims(user_ids[n(i)]), expires)
+
+    async def bench_blacklist(i: int) -> None:
+        await is_token_blacklisted(tokens[n(i)], db)
+
+    async def bench_get_current_user(i: int) -> None:
+        # 与请求一致：每次新建会话
+        async with database.AsyncSessionLocal() as session:
+            await get_current_user(tokens[n(i)], session)
+
+    async def bench_permission_cached(i: int) -> None:
+        await allowed_checkers[n(i)](users[n(i)], db)
+
+    async def bench_permission_uncached(i: int) -> None:
+        user = users[n(i)]
+        permission_cache.pop(dataset.TENANT_ID, user.id)
+        await allowed_checkers[n(i)](user, db)
+
+    async def bench_permission_denied(i: int) -> None:
+        try:
+            await denied_checker(users[n(i)], db)
+        except HTTPException:
+            pass
+
+    def bench_serialize_current_user(i: int) -> None:
+        # 与 /api/v1/self/current 相同：构造响应模型，再由 FastAPI 编码为 JSON
+        user = users[n(i)]
+        response = CurrentUserResponse(
+            id=user.id,
+            name=user.name,
+            email=user.email,
+            description=user.description,
+            is_active=user.is_active,
+            is_deletable=user.is_deletable,
+            is_editable=user.is_editable,
+            roles=[
+                UserRoleResponse(id=r.id, name=r.name, display_name=r.display_name)
+                for r in user.active_roles
+            ],
+            permissions=[
+                PermissionResponse(id=p.id, name=p.name, display_name=p.display_name)
+                for p in user.effective_permissions
+            ],
+        )
+        JSONResponse(jsonable_encoder(response))
+
+    def bench_serialize_user_list(i: int) -> None:
+        # 与 /api/v1/user/list 相同，每页 100 条
+        start = (i * 100) % len(users)
+        page = (users[start:] + users[:start])[:100]
+        response = UserListResponse(
+            items=[
+                UserInfoResponse(
+                    id=u.id,
+                    name=u.name,
+                    email=u.email,
+                    description=u.description,
+                    is_active=u.is_active,
+                )
+                for u in page
+            ],
+            total=scale.users,
+            page=1,
+            page_size=100,
+            total_pages=(scale.users + 99) // 100,
+        )
+        JSONResponse(jsonable_encoder(response))
+
+    cases: dict[str, Callable[[int], Any]] = {
+        "auth_middleware": bench_middleware,
+        "jwt.decode": bench_jwt_decode,
+        "create_access_token": bench_create_access_token,
+        "is_token_blacklisted": bench_blacklist,
+        "get_current_user": bench_get_current_user,
+        "require_permission.cached": bench_permission_cached,
+        "require_permission.uncached": bench_permission_uncached,
+        "require_permission.denied": bench_permission_denied,
+        "serialize.current_user": bench_serialize_current_user,
+        "serialize.user_list": bench_serialize_user_list,
+    }
+    if args.only:
+        cases = {name: fn for name, fn in cases.items() if name in args.only}
+
+    results: dict[str, dict] = {}
+    try:
+        for name, fn in cases.items():
+            results[name] = await _measure(fn, args.iterations, args.warmup)
+            print(
+                f"{name:<30} {results[name]['ops_per_sec']:>12.1f} ops/s  "
+                f"p50 {results[name]['p50_us']:>10.1f}us  p99 {results[name]['p99_us']:>10.1f}us"
+            )
+    finally:
+        await db.close()
+        await database.engine.dispose()
+
+    if statuses and set(statuses) != {200}:
+        raise RuntimeError(f"AuthMiddleware 返回了非 200 状态码：{sorted(set(statuses))}")
+    return results
+
+
+def run(args: argparse.Namespace) -> int:
+    scale = dataset.SCALES[args.dataset]
+    data_dir = Path(args.data_dir)
+    print(f"准备数据集 {args.dataset}：{asdict(scale)}")
+    path = dataset.ensure(data_dir, args.dataset, args.seed)
+
+    os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{path}"
+    # 关闭链路追踪采样和请求路径上的日志，只测被测代码本身
+    os.environ["TRACE_SAMPLE_RATE"] = "0"
+    os.environ.setdefault("GLOBAL_LOG_LEVEL", "WARNING")
+
+    results = asyncio.run(_run_cases(args, scale))
+
+    commit = _git("rev-parse", "--short", "HEAD") or "unknown"
+    report = {
+        "meta": {
+            "commit": commit,
+            "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "dataset": args.dataset,
+            "scale": asdict(scale),
+            "seed": args.seed,
+            "warmup": args.warmup,
+        },
+        "results": results,
+    }
+    output = Path(args.output) if args.output else RESULTS_DIR / f"{commit}-{args.dataset}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, ensure_ascii=False, indent=2) + "\n")
+    print(f"结果已写入 {output}")
+    return 0
+
+
+def compare(args: argparse.Namespace) -> int:
+    """对比两次结果的 p50，变慢超过阈值的用例视为回归，存在回归时返回 1"""
+    base = json.loads(Path(args.base).read_text())
+    target = json.loads(Path(args.target).read_text())
+    if base["meta"]["dataset"] != target["meta"]["dataset"]:
+        print(
+            f"警告：数据集不同（{base['meta']['dataset']} / {target['meta']['dataset']}）"
+        )
+
+    print(f"{'case':<30} {'base p50':>12} {'target p50':>12} {'change':>9}")
+    regressions = []
+    for name, base_stats in base["results"].items():
+        target_stats = target["results"].get(name)
+        if target_stats is None:
+            continue
+        before, after = base_stats["p50_us"], target_stats["p50_us"]
+        change = (after - before) / before if before else 0.0
+        flag = ""
+        if change > args.threshold:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        print(f"{name:<30} {before:>10.1f}us {after:>10.1f}us {change:>+8.1%}{flag}")
+
+    if regressions:
+        print(f"{len(regressions)} 个用例变慢超过 {args.threshold:.0%}：{', '.join(regressions)}")
+        return 1
+    return 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="benchmarks/bench_auth.py")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="运行基准测试")
+    run_parser.add_argument("--dataset", choices=dataset.SCALES.keys(), default="small")
+    run_parser.add_argument("--iterations", type=int, default=2000)
+    run_parser.add_argument("--warmup", type=int, default=200)
+    run_parser.add_argument("--seed", type=int, default=42)
+    run_parser.add_argument("--only", nargs="*", help="只运行指定用例")
+    run_parser.add_argument(
+        "--data-dir", default=str(DEFAULT_DATA_DIR), help="数据集缓存目录"
+    )
+    run_parser.add_argument(
+        "--output", help="结果文件，缺省为 benchmarks/results/<commit>-<dataset>.json"
+    )
+    run_parser.set_defaults(func=run)
+
+    compare_parser = subparsers.add_parser("compare", help="对比两次结果")
+    compare_parser.add_argument("base")
+    compare_parser.add_argument("target")
+    compare_parser.add_argument(
+        "--threshold", type=float, default=0.10, help="p50 变慢超过该比例视为回归"
+    )
+    compare_parser.set_defaults(func=compare)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,193 @@
+"""
+基准测试用的合成 RBAC 数据集（SQLite 文件）
+
+表结构由 Base.metadata.create_all 按模型生成，数据用标准库 sqlite3 批量写入。相同的规模和随机种子
+生成相同的数据，生成后的文件按规模、种子和表结构指纹缓存，重复运行时直接复用；模型变更后指纹不同，
+自动重新生成并删除旧文件。
+"""
+
+import hashlib
+import random
+import sqlite3
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator
+
+TENANT_ID = 1
+METHODS = ("get", "post", "put", "delete")
+# 占位的密码哈希：基准测试不登录，不需要真实的 bcrypt 哈希
+PASSWORD_HASH = "$2b$12$" + "x" * 53
+TIMESTAMP = "2026-01-01 00:00:00.000000"
+
+
+@dataclass(frozen=True)
+class Scale:
+    users: int
+    roles: int
+    permissions: int
+    roles_per_user: int
+    permissions_per_role: int
+    # 黑名单中的 token 数（均未过期，查询时都不命中被测 token）
+    blacklisted_tokens: int
+
+
+SCALES = {
+    "small": Scale(1_000, 50, 500, 3, 10, 1_000),
+    "large": Scale(100_000, 2_000, 20_000, 3, 10, 50_000),
+}
+
+
+def permission_name(permission_id: int) -> str:
+    """api:res<N>:<method>，每个资源 4 个方法"""
+    index = permission_id - 1
+    return f"api:res{index // len(METHODS)}:{METHODS[index % len(METHODS)]}"
+
+
+def user_email(user_id: int) -> str:
+    return f"user{user_id}@bench.example.com"
+
+
+def _user_roles(scale: Scale, seed: int) -> Iterator[tuple[int, list[int]]]:
+    rng = random.Random(seed)
+    for user_id in range(1, scale.users + 1):
+        yield user_id, rng.sample(range(1, scale.roles + 1), scale.roles_per_user)
+
+
+def _role_permissions(scale: Scale, seed: int) -> dict[int, list[int]]:
+    rng = random.Random(seed + 1)
+    return {
+        role_id: rng.sample(range(1, scale.permissions + 1), scale.permissions_per_role)
+        for role_id in range(1, scale.roles + 1)
+    }
+
+
+def _metadata():
+    # 导入全部模型，注册到 Base.metadata
+    from console_server.model import archive, audit, job, lease, rbac, tenant, token  # noqa: F401
+    from console_server.model.common import Base
+
+    return Base.metadata
+
+
+def schema_fingerprint() -> str:
+    """按 SQLite 方言编译的建表、建索引语句的哈希，模型变更时随之改变"""
+    from sqlalchemy.dialects import sqlite
+    from sqlalchemy.schema import CreateIndex, CreateTable
+
+    dialect = sqlite.dialect()
+    digest = hashlib.sha256()
+    for table in _metadata().sorted_tables:
+        digest.update(str(CreateTable(table).compile(dialect=dialect)).encode())
+        for index in sorted(table.indexes, key=lambda index: str(index.name)):
+            digest.update(str(CreateIndex(index).compile(dialect=dialect)).encode())
+    return digest.hexdigest()[:12]
+
+
+def _create_schema(path: Path) -> None:
+    from sqlalchemy import create_engine
+
+    engine = create_engine(f"sqlite:///{path}")
+    _metadata().create_all(engine)
+    engine.dispose()
+
+
+def build(path: Path, scale: Scale, seed: int = 42) -> None:
+    """生成数据集到 path（已存在时覆盖）"""
+    path.unlink(missing_ok=True)
+    tmp = path.with_suffix(".tmp")
+    tmp.unlink(missing_ok=True)
+    _create_schema(tmp)
+
+    conn = sqlite3.connect(tmp)
+    conn.execute("PRAGMA journal_mode = OFF")
+    conn.execute("PRAGMA synchronous = OFF")
+    with conn:
+        conn.execute(
+            "INSERT INTO tenants (id, name, display_name, is_active, created_at) "
+            "VALUES (?, 'bench', 'Benchmark', 1, ?)",
+            (TENANT_ID, TIMESTAMP),
+        )
+        conn.executemany(
+            "INSERT INTO users (tenant_id, id, name, email, password, description, is_active, "
+            "is_deletable, is_editable, created_at, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, NULL, 1, 1, 1, ?, ?)",
+            (
+                (TENANT_ID, i, f"user{i}", user_email(i), PASSWORD_HASH, TIMESTAMP, TIMESTAMP)
+                for i in range(1, scale.users + 1)
+            ),
+        )
+        conn.executemany(
+            "INSERT INTO roles (tenant_id, id, name, display_name, is_active, "
+            "is_deletable, is_editable, created_at, updated_at) "
+            "VALUES (?, ?, ?, ?, 1, 1, 1, ?, ?)",
+            (
+                (TENANT_ID, i, f"role{i}", f"Role {i}", TIMESTAMP, TIMESTAMP)
+                for i in range(1, scale.roles + 1)
+            ),
+        )
+        conn.executemany(
+            "INSERT INTO permissions (tenant_id, id, name, display_name, "
+            "is_deletable, is_editable, created_at, updated_at) "
+            "VALUES (?, ?, ?, ?, 1, 1, ?, ?)",
+            (
+                (TENANT_ID, i, permission_name(i), permission_name(i), TIMESTAMP, TIMESTAMP)
+                for i in range(1, scale.permissions + 1)
+            ),
+        )
+        # 继承关系为空，闭包表只有 depth=0 的自身行
+        conn.executemany(
+            "INSERT INTO role_closure (tenant_id, role_id, ancestor_id, depth) VALUES (?, ?, ?, 0)",
+            ((TENANT_ID, i, i) for i in range(1, scale.roles + 1)),
+        )
+
+        role_permissions = _role_permissions(scale, seed)
+        conn.executemany(
+            "INSERT INTO role_permissions (tenant_id, role_id, permission_id) VALUES (?, ?, ?)",
+            (
+                (TENANT_ID, role_id, permission_id)
+                for role_id, permission_ids in role_permissions.items()
+                for permission_id in permission_ids
+            ),
+        )
+        conn.executemany(
+            "INSERT INTO user_roles (tenant_id, user_id, role_id, expires_at) VALUES (?, ?, ?, NULL)",
+            (
+                (TENANT_ID, user_id, role_id)
+                for user_id, role_ids in _user_roles(scale, seed)
+                for role_id in role_ids
+            ),
+        )
+        conn.executemany(
+            "INSERT INTO user_effective_permissions (tenant_id, user_id, permission_id, expires_at) "
+            "VALUES (?, ?, ?, NULL)",
+            (
+                (TENANT_ID, user_id, permission_id)
+                for user_id, role_ids in _user_roles(scale, seed)
+                for permission_id in {
+                    p for role_id in role_ids for p in role_permissions[role_id]
+                }
+            ),
+        )
+        conn.executemany(
+            "INSERT INTO token_blacklist (token_hash, expires_at, created_at) VALUES (?, ?, ?)",
+            (
+                (f"{i:064x}", "2999-01-01 00:00:00.000000", TIMESTAMP)
+                for i in range(scale.blacklisted_tokens)
+            ),
+        )
+    conn.execute("ANALYZE")
+    conn.close()
+    tmp.rename(path)
+
+
+def ensure(data_dir: Path, name: str, seed: int = 42) -> Path:
+    """返回指定规模的数据集文件，不存在（或表结构已变更）时生成"""
+    data_dir.mkdir(parents=True, exist_ok=True)
+    path = data_dir / f"rbac-{name}-{seed}-{schema_fingerprint()}.sqlite3"
+    if not path.exists():
+        # 旧表结构生成的文件不再使用
+        data_dir.joinpath(f"rbac-{name}-{seed}.sqlite3").unlink(missing_ok=True)
+        for stale in data_dir.glob(f"rbac-{name}-{seed}-*.sqlite3"):
+            stale.unlink()
+        build(path, SCALES[name], seed)
+    return path
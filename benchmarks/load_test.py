@@ -0,0 +1,395 @@
+"""
+端到端压测场景
+
+三个场景，每个场景由 --concurrency 个并发 worker 循环执行，持续 --duration 秒：
+
+- session：注册 → 登录 → /self/current → 刷新 → 登出（完整会话生命周期）
+- admin_browse：管理员浏览用户列表、角色列表和用户角色
+- bulk_assign：管理员为压测用户批量分配角色再移除（不修改已有用户）
+
+默认在进程内通过 ASGI transport 调用应用（需要本地 PostgreSQL，连接串取自 DATABASE_URL），
+指定 --base-url 时改为请求已启动的服务。报告包含吞吐、p50/p95/p99 延迟、错误率和每个请求的 SQL 语句数
+（读取 X-DB-Queries 响应头，进程内模式自动开启 QUERY_STATS_HEADER，外部服务需自行开启），
+超过阈值（benchmarks/load_thresholds.json）时返回 1。
+
+    PYTHONPATH=src python benchmarks/load_test.py --admin-password ******
+    python benchmarks/load_test.py --base-url http://127.0.0.1:8000 --scenario session --concurrency 50
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+import uuid
+from contextlib import AsyncExitStack
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+import httpx
+
+ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_THRESHOLDS = ROOT / "benchmarks" / "load_thresholds.json"
+LOAD_TEST_PASSWORD = "load-test-password"
+
+
+class StepFailed(Exception):
+    """请求返回了非预期的状态码，本次迭代中止"""
+
+
+@dataclass
+class ScenarioStats:
+    latencies: list[float] = field(default_factory=list)  # 每个请求的耗时（秒）
+    db_queries: list[int] = field(default_factory=list)
+    requests: int = 0
+    errors: int = 0
+    iterations: int = 0
+    failed_iterations: int = 0
+    error_samples: list[str] = field(default_factory=list)
+
+    def report(self, elapsed: float) -> dict[str, Any]:
+        latencies = sorted(self.latencies)
+
+        def pct(p: float) -> Optional[float]:
+            if not latencies:
+                return None
+            return round(latencies[min(int(len(latencies) * p), len(latencies) - 1)] * 1000, 3)
+
+        return {
+            "iterations": self.iterations,
+            "failed_iterations": self.failed_iterations,
+            "requests": self.requests,
+            "rps": round(self.requests / elapsed, 1) if elapsed else 0.0,
+            "p50_ms": pct(0.50),
+            "p95_ms": pct(0.95),
+            "p99_ms": pct(0.99),
+            "error_rate": round(self.errors / self.requests, 4) if self.requests else 0.0,
+            "db_queries_per_request": (
+                round(sum(self.db_queries) / len(self.db_queries), 2)
+                if self.db_queries
+                else None
+            ),
+            "db_queries_per_iteration": (
+                round(sum(self.db_queries) / self.iterations, 2)
+                if self.db_queries and self.iterations
+                else None
+            ),
+            "error_samples": self.error_samples,
+        }
+
+
+class Session:
+    """一个 worker 的 HTTP 会话，记录每个请求的耗时、状态和语句数"""
+
+    def __init__(self, client: httpx.AsyncClient, stats: ScenarioStats, tenant_id: int):
+        self.client = client
+        self.stats = stats
+        self.tenant_id = tenant_id
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        *,
+        token: Optional[str] = None,
+        refresh_token: Optional[str] = None,
+        expect: int = 200,
+        **kwargs: Any,
+    ) -> httpx.Response:
+        headers = {"X-Tenant-ID": str(self.tenant_id)}
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+        if refresh_token:
+            # refresh_token Cookie 带 Secure 标志，http 下客户端不会自动回传
+            headers["Cookie"] = f"refresh_token={refresh_token}"
+        start = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, headers=headers, **kwargs)
+        except httpx.HTTPError as e:
+            self._error(f"{method} {url}: {type(e).__name__}: {e}")
+            raise StepFailed(str(e)) from e
+        finally:
+            self.stats.latencies.append(time.perf_counter() - start)
+            self.stats.requests += 1
+        queries = response.headers.get("X-DB-Queries")
+        if queries is not None:
+            self.stats.db_queries.append(int(queries))
+        if response.status_code != expect:
+            self._error(f"{method} {url}: {response.status_code} {response.text[:200]}")
+            raise StepFailed(f"{method} {url} -> {response.status_code}")
+        return response
+
+    def _error(self, message: str) -> None:
+        self.stats.errors += 1
+        if len(self.stats.error_samples) < 5:
+            self.stats.error_samples.append(message)
+
+    async def login(self, email: str, password: str) -> tuple[str, str]:
+        response = await self.request(
+            "POST", "/api/auth/login", json={"email": email, "password": password}
+        )
+        return response.json()["access_token"], response.cookies.get("refresh_token", "")
+
+
+####################################
+# 场景
+####################################
+
+
+class Scenario:
+    name = ""
+
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+
+    async def setup(self, session: Session) -> None:
+        """场景开始前执行一次（不计入统计）"""
+
+    async def run(self, session: Session, worker: int, iteration: int) -> None:
+        raise NotImplementedError
+
+
+class SessionLifecycle(Scenario):
+    name = "session"
+
+    def __init__(self, args: argparse.Namespace):
+        super().__init__(args)
+        self.run_id = uuid.uuid4().hex[:8]
+
+    async def run(self, session: Session, worker: int, iteration: int) -> None:
+        email = f"load-{self.run_id}-{worker}-{iteration}@example.com"
+        await session.request(
+            "POST",
+            "/api/auth/register",
+            json={"name": f"load {worker}-{iteration}", "email": email, "password": LOAD_TEST_PASSWORD},
+        )
+        access_token, refresh_token = await session.login(email, LOAD_TEST_PASSWORD)
+        await session.request("GET", "/api/v1/self/current", token=access_token)
+        response = await session.request(
+            "GET", "/api/auth/refresh", refresh_token=refresh_token
+        )
+        access_token = response.json()["access_token"]
+        refresh_token = response.cookies.get("refresh_token", refresh_token)
+        await session.request(
+            "GET", "/api/auth/logout", token=access_token, refresh_token=refresh_token
+        )
+
+
+class AdminBrowse(Scenario):
+    name = "admin_browse"
+
+    async def setup(self, session: Session) -> None:
+        self.token, _ = await session.login(self.args.admin_email, self.args.admin_password)
+        response = await session.request(
+            "GET", "/api/v1/user/list", token=self.token, params={"page_size": 20}
+        )
+        self.user_pages = max(response.json()["total_pages"], 1)
+
+    async def run(self, session: Session, worker: int, iteration: int) -> None:
+        response = await session.request(
+            "GET",
+            "/api/v1/user/list",
+            token=self.token,
+            params={"page": random.randint(1, self.user_pages), "page_size": 20},
+        )
+        users = response.json()["items"]
+        await session.request(
+            "GET", "/api/v1/role/list", token=self.token, params={"page_size": 20}
+        )
+        if users:
+            user_id = random.choice(users)["id"]
+            await session.request("GET", f"/api/v1/user/{user_id}/roles", token=self.token)
+
+
+class BulkAssign(Scenario):
+    name = "bulk_assign"
+
+    async def setup(self, session: Session) -> None:
+        self.token, _ = await session.login(self.args.admin_email, self.args.admin_password)
+        response = await session.request(
+            "GET", "/api/v1/role/list", token=self.token, params={"page_size": 100}
+        )
+        self.role_ids = [r["id"] for r in response.json()["items"] if r["name"] != "admin"]
+        if not self.role_ids:
+            raise RuntimeError("bulk_assign：没有可分配的角色")
+        # 每个 worker 一个专用用户，分配后立即移除，不影响已有数据
+        run_id = uuid.uuid4().hex[:8]
+        self.user_ids = []
+        for worker in range(self.args.concurrency):
+            response = await session.request(
+                "POST",
+                "/api/auth/register",
+                json={
+                    "name": f"load bulk {worker}",
+                    "email": f"load-bulk-{run_id}-{worker}@example.com",
+                    "password": LOAD_TEST_PASSWORD,
+                },
+            )
+            self.user_ids.append(response.json()["id"])
+
+    async def run(self, session: Session, worker: int, iteration: int) -> None:
+        user_id = self.user_ids[worker]
+        role_ids = random.sample(self.role_ids, min(self.args.bulk_roles, len(self.role_ids)))
+        await session.request(
+            "POST",
+            f"/api/v1/user/{user_id}/assign-roles",
+            token=self.token,
+            json={"role_ids": role_ids},
+        )
+        await session.request(
+            "POST",
+            f"/api/v1/user/{user_id}/remove-roles",
+            token=self.token,
+            json={"role_ids": role_ids},
+        )
+
+
+SCENARIOS: dict[str, type[Scenario]] = {
+    cls.name: cls for cls in (SessionLifecycle, AdminBrowse, BulkAssign)
+}
+
+
+####################################
+# 执行
+####################################
+
+
+async def _run_scenario(
+    make_client: Callable[[], httpx.AsyncClient],
+    scenario: Scenario,
+    args: argparse.Namespace,
+) -> dict[str, Any]:
+    stats = ScenarioStats()
+    async with make_client() as client:
+        await scenario.setup(Session(client, ScenarioStats(), args.tenant))
+
+        deadline = time.perf_counter() + args.duration
+
+        async def worker(index: int) -> None:
+            session = Session(client, stats, args.tenant)
+            iteration = 0
+            while time.perf_counter() < deadline:
+                try:
+                    await scenario.run(session, index, iteration)
+                except StepFailed:
+                    stats.failed_iterations += 1
+                stats.iterations += 1
+                iteration += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(i) for i in range(args.concurrency)))
+        elapsed = time.perf_counter() - start
+    return stats.report(elapsed)
+
+
+def _check(name: str, report: dict[str, Any], limits: dict[str, float]) -> list[str]:
+    failures = []
+    for key, limit in limits.items():
+        if key == "min_rps":
+            if report["rps"] < limit:
+                failures.append(f"{name}: rps {report['rps']} < {limit}")
+            continue
+        value = report.get(key)
+        if value is not None and value > limit:
+            failures.append(f"{name}: {key} {value} > {limit}")
+    return failures
+
+
+async def _main(args: argparse.Namespace) -> int:
+    async with AsyncExitStack() as stack:
+        if args.base_url:
+
+            def make_client() -> httpx.AsyncClient:
+                return httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout)
+
+        else:
+            # 进程内模式：返回语句数响应头，关闭链路追踪采样
+            os.environ.setdefault("QUERY_STATS_HEADER", "true")
+            os.environ.setdefault("TRACE_SAMPLE_RATE", "0")
+            os.environ.setdefault("GLOBAL_LOG_LEVEL", "WARNING")
+            from console_server.main import app
+
+            await stack.enter_async_context(app.router.lifespan_context(app))
+            # 应用异常按 500 计入错误率，不中断压测
+            transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+
+            def make_client() -> httpx.AsyncClient:
+                return httpx.AsyncClient(
+                    transport=transport, base_url="http://loadtest", timeout=args.timeout
+                )
+
+        thresholds: dict[str, dict[str, float]] = {}
+        if args.thresholds:
+            thresholds = json.loads(Path(args.thresholds).read_text())
+
+        reports: dict[str, Any] = {}
+        failures: list[str] = []
+        for name in args.scenario:
+            print(f"运行场景 {name}：并发 {args.concurrency}，持续 {args.duration}s")
+            report = await _run_scenario(make_client, SCENARIOS[name](args), args)
+            reports[name] = report
+            failures += _check(name, report, thresholds.get(name, {}))
+            print(
+                f"  {report['requests']} 个请求，{report['rps']} req/s，"
+                f"p50 {report['p50_ms']}ms，p95 {report['p95_ms']}ms，p99 {report['p99_ms']}ms，"
+                f"错误率 {report['error_rate']:.2%}，每请求 SQL {report['db_queries_per_request']}"
+            )
+            for sample in report["error_samples"]:
+                print(f"  错误：{sample}")
+
+    if args.output:
+        output = Path(args.output)
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(
+            json.dumps(
+                {"concurrency": args.concurrency, "duration": args.duration, "scenarios": reports},
+                ensure_ascii=False,
+                indent=2,
+            )
+            + "\n"
+        )
+        print(f"报告已写入 {output}")
+
+    for failure in failures:
+        print(f"超过阈值：{failure}")
+    return 1 if failures else 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="benchmarks/load_test.py")
+    parser.add_argument(
+        "--base-url", help="已启动服务的地址，缺省时在进程内通过 ASGI transport 调用应用"
+    )
+    parser.add_argument(
+        "--scenario", nargs="*", choices=SCENARIOS.keys(), default=list(SCENARIOS)
+    )
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--duration", type=float, default=30, help="每个场景的持续时间（秒）")
+    parser.add_argument("--timeout", type=float, default=30, help="单个请求超时（秒）")
+    parser.add_argument("--tenant", type=int, default=1, help="X-Tenant-ID")
+    parser.add_argument("--admin-email", default="admin@example.com")
+    parser.add_argument(
+        "--admin-password",
+        default=os.environ.get("LOAD_TEST_ADMIN_PASSWORD", ""),
+        help="缺省取环境变量 LOAD_TEST_ADMIN_PASSWORD",
+    )
+    parser.add_argument("--bulk-roles", type=int, default=5, help="bulk_assign 每次分配的角色数")
+    parser.add_argument(
+        "--thresholds",
+        default=str(DEFAULT_THRESHOLDS),
+        help="阈值文件，空字符串表示不检查",
+    )
+    parser.add_argument("--output", help="JSON 报告路径")
+    args = parser.parse_args(argv)
+
+    needs_admin = {"admin_browse", "bulk_assign"} & set(args.scenario)
+    if needs_admin and not args.admin_password:
+        parser.error(f"场景 {', '.join(sorted(needs_admin))} 需要 --admin-password")
+    return asyncio.run(_main(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
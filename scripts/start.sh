@@ -1 +1,10 @@
 #!/usr/bin/env bash
+# 生产环境启动：多 worker、uvloop / httptools，参数见 README「生产部署」
+# 用法：scripts/start.sh [--workers N] [--port PORT]
+set -euo pipefail
+
+cd "$(dirname "$0")/.."
+export PYTHONPATH="src${PYTHONPATH:+:$PYTHONPATH}"
+
+# exec 使 python 成为信号的直接接收者（容器中为 PID 1），SIGTERM 可触发优雅关闭
+exec python -m console_server.cli.serve "$@"
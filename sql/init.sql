@@ -39,6 +39,30 @@ CREATE TYPE "public"."user_status" AS ENUM (
 );
 ALTER TYPE "public"."user_status" OWNER TO "postgres";
 
+-- ----------------------------
+-- Sequence structure for audit_logs_id_seq
+-- ----------------------------
+DROP SEQUENCE IF EXISTS "public"."audit_logs_id_seq";
+CREATE SEQUENCE "public"."audit_logs_id_seq" 
+INCREMENT 1
+MINVALUE  1
+MAXVALUE 9223372036854775807
+START 1
+CACHE 1;
+ALTER SEQUENCE "public"."audit_logs_id_seq" OWNER TO "postgres";
+
+-- ----------------------------
+-- Sequence structure for background_jobs_id_seq
+-- ----------------------------
+DROP SEQUENCE IF EXISTS "public"."background_jobs_id_seq";
+CREATE SEQUENCE "public"."background_jobs_id_seq" 
+INCREMENT 1
+MINVALUE  1
+MAXVALUE 2147483647
+START 1
+CACHE 1;
+ALTER SEQUENCE "public"."background_jobs_id_seq" OWNER TO "postgres";
+
 -- ----------------------------
 -- Sequence structure for permissions_id_seq
 -- ----------------------------
@@ -63,6 +87,18 @@ START 1
 CACHE 1;
 ALTER SEQUENCE "public"."roles_id_seq" OWNER TO "postgres";
 
+-- ----------------------------
+-- Sequence structure for tenants_id_seq
+-- ----------------------------
+DROP SEQUENCE IF EXISTS "public"."tenants_id_seq";
+CREATE SEQUENCE "public"."tenants_id_seq" 
+INCREMENT 1
+MINVALUE  1
+MAXVALUE 2147483647
+START 1
+CACHE 1;
+ALTER SEQUENCE "public"."tenants_id_seq" OWNER TO "postgres";
+
 -- ----------------------------
 -- Sequence structure for token_blacklist_id_seq
 -- ----------------------------
@@ -87,11 +123,85 @@ START 1
 CACHE 1;
 ALTER SEQUENCE "public"."users_id_seq" OWNER TO "postgres";
 
+-- ----------------------------
+-- Function structure for create_tenant_partitions
+-- ----------------------------
+DROP FUNCTION IF EXISTS "public"."create_tenant_partitions"(text, int4);
+CREATE FUNCTION "public"."create_tenant_partitions"("parent" text, "modulus" int4 = 8)
+  RETURNS "pg_catalog"."void" AS $BODY$
+BEGIN
+    -- 按 tenant_id 哈希分区：带 tenant_id 条件的查询只扫描一个分区
+    FOR i IN 0..modulus - 1 LOOP
+        EXECUTE format(
+            'CREATE TABLE IF NOT EXISTS "public".%I PARTITION OF "public".%I FOR VALUES WITH (MODULUS %s, REMAINDER %s)',
+            parent || '_p' || i, parent, modulus, i
+        );
+    END LOOP;
+END;
+$BODY$
+  LANGUAGE plpgsql VOLATILE
+  COST 100;
+ALTER FUNCTION "public"."create_tenant_partitions"(text, int4) OWNER TO "postgres";
+
+-- ----------------------------
+-- Table structure for audit_logs
+-- ----------------------------
+DROP TABLE IF EXISTS "public"."audit_logs";
+CREATE TABLE "public"."audit_logs" (
+  "tenant_id" int4 NOT NULL DEFAULT 1,
+  "id" int8 NOT NULL DEFAULT nextval('audit_logs_id_seq'::regclass),
+  "created_at" timestamptz(6) NOT NULL,
+  "actor_id" int4,
+  "action" varchar(64) COLLATE "pg_catalog"."default" NOT NULL,
+  "target_type" varchar(32) COLLATE "pg_catalog"."default",
+  "target_id" int4,
+  "success" bool NOT NULL DEFAULT true,
+  "detail" jsonb,
+  "ip" varchar(64) COLLATE "pg_catalog"."default",
+  "request_id" varchar(64) COLLATE "pg_catalog"."default"
+) PARTITION BY HASH ("tenant_id")
+;
+ALTER TABLE "public"."audit_logs" OWNER TO "postgres";
+SELECT "public"."create_tenant_partitions"('audit_logs');
+COMMENT ON COLUMN "public"."audit_logs"."tenant_id" IS '所属租户，分区键';
+COMMENT ON COLUMN "public"."audit_logs"."created_at" IS '事件发生的时间，由应用写入';
+COMMENT ON COLUMN "public"."audit_logs"."actor_id" IS '操作人，登录失败等未认证的事件为空';
+COMMENT ON TABLE "public"."audit_logs" IS '审计日志，只追加，由应用批量写入（COPY）';
+
+-- ----------------------------
+-- Table structure for background_jobs
+-- ----------------------------
+DROP TABLE IF EXISTS "public"."background_jobs";
+CREATE TABLE "public"."background_jobs" (
+  "id" int4 NOT NULL DEFAULT nextval('background_jobs_id_seq'::regclass),
+  "tenant_id" int4 NOT NULL DEFAULT 1,
+  "kind" varchar(64) COLLATE "pg_catalog"."default" NOT NULL,
+  "payload" jsonb NOT NULL DEFAULT '{}'::jsonb,
+  "status" varchar(16) COLLATE "pg_catalog"."default" NOT NULL DEFAULT 'queued'::character varying,
+  "attempts" int4 NOT NULL DEFAULT 0,
+  "max_attempts" int4 NOT NULL,
+  "run_at" timestamptz(6) NOT NULL DEFAULT now(),
+  "locked_by" varchar(128) COLLATE "pg_catalog"."default",
+  "locked_until" timestamptz(6),
+  "progress" int4 NOT NULL DEFAULT 0,
+  "message" varchar(255) COLLATE "pg_catalog"."default",
+  "result" jsonb,
+  "error" text COLLATE "pg_catalog"."default",
+  "created_by" int4,
+  "created_at" timestamptz(6) NOT NULL DEFAULT now(),
+  "started_at" timestamptz(6),
+  "finished_at" timestamptz(6)
+)
+;
+ALTER TABLE "public"."background_jobs" OWNER TO "postgres";
+COMMENT ON TABLE "public"."background_jobs" IS '后台任务队列，不分区，消费者用 FOR UPDATE SKIP LOCKED 领取任务';
+
 -- ----------------------------
 -- Table structure for permissions
 -- ----------------------------
 DROP TABLE IF EXISTS "public"."permissions";
 CREATE TABLE "public"."permissions" (
+  "tenant_id" int4 NOT NULL DEFAULT 1,
   "id" int4 NOT NULL DEFAULT nextval('permissions_id_seq'::regclass),
   "name" varchar(128) COLLATE "pg_catalog"."default" NOT NULL,
   "display_name" varchar(256) COLLATE "pg_catalog"."default" NOT NULL,
@@ -100,9 +210,11 @@ CREATE TABLE "public"."permissions" (
   "updated_at" timestamptz(6) NOT NULL DEFAULT now(),
   "is_deletable" bool NOT NULL DEFAULT false,
   "is_editable" bool NOT NULL DEFAULT false
-)
+) PARTITION BY HASH ("tenant_id")
 ;
 ALTER TABLE "public"."permissions" OWNER TO "postgres";
+COMMENT ON COLUMN "public"."permissions"."tenant_id" IS '所属租户，分区键';
+SELECT "public"."create_tenant_partitions"('permissions');
 COMMENT ON COLUMN "public"."permissions"."is_deletable" IS '权限是否可以被删除，默认不可删除';
 COMMENT ON COLUMN "public"."permissions"."is_editable" IS '权限是否可以被编辑，默认不可编辑';
 
@@ -116,16 +228,67 @@ INSERT INTO "public"."permissions" ("id", "name", "display_name", "description",
 INSERT INTO "public"."permissions" ("id", "name", "display_name", "description", "created_at", "updated_at", "is_deletable", "is_editable") VALUES (4, 'api:persmission:*', '访问权限接口', '允许访问所有权限接口', '2025-11-19 07:07:31.94566+00', '2025-11-19 07:07:31.94566+00', 'f', 'f');
 COMMIT;
 
+-- ----------------------------
+-- Table structure for role_closure
+-- ----------------------------
+DROP TABLE IF EXISTS "public"."role_closure";
+CREATE TABLE "public"."role_closure" (
+  "tenant_id" int4 NOT NULL DEFAULT 1,
+  "role_id" int4 NOT NULL,
+  "ancestor_id" int4 NOT NULL,
+  "depth" int4 NOT NULL DEFAULT 0
+) PARTITION BY HASH ("tenant_id")
+;
+ALTER TABLE "public"."role_closure" OWNER TO "postgres";
+SELECT "public"."create_tenant_partitions"('role_closure');
+COMMENT ON COLUMN "public"."role_closure"."tenant_id" IS '所属租户，分区键';
+COMMENT ON TABLE "public"."role_closure" IS '角色继承传递闭包，role_id 直接或间接继承 ancestor_id，包含 depth=0 的自身行';
+
+-- ----------------------------
+-- Records of role_closure
+-- ----------------------------
+BEGIN;
+INSERT INTO "public"."role_closure" ("role_id", "ancestor_id", "depth") VALUES (10, 10, 0);
+INSERT INTO "public"."role_closure" ("role_id", "ancestor_id", "depth") VALUES (11, 11, 0);
+INSERT INTO "public"."role_closure" ("role_id", "ancestor_id", "depth") VALUES (12, 12, 0);
+INSERT INTO "public"."role_closure" ("role_id", "ancestor_id", "depth") VALUES (13, 13, 0);
+INSERT INTO "public"."role_closure" ("role_id", "ancestor_id", "depth") VALUES (14, 14, 0);
+COMMIT;
+
+-- ----------------------------
+-- Table structure for role_inheritance
+-- ----------------------------
+DROP TABLE IF EXISTS "public"."role_inheritance";
+CREATE TABLE "public"."role_inheritance" (
+  "tenant_id" int4 NOT NULL DEFAULT 1,
+  "role_id" int4 NOT NULL,
+  "parent_id" int4 NOT NULL
+) PARTITION BY HASH ("tenant_id")
+;
+ALTER TABLE "public"."role_inheritance" OWNER TO "postgres";
+SELECT "public"."create_tenant_partitions"('role_inheritance');
+COMMENT ON COLUMN "public"."role_inheritance"."tenant_id" IS '所属租户，分区键';
+COMMENT ON TABLE "public"."role_inheritance" IS '角色继承关系，role_id 继承 parent_id 的全部权限';
+
+-- ----------------------------
+-- Records of role_inheritance
+-- ----------------------------
+BEGIN;
+COMMIT;
+
 -- ----------------------------
 -- Table structure for role_permissions
 -- ----------------------------
 DROP TABLE IF EXISTS "public"."role_permissions";
 CREATE TABLE "public"."role_permissions" (
+  "tenant_id" int4 NOT NULL DEFAULT 1,
   "role_id" int4 NOT NULL,
   "permission_id" int4 NOT NULL
-)
+) PARTITION BY HASH ("tenant_id")
 ;
 ALTER TABLE "public"."role_permissions" OWNER TO "postgres";
+COMMENT ON COLUMN "public"."role_permissions"."tenant_id" IS '所属租户，分区键';
+SELECT "public"."create_tenant_partitions"('role_permissions');
 
 -- ----------------------------
 -- Records of role_permissions
@@ -142,6 +305,7 @@ COMMIT;
 -- ----------------------------
 DROP TABLE IF EXISTS "public"."roles";
 CREATE TABLE "public"."roles" (
+  "tenant_id" int4 NOT NULL DEFAULT 1,
   "id" int4 NOT NULL DEFAULT nextval('roles_id_seq'::regclass),
   "name" varchar(64) COLLATE "pg_catalog"."default" NOT NULL,
   "display_name" varchar(128) COLLATE "pg_catalog"."default" NOT NULL,
@@ -151,9 +315,11 @@ CREATE TABLE "public"."roles" (
   "updated_at" timestamptz(6) NOT NULL DEFAULT now(),
   "is_deletable" bool NOT NULL DEFAULT false,
   "is_editable" bool NOT NULL DEFAULT false
-)
+) PARTITION BY HASH ("tenant_id")
 ;
 ALTER TABLE "public"."roles" OWNER TO "postgres";
+COMMENT ON COLUMN "public"."roles"."tenant_id" IS '所属租户，分区键';
+SELECT "public"."create_tenant_partitions"('roles');
 
 -- ----------------------------
 -- Records of roles
@@ -166,6 +332,42 @@ INSERT INTO "public"."roles" ("id", "name", "display_name", "description", "is_a
 INSERT INTO "public"."roles" ("id", "name", "display_name", "description", "is_active", "created_at", "updated_at", "is_deletable", "is_editable") VALUES (10, 'normal', '普通用户', '普通用户，只有基本的访问权限。', 't', '2025-11-14 06:43:13.51664+00', '2025-11-14 06:43:13.51664+00', 'f', 'f');
 COMMIT;
 
+-- ----------------------------
+-- Table structure for scheduler_leases
+-- ----------------------------
+DROP TABLE IF EXISTS "public"."scheduler_leases";
+CREATE TABLE "public"."scheduler_leases" (
+  "name" varchar(64) COLLATE "pg_catalog"."default" NOT NULL,
+  "holder" varchar(128) COLLATE "pg_catalog"."default" NOT NULL,
+  "expires_at" timestamptz(6) NOT NULL,
+  "acquired_at" timestamptz(6) NOT NULL DEFAULT now()
+)
+;
+ALTER TABLE "public"."scheduler_leases" OWNER TO "postgres";
+COMMENT ON TABLE "public"."scheduler_leases" IS '定时任务主节点租约，持有未过期租约的进程执行定时任务';
+
+-- ----------------------------
+-- Table structure for tenants
+-- ----------------------------
+DROP TABLE IF EXISTS "public"."tenants";
+CREATE TABLE "public"."tenants" (
+  "id" int4 NOT NULL DEFAULT nextval('tenants_id_seq'::regclass),
+  "name" varchar(64) COLLATE "pg_catalog"."default" NOT NULL,
+  "display_name" varchar(128) COLLATE "pg_catalog"."default" NOT NULL,
+  "is_active" bool NOT NULL DEFAULT true,
+  "created_at" timestamptz(6) NOT NULL DEFAULT now()
+)
+;
+ALTER TABLE "public"."tenants" OWNER TO "postgres";
+COMMENT ON TABLE "public"."tenants" IS '租户，users/roles/permissions 及其关联表按 tenant_id 哈希分区';
+
+-- ----------------------------
+-- Records of tenants
+-- ----------------------------
+BEGIN;
+INSERT INTO "public"."tenants" ("id", "name", "display_name", "is_active", "created_at") VALUES (1, 'default', '默认租户', 't', '2025-11-14 06:43:13.51664+00');
+COMMIT;
+
 -- ----------------------------
 -- Table structure for token_blacklist
 -- ----------------------------
@@ -185,16 +387,51 @@ ALTER TABLE "public"."token_blacklist" OWNER TO "postgres";
 BEGIN;
 COMMIT;
 
+-- ----------------------------
+-- Table structure for user_effective_permissions
+-- ----------------------------
+DROP TABLE IF EXISTS "public"."user_effective_permissions";
+CREATE TABLE "public"."user_effective_permissions" (
+  "tenant_id" int4 NOT NULL DEFAULT 1,
+  "user_id" int4 NOT NULL,
+  "permission_id" int4 NOT NULL,
+  "expires_at" timestamptz(6)
+) PARTITION BY HASH ("tenant_id")
+;
+ALTER TABLE "public"."user_effective_permissions" OWNER TO "postgres";
+SELECT "public"."create_tenant_partitions"('user_effective_permissions');
+COMMENT ON COLUMN "public"."user_effective_permissions"."expires_at" IS '支撑该权限的角色分配中最晚的过期时间，为空表示永久有效';
+COMMENT ON COLUMN "public"."user_effective_permissions"."tenant_id" IS '所属租户，分区键';
+COMMENT ON TABLE "public"."user_effective_permissions" IS '用户有效权限物化表（user_roles ⋈ role_closure ⋈ role_permissions 去重），由应用增量维护，可用 python -m console_server.cli.rbac rebuild 重建';
+
+-- ----------------------------
+-- Records of user_effective_permissions
+-- ----------------------------
+BEGIN;
+INSERT INTO "public"."user_effective_permissions" ("user_id", "permission_id") VALUES (41, 1);
+INSERT INTO "public"."user_effective_permissions" ("user_id", "permission_id") VALUES (43, 2);
+INSERT INTO "public"."user_effective_permissions" ("user_id", "permission_id") VALUES (44, 3);
+INSERT INTO "public"."user_effective_permissions" ("user_id", "permission_id") VALUES (45, 4);
+INSERT INTO "public"."user_effective_permissions" ("user_id", "permission_id") VALUES (46, 2);
+INSERT INTO "public"."user_effective_permissions" ("user_id", "permission_id") VALUES (46, 3);
+INSERT INTO "public"."user_effective_permissions" ("user_id", "permission_id") VALUES (46, 4);
+COMMIT;
+
 -- ----------------------------
 -- Table structure for user_roles
 -- ----------------------------
 DROP TABLE IF EXISTS "public"."user_roles";
 CREATE TABLE "public"."user_roles" (
+  "tenant_id" int4 NOT NULL DEFAULT 1,
   "user_id" int4 NOT NULL,
-  "role_id" int4 NOT NULL
-)
+  "role_id" int4 NOT NULL,
+  "expires_at" timestamptz(6)
+) PARTITION BY HASH ("tenant_id")
 ;
 ALTER TABLE "public"."user_roles" OWNER TO "postgres";
+COMMENT ON COLUMN "public"."user_roles"."tenant_id" IS '所属租户，分区键';
+SELECT "public"."create_tenant_partitions"('user_roles');
+COMMENT ON COLUMN "public"."user_roles"."expires_at" IS '角色分配的过期时间，为空表示永久有效';
 
 -- ----------------------------
 -- Records of user_roles
@@ -210,11 +447,32 @@ INSERT INTO "public"."user_roles" ("user_id", "role_id") VALUES (46, 13);
 INSERT INTO "public"."user_roles" ("user_id", "role_id") VALUES (46, 14);
 COMMIT;
 
+-- ----------------------------
+-- Table structure for user_roles_archive
+-- ----------------------------
+DROP TABLE IF EXISTS "public"."user_roles_archive";
+CREATE TABLE "public"."user_roles_archive" (
+  "tenant_id" int4 NOT NULL,
+  "user_id" int4 NOT NULL,
+  "role_id" int4 NOT NULL,
+  "expires_at" timestamptz(6)
+)
+;
+ALTER TABLE "public"."user_roles_archive" OWNER TO "postgres";
+COMMENT ON TABLE "public"."user_roles_archive" IS '已归档用户的角色分配（冷数据），用户恢复时迁回 user_roles';
+
+-- ----------------------------
+-- Records of user_roles_archive
+-- ----------------------------
+BEGIN;
+COMMIT;
+
 -- ----------------------------
 -- Table structure for users
 -- ----------------------------
 DROP TABLE IF EXISTS "public"."users";
 CREATE TABLE "public"."users" (
+  "tenant_id" int4 NOT NULL DEFAULT 1,
   "id" int4 NOT NULL DEFAULT nextval('users_id_seq'::regclass),
   "name" varchar(100) COLLATE "pg_catalog"."default" NOT NULL,
   "email" varchar(100) COLLATE "pg_catalog"."default" NOT NULL,
@@ -224,10 +482,16 @@ CREATE TABLE "public"."users" (
   "created_at" timestamptz(6) NOT NULL DEFAULT now(),
   "updated_at" timestamptz(6) NOT NULL DEFAULT now(),
   "is_deletable" bool NOT NULL DEFAULT false,
-  "is_editable" bool NOT NULL DEFAULT false
-)
+  "is_editable" bool NOT NULL DEFAULT false,
+  "last_login_at" timestamptz(6),
+  "last_seen_at" timestamptz(6)
+) PARTITION BY HASH ("tenant_id")
 ;
 ALTER TABLE "public"."users" OWNER TO "postgres";
+COMMENT ON COLUMN "public"."users"."tenant_id" IS '所属租户，分区键';
+COMMENT ON COLUMN "public"."users"."last_login_at" IS '最近登录时间，由应用批量写入，不刷新 updated_at';
+COMMENT ON COLUMN "public"."users"."last_seen_at" IS '最近活跃时间，精度为写入间隔，不建索引以保持 HOT 更新';
+SELECT "public"."create_tenant_partitions"('users');
 
 -- ----------------------------
 -- Records of users
@@ -241,6 +505,36 @@ INSERT INTO "public"."users" ("id", "name", "email", "password", "description",
 INSERT INTO "public"."users" ("id", "name", "email", "password", "description", "is_active", "created_at", "updated_at", "is_deletable", "is_editable") VALUES (41, '管理员', 'admin@example.com', '$2b$12$FTri.LHs.2oC.PxrUwZ7z.QfQjfhv/kYPtnMsZf/ouqo25b7GWbXi', '是管理员', 't', '2025-11-14 06:43:13.51664+00', '2025-11-25 07:18:33.115819+00', 'f', 'f');
 COMMIT;
 
+-- ----------------------------
+-- Table structure for users_archive
+-- ----------------------------
+DROP TABLE IF EXISTS "public"."users_archive";
+CREATE TABLE "public"."users_archive" (
+  "tenant_id" int4 NOT NULL,
+  "id" int4 NOT NULL,
+  "name" varchar(100) COLLATE "pg_catalog"."default" NOT NULL,
+  "email" varchar(100) COLLATE "pg_catalog"."default" NOT NULL,
+  "password" varchar(100) COLLATE "pg_catalog"."default",
+  "description" varchar(128) COLLATE "pg_catalog"."default",
+  "is_active" bool NOT NULL,
+  "created_at" timestamptz(6) NOT NULL,
+  "updated_at" timestamptz(6) NOT NULL,
+  "is_deletable" bool NOT NULL,
+  "is_editable" bool NOT NULL,
+  "archived_at" timestamptz(6) NOT NULL DEFAULT now(),
+  "last_login_at" timestamptz(6),
+  "last_seen_at" timestamptz(6)
+)
+;
+ALTER TABLE "public"."users_archive" OWNER TO "postgres";
+COMMENT ON TABLE "public"."users_archive" IS '长期禁用的用户（冷数据），由 python -m console_server.cli.archive run 或定时任务分批迁入，登录或管理员查询时自动恢复';
+
+-- ----------------------------
+-- Records of users_archive
+-- ----------------------------
+BEGIN;
+COMMIT;
+
 -- ----------------------------
 -- Function structure for trigger_set_updated_at
 -- ----------------------------
@@ -248,6 +542,10 @@ DROP FUNCTION IF EXISTS "public"."trigger_set_updated_at"();
 CREATE FUNCTION "public"."trigger_set_updated_at"()
   RETURNS "pg_catalog"."trigger" AS $BODY$
 BEGIN
+    -- 应用批量写入 last_login_at 等统计列时 SET LOCAL console.skip_updated_at = 'on'，不改变 updated_at
+    IF current_setting('console.skip_updated_at', true) = 'on' THEN
+        RETURN NEW;
+    END IF;
     NEW.updated_at = now();
     RETURN NEW;
 END;
@@ -256,6 +554,17 @@ $BODY$
   COST 100;
 ALTER FUNCTION "public"."trigger_set_updated_at"() OWNER TO "postgres";
 
+-- ----------------------------
+-- Alter sequences owned by
+-- ----------------------------
+ALTER SEQUENCE "public"."audit_logs_id_seq"
+OWNED BY "public"."audit_logs"."id";
+SELECT setval('"public"."audit_logs_id_seq"', 1, false);
+
+ALTER SEQUENCE "public"."background_jobs_id_seq"
+OWNED BY "public"."background_jobs"."id";
+SELECT setval('"public"."background_jobs_id_seq"', 1, false);
+
 -- ----------------------------
 -- Alter sequences owned by
 -- ----------------------------
@@ -270,6 +579,13 @@ ALTER SEQUENCE "public"."roles_id_seq"
 OWNED BY "public"."roles"."id";
 SELECT setval('"public"."roles_id_seq"', 15, true);
 
+-- ----------------------------
+-- Alter sequences owned by
+-- ----------------------------
+ALTER SEQUENCE "public"."tenants_id_seq"
+OWNED BY "public"."tenants"."id";
+SELECT setval('"public"."tenants_id_seq"', 1, true);
+
 -- ----------------------------
 -- Alter sequences owned by
 -- ----------------------------
@@ -284,10 +600,44 @@ ALTER SEQUENCE "public"."users_id_seq"
 OWNED BY "public"."users"."id";
 SELECT setval('"public"."users_id_seq"', 47, true);
 
+-- ----------------------------
+-- Indexes structure for table audit_logs
+-- ----------------------------
+CREATE INDEX "idx_audit_logs_actor_id" ON "public"."audit_logs" USING btree (
+  "tenant_id" "pg_catalog"."int4_ops" ASC NULLS LAST,
+  "actor_id" "pg_catalog"."int4_ops" ASC NULLS LAST,
+  "id" "pg_catalog"."int8_ops" ASC NULLS LAST
+);
+
+-- ----------------------------
+-- Primary Key structure for table audit_logs
+-- ----------------------------
+ALTER TABLE "public"."audit_logs" ADD CONSTRAINT "audit_logs_pkey" PRIMARY KEY ("tenant_id", "id");
+
+-- ----------------------------
+-- Indexes structure for table background_jobs
+-- ----------------------------
+CREATE INDEX "idx_background_jobs_queued_run_at" ON "public"."background_jobs" USING btree (
+  "run_at" "pg_catalog"."timestamptz_ops" ASC NULLS LAST
+) WHERE "status" = 'queued'::text;
+CREATE INDEX "idx_background_jobs_running_locked_until" ON "public"."background_jobs" USING btree (
+  "locked_until" "pg_catalog"."timestamptz_ops" ASC NULLS LAST
+) WHERE "status" = 'running'::text;
+CREATE INDEX "idx_background_jobs_tenant_created_at" ON "public"."background_jobs" USING btree (
+  "tenant_id" "pg_catalog"."int4_ops" ASC NULLS LAST,
+  "created_at" "pg_catalog"."timestamptz_ops" ASC NULLS LAST
+);
+
+-- ----------------------------
+-- Primary Key structure for table background_jobs
+-- ----------------------------
+ALTER TABLE "public"."background_jobs" ADD CONSTRAINT "background_jobs_pkey" PRIMARY KEY ("id");
+
 -- ----------------------------
 -- Indexes structure for table permissions
 -- ----------------------------
 CREATE UNIQUE INDEX "idx_permissions_name" ON "public"."permissions" USING btree (
+  "tenant_id" "pg_catalog"."int4_ops" ASC NULLS LAST,
   "name" COLLATE "pg_catalog"."default" "pg_catalog"."text_ops" ASC NULLS LAST
 );
 
@@ -301,27 +651,56 @@ EXECUTE PROCEDURE "public"."trigger_set_updated_at"();
 -- ----------------------------
 -- Uniques structure for table permissions
 -- ----------------------------
-ALTER TABLE "public"."permissions" ADD CONSTRAINT "permissions_name_key" UNIQUE ("name");
+ALTER TABLE "public"."permissions" ADD CONSTRAINT "permissions_name_key" UNIQUE ("tenant_id", "name");
 
 -- ----------------------------
 -- Primary Key structure for table permissions
 -- ----------------------------
-ALTER TABLE "public"."permissions" ADD CONSTRAINT "permissions_pkey" PRIMARY KEY ("id");
+ALTER TABLE "public"."permissions" ADD CONSTRAINT "permissions_pkey" PRIMARY KEY ("tenant_id", "id");
+
+-- ----------------------------
+-- Indexes structure for table role_closure
+-- ----------------------------
+CREATE INDEX "idx_role_closure_ancestor_id" ON "public"."role_closure" USING btree (
+  "tenant_id" "pg_catalog"."int4_ops" ASC NULLS LAST,
+  "ancestor_id" "pg_catalog"."int4_ops" ASC NULLS LAST
+);
+
+-- ----------------------------
+-- Primary Key structure for table role_closure
+-- ----------------------------
+ALTER TABLE "public"."role_closure" ADD CONSTRAINT "role_closure_pkey" PRIMARY KEY ("tenant_id", "role_id", "ancestor_id");
+
+-- ----------------------------
+-- Indexes structure for table role_inheritance
+-- ----------------------------
+CREATE INDEX "idx_role_inheritance_parent_id" ON "public"."role_inheritance" USING btree (
+  "tenant_id" "pg_catalog"."int4_ops" ASC NULLS LAST,
+  "parent_id" "pg_catalog"."int4_ops" ASC NULLS LAST
+);
+
+-- ----------------------------
+-- Primary Key structure for table role_inheritance
+-- ----------------------------
+ALTER TABLE "public"."role_inheritance" ADD CONSTRAINT "role_inheritance_pkey" PRIMARY KEY ("tenant_id", "role_id", "parent_id");
+ALTER TABLE "public"."role_inheritance" ADD CONSTRAINT "role_inheritance_no_self" CHECK ("role_id" <> "parent_id");
 
 -- ----------------------------
 -- Indexes structure for table role_permissions
 -- ----------------------------
 CREATE INDEX "idx_role_permissions_permission_id" ON "public"."role_permissions" USING btree (
+  "tenant_id" "pg_catalog"."int4_ops" ASC NULLS LAST,
   "permission_id" "pg_catalog"."int4_ops" ASC NULLS LAST
 );
 CREATE INDEX "idx_role_permissions_role_id" ON "public"."role_permissions" USING btree (
+  "tenant_id" "pg_catalog"."int4_ops" ASC NULLS LAST,
   "role_id" "pg_catalog"."int4_ops" ASC NULLS LAST
 );
 
 -- ----------------------------
 -- Primary Key structure for table role_permissions
 -- ----------------------------
-ALTER TABLE "public"."role_permissions" ADD CONSTRAINT "role_permissions_pkey" PRIMARY KEY ("role_id", "permission_id");
+ALTER TABLE "public"."role_permissions" ADD CONSTRAINT "role_permissions_pkey" PRIMARY KEY ("tenant_id", "role_id", "permission_id");
 
 -- ----------------------------
 -- Indexes structure for table roles
@@ -339,12 +718,27 @@ CREATE INDEX "idx_roles_name" ON "public"."roles" USING btree (
 -- ----------------------------
 -- Uniques structure for table roles
 -- ----------------------------
-ALTER TABLE "public"."roles" ADD CONSTRAINT "roles_name_key" UNIQUE ("name");
+ALTER TABLE "public"."roles" ADD CONSTRAINT "roles_name_key" UNIQUE ("tenant_id", "name");
 
 -- ----------------------------
 -- Primary Key structure for table roles
 -- ----------------------------
-ALTER TABLE "public"."roles" ADD CONSTRAINT "roles_pkey" PRIMARY KEY ("id");
+ALTER TABLE "public"."roles" ADD CONSTRAINT "roles_pkey" PRIMARY KEY ("tenant_id", "id");
+
+-- ----------------------------
+-- Uniques structure for table tenants
+-- ----------------------------
+ALTER TABLE "public"."tenants" ADD CONSTRAINT "tenants_name_key" UNIQUE ("name");
+
+-- ----------------------------
+-- Primary Key structure for table scheduler_leases
+-- ----------------------------
+ALTER TABLE "public"."scheduler_leases" ADD CONSTRAINT "scheduler_leases_pkey" PRIMARY KEY ("name");
+
+-- ----------------------------
+-- Primary Key structure for table tenants
+-- ----------------------------
+ALTER TABLE "public"."tenants" ADD CONSTRAINT "tenants_pkey" PRIMARY KEY ("id");
 
 -- ----------------------------
 -- Indexes structure for table token_blacklist
@@ -364,20 +758,43 @@ CREATE UNIQUE INDEX "ix_token_blacklist_token_hash" ON "public"."token_blacklist
 -- ----------------------------
 ALTER TABLE "public"."token_blacklist" ADD CONSTRAINT "token_blacklist_pkey" PRIMARY KEY ("id");
 
+-- ----------------------------
+-- Indexes structure for table user_effective_permissions
+-- ----------------------------
+CREATE INDEX "idx_user_effective_permissions_permission_id" ON "public"."user_effective_permissions" USING btree (
+  "tenant_id" "pg_catalog"."int4_ops" ASC NULLS LAST,
+  "permission_id" "pg_catalog"."int4_ops" ASC NULLS LAST
+);
+
+-- ----------------------------
+-- Primary Key structure for table user_effective_permissions
+-- ----------------------------
+ALTER TABLE "public"."user_effective_permissions" ADD CONSTRAINT "user_effective_permissions_pkey" PRIMARY KEY ("tenant_id", "user_id", "permission_id");
+
 -- ----------------------------
 -- Indexes structure for table user_roles
 -- ----------------------------
 CREATE INDEX "idx_user_roles_role_id_copy1" ON "public"."user_roles" USING btree (
+  "tenant_id" "pg_catalog"."int4_ops" ASC NULLS LAST,
   "role_id" "pg_catalog"."int4_ops" ASC NULLS LAST
 );
 CREATE INDEX "idx_user_roles_user_id_copy1" ON "public"."user_roles" USING btree (
+  "tenant_id" "pg_catalog"."int4_ops" ASC NULLS LAST,
   "user_id" "pg_catalog"."int4_ops" ASC NULLS LAST
 );
+CREATE INDEX "idx_user_roles_expires_at" ON "public"."user_roles" USING btree (
+  "expires_at" "pg_catalog"."timestamptz_ops" ASC NULLS LAST
+) WHERE "expires_at" IS NOT NULL;
 
 -- ----------------------------
 -- Primary Key structure for table user_roles
 -- ----------------------------
-ALTER TABLE "public"."user_roles" ADD CONSTRAINT "user_roles_copy1_pkey" PRIMARY KEY ("user_id", "role_id");
+ALTER TABLE "public"."user_roles" ADD CONSTRAINT "user_roles_copy1_pkey" PRIMARY KEY ("tenant_id", "user_id", "role_id");
+
+-- ----------------------------
+-- Primary Key structure for table user_roles_archive
+-- ----------------------------
+ALTER TABLE "public"."user_roles_archive" ADD CONSTRAINT "user_roles_archive_pkey" PRIMARY KEY ("tenant_id", "user_id", "role_id");
 
 -- ----------------------------
 -- Indexes structure for table users
@@ -389,6 +806,7 @@ CREATE INDEX "ix_users_description" ON "public"."users" USING btree (
   "description" COLLATE "pg_catalog"."default" "pg_catalog"."text_ops" ASC NULLS LAST
 );
 CREATE UNIQUE INDEX "ix_users_email" ON "public"."users" USING btree (
+  "tenant_id" "pg_catalog"."int4_ops" ASC NULLS LAST,
   "email" COLLATE "pg_catalog"."default" "pg_catalog"."text_ops" ASC NULLS LAST
 );
 CREATE INDEX "ix_users_id" ON "public"."users" USING btree (
@@ -403,20 +821,79 @@ CREATE INDEX "ix_users_name" ON "public"."users" USING btree (
 CREATE INDEX "ix_users_updated_at" ON "public"."users" USING btree (
   "updated_at" "pg_catalog"."timestamptz_ops" ASC NULLS LAST
 );
+CREATE INDEX "idx_users_inactive_updated_at" ON "public"."users" USING btree (
+  "updated_at" "pg_catalog"."timestamptz_ops" ASC NULLS LAST
+) WHERE "is_active" = false;
 
 -- ----------------------------
 -- Primary Key structure for table users
 -- ----------------------------
-ALTER TABLE "public"."users" ADD CONSTRAINT "users_pkey" PRIMARY KEY ("id");
+ALTER TABLE "public"."users" ADD CONSTRAINT "users_pkey" PRIMARY KEY ("tenant_id", "id");
+
+-- ----------------------------
+-- Indexes structure for table users_archive
+-- ----------------------------
+CREATE UNIQUE INDEX "idx_users_archive_email" ON "public"."users_archive" USING btree (
+  "tenant_id" "pg_catalog"."int4_ops" ASC NULLS LAST,
+  "email" COLLATE "pg_catalog"."default" "pg_catalog"."text_ops" ASC NULLS LAST
+);
+
+-- ----------------------------
+-- Primary Key structure for table users_archive
+-- ----------------------------
+ALTER TABLE "public"."users_archive" ADD CONSTRAINT "users_archive_pkey" PRIMARY KEY ("tenant_id", "id");
+
+-- ----------------------------
+-- Foreign Keys structure for table audit_logs
+-- ----------------------------
+ALTER TABLE "public"."audit_logs" ADD CONSTRAINT "audit_logs_tenant_id_fkey" FOREIGN KEY ("tenant_id") REFERENCES "public"."tenants" ("id") ON DELETE NO ACTION ON UPDATE NO ACTION;
+
+-- ----------------------------
+-- Foreign Keys structure for table background_jobs
+-- ----------------------------
+ALTER TABLE "public"."background_jobs" ADD CONSTRAINT "background_jobs_tenant_id_fkey" FOREIGN KEY ("tenant_id") REFERENCES "public"."tenants" ("id") ON DELETE NO ACTION ON UPDATE NO ACTION;
+
+-- ----------------------------
+-- Foreign Keys structure for table permissions
+-- ----------------------------
+ALTER TABLE "public"."permissions" ADD CONSTRAINT "permissions_tenant_id_fkey" FOREIGN KEY ("tenant_id") REFERENCES "public"."tenants" ("id") ON DELETE NO ACTION ON UPDATE NO ACTION;
+
+-- ----------------------------
+-- Foreign Keys structure for table role_closure
+-- ----------------------------
+ALTER TABLE "public"."role_closure" ADD CONSTRAINT "role_closure_ancestor_id_fkey" FOREIGN KEY ("tenant_id", "ancestor_id") REFERENCES "public"."roles" ("tenant_id", "id") ON DELETE CASCADE ON UPDATE NO ACTION;
+ALTER TABLE "public"."role_closure" ADD CONSTRAINT "role_closure_role_id_fkey" FOREIGN KEY ("tenant_id", "role_id") REFERENCES "public"."roles" ("tenant_id", "id") ON DELETE CASCADE ON UPDATE NO ACTION;
+
+-- ----------------------------
+-- Foreign Keys structure for table role_inheritance
+-- ----------------------------
+ALTER TABLE "public"."role_inheritance" ADD CONSTRAINT "role_inheritance_parent_id_fkey" FOREIGN KEY ("tenant_id", "parent_id") REFERENCES "public"."roles" ("tenant_id", "id") ON DELETE CASCADE ON UPDATE NO ACTION;
+ALTER TABLE "public"."role_inheritance" ADD CONSTRAINT "role_inheritance_role_id_fkey" FOREIGN KEY ("tenant_id", "role_id") REFERENCES "public"."roles" ("tenant_id", "id") ON DELETE CASCADE ON UPDATE NO ACTION;
 
 -- ----------------------------
 -- Foreign Keys structure for table role_permissions
 -- ----------------------------
-ALTER TABLE "public"."role_permissions" ADD CONSTRAINT "role_permissions_permission_id_fkey" FOREIGN KEY ("permission_id") REFERENCES "public"."permissions" ("id") ON DELETE CASCADE ON UPDATE NO ACTION;
-ALTER TABLE "public"."role_permissions" ADD CONSTRAINT "role_permissions_role_id_fkey" FOREIGN KEY ("role_id") REFERENCES "public"."roles" ("id") ON DELETE CASCADE ON UPDATE NO ACTION;
+ALTER TABLE "public"."role_permissions" ADD CONSTRAINT "role_permissions_permission_id_fkey" FOREIGN KEY ("tenant_id", "permission_id") REFERENCES "public"."permissions" ("tenant_id", "id") ON DELETE CASCADE ON UPDATE NO ACTION;
+ALTER TABLE "public"."role_permissions" ADD CONSTRAINT "role_permissions_role_id_fkey" FOREIGN KEY ("tenant_id", "role_id") REFERENCES "public"."roles" ("tenant_id", "id") ON DELETE CASCADE ON UPDATE NO ACTION;
+
+-- ----------------------------
+-- Foreign Keys structure for table roles
+-- ----------------------------
+ALTER TABLE "public"."roles" ADD CONSTRAINT "roles_tenant_id_fkey" FOREIGN KEY ("tenant_id") REFERENCES "public"."tenants" ("id") ON DELETE NO ACTION ON UPDATE NO ACTION;
 
 -- ----------------------------
 -- Foreign Keys structure for table user_roles
 -- ----------------------------
-ALTER TABLE "public"."user_roles" ADD CONSTRAINT "user_roles_copy1_role_id_fkey" FOREIGN KEY ("role_id") REFERENCES "public"."roles" ("id") ON DELETE CASCADE ON UPDATE NO ACTION;
-ALTER TABLE "public"."user_roles" ADD CONSTRAINT "user_roles_copy1_user_id_fkey" FOREIGN KEY ("user_id") REFERENCES "public"."users" ("id") ON DELETE CASCADE ON UPDATE NO ACTION;
+ALTER TABLE "public"."user_roles" ADD CONSTRAINT "user_roles_copy1_role_id_fkey" FOREIGN KEY ("tenant_id", "role_id") REFERENCES "public"."roles" ("tenant_id", "id") ON DELETE CASCADE ON UPDATE NO ACTION;
+ALTER TABLE "public"."user_roles" ADD CONSTRAINT "user_roles_copy1_user_id_fkey" FOREIGN KEY ("tenant_id", "user_id") REFERENCES "public"."users" ("tenant_id", "id") ON DELETE CASCADE ON UPDATE NO ACTION;
+
+-- ----------------------------
+-- Foreign Keys structure for table user_effective_permissions
+-- ----------------------------
+ALTER TABLE "public"."user_effective_permissions" ADD CONSTRAINT "user_effective_permissions_permission_id_fkey" FOREIGN KEY ("tenant_id", "permission_id") REFERENCES "public"."permissions" ("tenant_id", "id") ON DELETE CASCADE ON UPDATE NO ACTION;
+ALTER TABLE "public"."user_effective_permissions" ADD CONSTRAINT "user_effective_permissions_user_id_fkey" FOREIGN KEY ("tenant_id", "user_id") REFERENCES "public"."users" ("tenant_id", "id") ON DELETE CASCADE ON UPDATE NO ACTION;
+
+-- ----------------------------
+-- Foreign Keys structure for table users
+-- ----------------------------
+ALTER TABLE "public"."users" ADD CONSTRAINT "users_tenant_id_fkey" FOREIGN KEY ("tenant_id") REFERENCES "public"."tenants" ("id") ON DELETE NO ACTION ON UPDATE NO ACTION;
@@ -1,4 +1,5 @@
 from datetime import timedelta
+from typing import cast
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -6,9 +7,13 @@ from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 
 from console_server.core.constants import AUTH_PATH
 from console_server.db import database
+from console_server.core.tenant import get_tenant_id
 from console_server.model.rbac import User, Role
+from console_server.model.tenant import Tenant
 from console_server.schema.common import SuccessResponse
+from console_server.schema.job import JobResponse
 from console_server.schema.user import UserResponse, UserCreate, Token, UserLogin
+from console_server.socket.main import logout_token
 from console_server.utils.auth import (
     get_current_user,
     get_password_hash,
@@ -16,16 +21,23 @@ from console_server.utils.auth import (
     is_token_blacklisted,
     verify_password,
     oauth2_scheme,
-    cleanup_expired_tokens,
     add_token_to_blacklist,
+    check_permission,
 )
+from console_server.utils.activity import user_activity
+from console_server.utils.archive import find_archived_user, restore_archived_user
+from console_server.utils.audit import audit_log
+from console_server.utils.rbac import grant_effective_permissions
+from console_server.utils import jobs, tracing
+from console_server.utils.tracing import TracedRoute
 from console_server.core.config import settings
-from console_server.utils.console import print_success
+from console_server.utils.console import print_info, print_success
 
 
 auth_router = APIRouter(
     prefix=f"/{AUTH_PATH}",
     tags=[AUTH_PATH],
+    route_class=TracedRoute,
 )
 
 
@@ -37,9 +49,16 @@ auth_router = APIRouter(
     response_model=UserResponse,
 )
 async def create_user(user: UserCreate, db: AsyncSession = Depends(database.get_db)):
-    # 检查邮箱是否已注册
+    # 检查租户是否存在且启用（租户由请求头指定）
+    tenant = await db.get(Tenant, get_tenant_id())
+    if tenant is None or not tenant.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Tenant not found"
+        )
+
+    # 检查邮箱是否已注册（冷表中的用户同样视为已注册，但不恢复）
     result = await db.execute(select(User).where(User.email == user.email))
-    if result.scalar_one_or_none():
+    if result.scalar_one_or_none() or await find_archived_user(db, user.email):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered"
         )
@@ -57,6 +76,9 @@ async def create_user(user: UserCreate, db: AsyncSession = Depends(database.get_
     new_user.roles.append(default_role)
 
     db.add(new_user)
+    await db.flush()
+    # 同步默认角色带来的有效权限
+    await grant_effective_permissions(db, user_ids=[cast(int, new_user.id)])
     await db.commit()
     # ⚠️ 重要：显式加载 roles（避免 lazy load 失败）
     await db.refresh(new_user, ["roles"])
@@ -81,37 +103,65 @@ async def create_user(user: UserCreate, db: AsyncSession = Depends(database.get_
 )
 async def login(
     form_data: UserLogin,
+    request: Request,
     response: Response,
     db: AsyncSession = Depends(database.get_db),
 ):
     # 验证用户
-    result = await db.execute(select(User).where(User.email == form_data.email))
-    user = result.scalar_one_or_none()
+    with tracing.span("auth.load_user"):
+        result = await db.execute(select(User).where(User.email == form_data.email))
+        user = result.scalar_one_or_none()
+        # 长期未启用的用户已迁入冷表，只读取，密码校验通过后才恢复
+        archived = (
+            await find_archived_user(db, form_data.email) if user is None else None
+        )
+        account = user if user is not None else archived
 
-    if not user or not verify_password(form_data.password, str(user.password)):
+    with tracing.span("auth.verify_password"):
+        verified = account is not None and verify_password(
+            form_data.password, str(account.password)
+        )
+    if verified and archived is not None:
+        with tracing.span("auth.restore_archived_user"):
+            await restore_archived_user(db, user_id=archived.id)
+            result = await db.execute(
+                select(User).where(User.email == form_data.email)
+            )
+            user = result.scalar_one_or_none()
+    if not user or not verified:
+        await audit_log.record(
+            "auth.login",
+            actor_id=cast(int, account.id) if account is not None else None,
+            success=False,
+            detail={"email": form_data.email},
+            request=request,
+        )
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="邮箱或密码错误",
             headers={"WWW-Authenticate": settings.TOKEN_TYPE},
         )
 
-    # 创建访问 token
-    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(
-        data={
-            "sub": user.email,
-            "is_active": user.is_active,
-        },
-        expires_delta=access_token_expires,
-    )
+    with tracing.span("auth.issue_tokens"):
+        # 创建访问 token
+        access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+        access_token = create_access_token(
+            data={
+                "sub": user.email,
+                "is_active": user.is_active,
+                "tid": user.tenant_id,
+            },
+            expires_delta=access_token_expires,
+        )
 
-    # 创建刷新 token
-    refresh_token = create_access_token(
-        data={
-            "sub": user.email,
-        },
-        expires_delta=timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAY),
-    )
+        # 创建刷新 token
+        refresh_token = create_access_token(
+            data={
+                "sub": user.email,
+                "tid": user.tenant_id,
+            },
+            expires_delta=timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAY),
+        )
     # 设置 refresh_token 到 Cookie
     response.set_cookie(
         key="refresh_token",
@@ -122,6 +172,8 @@ async def login(
         max_age=settings.REFRESH_TOKEN_EXPIRE_DAY * 24 * 60 * 60,  # 转换为秒
         path="/",
     )
+    await audit_log.record("auth.login", actor_id=cast(int, user.id), request=request)
+    user_activity.touch(cast(int, user.tenant_id), cast(int, user.id), login=True)
 
     return {
         "access_token": access_token,
@@ -172,6 +224,11 @@ async def logout(
         )
 
         print_success(f"用户 {current_user.name} 退出登录")
+        await audit_log.record(
+            "auth.logout", actor_id=cast(int, current_user.id), request=request
+        )
+        # 同一 token 的推送连接通知客户端退出（其他设备的会话不受影响）
+        await logout_token(access_token)
 
         return SuccessResponse()
     except HTTPException:
@@ -190,8 +247,9 @@ async def logout(
 @auth_router.post(
     "/cleanup-expired-tokens",
     summary="清理过期 token",
-    description="清理黑名单中已过期的 token 记录，释放数据库空间",
-    status_code=status.HTTP_200_OK,
+    description="提交后台任务分批清理黑名单中已过期的 token 记录，通过 GET /api/v1/job/{job_id} 查看进度",
+    response_model=JobResponse,
+    status_code=status.HTTP_202_ACCEPTED,
 )
 async def clean_up_expired_tokens(
     current_user: User = Depends(get_current_user),
@@ -200,18 +258,16 @@ async def clean_up_expired_tokens(
     """
     清理过期 token 记录
 
-    这是一个管理接口，用于清理黑名单中已过期的 token。
-    建议定期调用此接口（如通过定时任务）以保持数据库整洁。
+    这是一个管理接口，用于清理黑名单中已过期的 token。删除在后台任务中分批执行，不占用请求；
+    已有等待中或执行中的清理任务时返回该任务。
     """
-    try:
-        deleted_count = await cleanup_expired_tokens(db)
-        print(f"已清理 {deleted_count} 个过期 token")
-        return SuccessResponse()
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"清理过期 token 时发生错误: {str(e)}",
-        )
+    # 与 POST /job 提交该类型任务的权限一致
+    permission = jobs.job_permission("cleanup_token_blacklist")
+    if permission is not None:
+        await check_permission(current_user, db, *permission)
+    job = await jobs.submit("cleanup_token_blacklist", {}, created_by=current_user.id)
+    print_info(f"已提交清理过期 token 任务 {job.id}")
+    return job
 
 
 # 如果 access_token 过期，根据 refresh_token 判断是否重新登录，还是刷新 access_token
@@ -241,7 +297,16 @@ async def refresh_token(
                 headers={"WWW-Authenticate": "Bearer", "Location": "/login"},
             )
         # 检查 refresh_token 是否在黑名单中
-        if await is_token_blacklisted(refresh_token, db):
+        with tracing.span("auth.blacklist_check"):
+            revoked = await is_token_blacklisted(refresh_token, db)
+        if revoked:
+            # 已撤销的刷新令牌被再次使用，可能已泄露
+            await audit_log.record(
+                "auth.refresh",
+                success=False,
+                detail={"reason": "revoked"},
+                request=request,
+            )
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="刷新令牌已被撤销，请重新登录",
@@ -251,23 +316,28 @@ async def refresh_token(
         # 验证并获取用户信息
         user = await get_current_user(refresh_token, db)
 
-        # 创建新的访问令牌
-        access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-        new_access_token = create_access_token(
-            data={
-                "sub": user.email,
-                "is_active": user.is_active,
-            },
-            expires_delta=access_token_expires,
-        )
+        with tracing.span("auth.issue_tokens"):
+            # 创建新的访问令牌
+            access_token_expires = timedelta(
+                minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES
+            )
+            new_access_token = create_access_token(
+                data={
+                    "sub": user.email,
+                    "is_active": user.is_active,
+                    "tid": user.tenant_id,
+                },
+                expires_delta=access_token_expires,
+            )
 
-        # 创建新的刷新令牌
-        new_refresh_token = create_access_token(
-            data={
-                "sub": user.email,
-            },
-            expires_delta=timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAY),
-        )
+            # 创建新的刷新令牌
+            new_refresh_token = create_access_token(
+                data={
+                    "sub": user.email,
+                    "tid": user.tenant_id,
+                },
+                expires_delta=timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAY),
+            )
 
         # 将新的 refresh_token 设置到 Cookie 中
         response.set_cookie(
@@ -281,7 +351,9 @@ async def refresh_token(
         )
 
         # 将旧的 refresh_token 加入黑名单
-        await add_token_to_blacklist(refresh_token, db)
+        with tracing.span("auth.revoke_refresh_token"):
+            await add_token_to_blacklist(refresh_token, db)
+        await audit_log.record("auth.refresh", actor_id=cast(int, user.id), request=request)
 
         return Token(
             access_token=new_access_token,
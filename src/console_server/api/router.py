@@ -1,11 +1,15 @@
 from fastapi import APIRouter
+from fastapi.responses import JSONResponse, Response
 
 from console_server.schema.common import SuccessResponse
+from console_server.utils import metrics
+from console_server.utils.health import health_checker
+from console_server.utils.tracing import TracedRoute
 
 from .v1.router import v1_router
 from .auth import auth_router
 
-router = APIRouter()
+router = APIRouter(route_class=TracedRoute)
 router.include_router(v1_router)
 router.include_router(auth_router)
 
@@ -17,3 +21,37 @@ router.include_router(auth_router)
 )
 async def health(tag="服务测试"):
     return SuccessResponse()
+
+
+@router.get(
+    "/health/live",
+    summary="存活探针",
+    description="进程能处理请求即返回 200，不检查任何依赖",
+    include_in_schema=False,
+)
+async def liveness():
+    return SuccessResponse()
+
+
+@router.get(
+    "/health/ready",
+    summary="就绪探针",
+    description="读取后台缓存的检查结果（数据库、连接池、事件循环延迟、调度器），任一项不满足时返回 503",
+    include_in_schema=False,
+)
+async def readiness():
+    ready, checks = health_checker.readiness()
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"detail": "ok" if ready else "not ready", "checks": checks},
+    )
+
+
+@router.get(
+    "/metrics",
+    summary="监控指标",
+    description="Prometheus 文本格式的进程内指标（无需认证）",
+    include_in_schema=False,
+)
+async def get_metrics():
+    return Response(content=metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE)
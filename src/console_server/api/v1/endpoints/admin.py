@@ -0,0 +1,289 @@
+import asyncio
+import threading
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import PlainTextResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from console_server.core.constants import (
+    ADMIN_PATH,
+    ADMIN_GET_API,
+    ADMIN_POST_API,
+    ADMIN_DELETE_API,
+)
+from console_server.core.tenant import get_tenant_id
+from console_server.db import database
+from console_server.db.slow_query import slow_query_log
+from console_server.model.audit import AuditLog
+from console_server.model.rbac import User
+from console_server.schema.admin import (
+    AllocationStatResponse,
+    AuditLogResponse,
+    LoopBlockerResponse,
+    MemorySnapshotResponse,
+    MemoryStatusResponse,
+    SlowQueryResponse,
+)
+from console_server.schema.common import SuccessResponse
+from console_server.utils import tracing
+from console_server.utils.loop_monitor import loop_monitor
+from console_server.utils.memory import GROUP_BY, memory_profiler
+from console_server.utils.profiler import ProfilerBusy, profiler, render_collapsed
+from console_server.utils.auth import require_operator, require_permission
+from console_server.core.config import settings
+from console_server.utils.tracing import TracedRoute
+
+
+router = APIRouter(
+    prefix=f"/{ADMIN_PATH}", tags=[ADMIN_PATH], route_class=TracedRoute
+)
+
+
+# 查看慢查询
+@router.get(
+    "/slow-queries",
+    summary="查看慢查询",
+    description="按时间倒序返回本进程记录的当前租户慢查询（多 worker 部署时每个进程各自记录）",
+    response_model=List[SlowQueryResponse],
+)
+async def get_slow_queries(
+    current_user: User = Depends(require_permission(ADMIN_PATH, ADMIN_GET_API)),
+    limit: int = Query(
+        50, ge=1, le=settings.SLOW_QUERY_BUFFER_SIZE, description="返回条数"
+    ),
+):
+    return slow_query_log.records(tenant_id=get_tenant_id(), limit=limit)
+
+
+# 清空慢查询
+@router.delete(
+    "/slow-queries",
+    summary="清空慢查询",
+    description="清空本进程记录的当前租户慢查询",
+    response_model=SuccessResponse,
+)
+async def clear_slow_queries(
+    current_user: User = Depends(require_permission(ADMIN_PATH, ADMIN_DELETE_API)),
+):
+    slow_query_log.clear(tenant_id=get_tenant_id())
+    return SuccessResponse()
+
+
+# 查看链路追踪
+@router.get(
+    "/traces",
+    summary="查看链路追踪",
+    description="以 OTLP/JSON 格式返回本进程最近采样的当前租户 trace，可直接导入 Jaeger 等工具",
+)
+async def get_traces(
+    current_user: User = Depends(require_permission(ADMIN_PATH, ADMIN_GET_API)),
+    limit: int = Query(
+        20, ge=1, le=settings.TRACE_BUFFER_SIZE, description="返回的 trace 数"
+    ),
+):
+    return tracing.to_otlp(
+        tracing.exporter.traces(tenant_id=get_tenant_id(), limit=limit)
+    )
+
+
+# 查看事件循环阻塞排行
+@router.get(
+    "/loop-blockers",
+    summary="查看事件循环阻塞排行",
+    description="按总阻塞时长倒序返回阻塞事件循环的调用栈（需开启 LOOP_MONITOR_ENABLED，按进程统计）",
+    response_model=List[LoopBlockerResponse],
+)
+async def get_loop_blockers(
+    current_user: User = Depends(require_operator(ADMIN_PATH, ADMIN_GET_API)),
+    limit: int = Query(20, ge=1, le=200, description="返回条数"),
+):
+    return loop_monitor.top_blockers(limit)
+
+
+# 清空事件循环阻塞排行
+@router.delete(
+    "/loop-blockers",
+    summary="清空事件循环阻塞排行",
+    description="清空本进程的阻塞统计",
+    response_model=SuccessResponse,
+)
+async def reset_loop_blockers(
+    current_user: User = Depends(require_operator(ADMIN_PATH, ADMIN_DELETE_API)),
+):
+    loop_monitor.reset()
+    return SuccessResponse()
+
+
+# 采样分析
+@router.get(
+    "/profile",
+    summary="采样分析",
+    description="对本进程所有线程（含事件循环）采样指定秒数，返回 collapsed stacks 文本，可用 flamegraph.pl / speedscope 生成火焰图（仅运维租户的管理员）",
+    response_class=PlainTextResponse,
+)
+async def profile(
+    current_user: User = Depends(require_operator(ADMIN_PATH, ADMIN_GET_API)),
+    seconds: float = Query(
+        10, gt=0, le=settings.PROFILER_MAX_SECONDS, description="采样时长（秒）"
+    ),
+    interval_ms: float = Query(10, ge=1, le=1000, description="采样间隔（毫秒）"),
+):
+    # 采样在线程池中进行，不阻塞事件循环
+    try:
+        counts = await asyncio.to_thread(
+            profiler.profile, seconds, interval_ms / 1000, threading.get_ident()
+        )
+    except ProfilerBusy:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT, detail="Profiler is already running"
+        )
+    return PlainTextResponse(render_collapsed(counts))
+
+
+# 查看内存状态
+@router.get(
+    "/memory",
+    summary="查看内存状态",
+    description="本进程的常驻内存、GC 统计、tracemalloc 状态和已有快照",
+    response_model=MemoryStatusResponse,
+)
+async def get_memory_status(
+    current_user: User = Depends(require_operator(ADMIN_PATH, ADMIN_GET_API)),
+):
+    return memory_profiler.status()
+
+
+# 开启 tracemalloc
+@router.post(
+    "/memory/start",
+    summary="开启内存追踪",
+    description="开启 tracemalloc（开启后内存分配变慢、内存占用增加，排查完请关闭）",
+    response_model=SuccessResponse,
+)
+async def start_memory_tracing(
+    current_user: User = Depends(require_operator(ADMIN_PATH, ADMIN_POST_API)),
+    frames: int = Query(
+        settings.MEMORY_TRACE_FRAMES, ge=1, le=100, description="记录的调用栈深度"
+    ),
+):
+    memory_profiler.start(frames)
+    return SuccessResponse()
+
+
+# 关闭 tracemalloc
+@router.post(
+    "/memory/stop",
+    summary="关闭内存追踪",
+    description="关闭 tracemalloc 并丢弃所有快照",
+    response_model=SuccessResponse,
+)
+async def stop_memory_tracing(
+    current_user: User = Depends(require_operator(ADMIN_PATH, ADMIN_POST_API)),
+):
+    memory_profiler.stop()
+    return SuccessResponse()
+
+
+# 拍摄快照
+@router.post(
+    "/memory/snapshots",
+    summary="拍摄内存快照",
+    description=f"拍摄 tracemalloc 快照，最多保留 {settings.MEMORY_SNAPSHOT_LIMIT} 个",
+    response_model=MemorySnapshotResponse,
+)
+async def take_memory_snapshot(
+    current_user: User = Depends(require_operator(ADMIN_PATH, ADMIN_POST_API)),
+):
+    if not memory_profiler.tracing:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="tracemalloc is not started"
+        )
+    # 快照统计在线程池中进行，期间事件循环仍可以切换执行
+    return await asyncio.to_thread(memory_profiler.snapshot)
+
+
+def _check_group_by(group_by: str) -> None:
+    if group_by not in GROUP_BY:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"group_by must be one of {list(GROUP_BY)}",
+        )
+
+
+# 快照中占用最多的分配位置
+@router.get(
+    "/memory/snapshots/{snapshot_id}/top",
+    summary="查看快照的分配排行",
+    description="返回快照中占用内存最多的分配位置",
+    response_model=List[AllocationStatResponse],
+)
+async def get_memory_top(
+    snapshot_id: int,
+    current_user: User = Depends(require_operator(ADMIN_PATH, ADMIN_GET_API)),
+    group_by: str = Query("lineno", description="lineno / filename / traceback"),
+    limit: int = Query(20, ge=1, le=200, description="返回条数"),
+):
+    _check_group_by(group_by)
+    try:
+        return await asyncio.to_thread(
+            memory_profiler.top, snapshot_id, group_by, limit
+        )
+    except KeyError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Snapshot not found"
+        )
+
+
+# 两个快照的差异
+@router.get(
+    "/memory/diff",
+    summary="对比两个内存快照",
+    description="返回 target 相对 base 内存变化最多的分配位置",
+    response_model=List[AllocationStatResponse],
+)
+async def get_memory_diff(
+    base: int = Query(..., description="基准快照 ID"),
+    target: int = Query(..., description="对比快照 ID"),
+    current_user: User = Depends(require_operator(ADMIN_PATH, ADMIN_GET_API)),
+    group_by: str = Query("lineno", description="lineno / filename / traceback"),
+    limit: int = Query(20, ge=1, le=200, description="返回条数"),
+):
+    _check_group_by(group_by)
+    try:
+        return await asyncio.to_thread(
+            memory_profiler.diff, base, target, group_by, limit
+        )
+    except KeyError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Snapshot not found"
+        )
+
+
+# 查看审计日志
+@router.get(
+    "/audit-logs",
+    summary="查看审计日志",
+    description="按 id 倒序返回当前租户的审计日志，翻页时把上一页最后一条的 id 作为 before_id 传入",
+    response_model=List[AuditLogResponse],
+)
+async def get_audit_logs(
+    current_user: User = Depends(require_permission(ADMIN_PATH, ADMIN_GET_API)),
+    db: AsyncSession = Depends(database.get_db),
+    action: Optional[str] = Query(None, description="如 auth.login、user.assign_roles"),
+    actor_id: Optional[int] = Query(None, description="操作人 ID"),
+    before_id: Optional[int] = Query(None, description="只返回 id 小于该值的记录"),
+    limit: int = Query(
+        settings.DEFAULT_PAGE_SIZE, ge=1, le=settings.MAX_PAGE_SIZE, description="返回条数"
+    ),
+):
+    stmt = select(AuditLog).order_by(AuditLog.id.desc()).limit(limit)
+    if action is not None:
+        stmt = stmt.where(AuditLog.action == action)
+    if actor_id is not None:
+        stmt = stmt.where(AuditLog.actor_id == actor_id)
+    if before_id is not None:
+        stmt = stmt.where(AuditLog.id < before_id)
+    result = await db.execute(stmt)
+    return result.scalars().all()
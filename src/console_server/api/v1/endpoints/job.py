@@ -0,0 +1,148 @@
+from typing import List, Optional
+
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, status
+from pydantic import ValidationError
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from console_server.core.constants import JOB_PATH, JOB_GET_API, JOB_POST_API
+from console_server.db import database
+from console_server.model.job import BackgroundJob
+from console_server.model.rbac import User
+from console_server.schema.common import SuccessResponse
+from console_server.schema.job import JobListResponse, JobResponse, SubmitJobRequest
+from console_server.utils import jobs
+from console_server.utils.auth import check_permission, require_permission
+from console_server.core.config import settings
+from console_server.utils.tracing import TracedRoute
+
+
+router = APIRouter(prefix=f"/{JOB_PATH}", tags=[JOB_PATH], route_class=TracedRoute)
+
+
+# 提交后台任务
+@router.post(
+    "",
+    summary="提交后台任务",
+    description="提交批量操作等耗时任务，立即返回任务信息，通过 GET /job/{job_id} 轮询状态和进度",
+    response_model=JobResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+async def submit_job(
+    job_request: SubmitJobRequest = Body(),
+    current_user: User = Depends(require_permission(JOB_PATH, JOB_POST_API)),
+    db: AsyncSession = Depends(database.get_db),
+):
+    try:
+        # 任务执行的操作需要与同步接口相同的权限
+        permission = jobs.job_permission(job_request.kind)
+        if permission is not None:
+            await check_permission(current_user, db, *permission)
+        job = await jobs.submit(
+            job_request.kind,
+            job_request.payload,
+            created_by=current_user.id,  # type: ignore[arg-type]
+            max_attempts=job_request.max_attempts,
+        )
+    except jobs.UnknownJobKind:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown job kind '{job_request.kind}'",
+        )
+    except ValidationError as e:
+        # payload 按任务类型校验，错误格式与请求体校验一致
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=e.errors(include_url=False, include_context=False),
+        )
+    return job
+
+
+# 可提交的任务类型
+@router.get(
+    "/kinds",
+    summary="获取任务类型",
+    description="获取可提交的后台任务类型",
+    response_model=List[str],
+)
+async def get_job_kinds(
+    current_user: User = Depends(require_permission(JOB_PATH, JOB_GET_API)),
+):
+    return jobs.job_kinds()
+
+
+# 获取任务列表
+@router.get(
+    "/list",
+    summary="获取任务列表",
+    description="按提交时间倒序获取当前租户的后台任务（支持分页和按状态过滤）",
+    response_model=JobListResponse,
+)
+async def list_jobs(
+    current_user: User = Depends(require_permission(JOB_PATH, JOB_GET_API)),
+    db: AsyncSession = Depends(database.get_db),
+    job_status: Optional[str] = Query(None, alias="status", description="按状态过滤"),
+    page: int = Query(1, ge=1, description="页码，从1开始"),
+    page_size: int = Query(
+        settings.DEFAULT_PAGE_SIZE,
+        ge=1,
+        le=settings.MAX_PAGE_SIZE,
+        description="每页数量，最大100",
+    ),
+):
+    offset = (page - 1) * page_size
+    stmt = select(BackgroundJob)
+    if job_status is not None:
+        stmt = stmt.where(BackgroundJob.status == job_status)
+    count_result = await db.execute(
+        select(func.count()).select_from(stmt.subquery())
+    )
+    total = count_result.scalar_one()
+    result = await db.execute(
+        stmt.order_by(BackgroundJob.created_at.desc()).offset(offset).limit(page_size)
+    )
+    return JobListResponse(
+        items=[JobResponse.model_validate(job) for job in result.scalars().all()],
+        total=total,
+        page=page,
+        page_size=page_size,
+        total_pages=(total + page_size - 1) // page_size,
+    )
+
+
+# 查询任务状态
+@router.get(
+    "/{job_id}",
+    summary="查询任务",
+    description="查询后台任务的状态、进度和结果",
+    response_model=JobResponse,
+)
+async def get_job(
+    job_id: int,
+    current_user: User = Depends(require_permission(JOB_PATH, JOB_GET_API)),
+    db: AsyncSession = Depends(database.get_db),
+):
+    result = await db.execute(select(BackgroundJob).where(BackgroundJob.id == job_id))
+    job = result.scalar_one_or_none()
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    return job
+
+
+# 取消任务
+@router.post(
+    "/{job_id}/cancel",
+    summary="取消任务",
+    description="取消尚未开始执行（或等待重试）的任务，执行中的任务不能取消",
+    response_model=SuccessResponse,
+)
+async def cancel_job(
+    job_id: int,
+    current_user: User = Depends(require_permission(JOB_PATH, JOB_POST_API)),
+):
+    if not await jobs.cancel(job_id):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Job not found or not cancellable",
+        )
+    return SuccessResponse()
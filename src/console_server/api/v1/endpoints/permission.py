@@ -13,9 +13,12 @@ from console_server.model.rbac import User, Permission
 from console_server.schema.common import SuccessResponse
 from console_server.schema.permission import PermissionResponse, PermissionCreate
 from console_server.utils.auth import get_current_user, require_permission
+from console_server.utils.tracing import TracedRoute
 
 
-router = APIRouter(prefix=f"/{PERMISSION_PATH}", tags=[PERMISSION_PATH])
+router = APIRouter(
+    prefix=f"/{PERMISSION_PATH}", tags=[PERMISSION_PATH], route_class=TracedRoute
+)
 
 
 # 创建权限
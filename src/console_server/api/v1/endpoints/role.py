@@ -1,7 +1,7 @@
 from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status, Body
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status, Body
 from sqlalchemy.orm import selectinload
 from typing import cast
 
@@ -16,8 +16,11 @@ from console_server.db import database
 from console_server.model.rbac import User, Role, Permission
 from console_server.schema.common import SuccessResponse
 from console_server.schema.role import (
+    AssignParentRolesRequest,
+    RemoveParentRolesRequest,
     RoleCreate,
     RoleListResponse,
+    RoleParentResponse,
     RoleResponse,
     RolePermissionResponse,
     RoleUpdateResponse,
@@ -26,10 +29,24 @@ from console_server.schema.permission import AssignPermissionsRequest
 from console_server.core.config import settings
 
 
+from console_server.utils.audit import audit_log
 from console_server.utils.auth import require_permission
+from console_server.utils.rbac import (
+    add_role_parent,
+    ensure_role_closure,
+    get_role_ancestor_ids,
+    get_role_descendant_ids,
+    get_role_holder_ids,
+    grant_effective_permissions,
+    rebuild_role_closure,
+    remove_role_parent,
+    revoke_stale_effective_permissions,
+    would_create_cycle,
+)
+from console_server.utils.tracing import TracedRoute
 
 
-router = APIRouter(prefix=f"/{ROLE_PATH}", tags=[ROLE_PATH])
+router = APIRouter(prefix=f"/{ROLE_PATH}", tags=[ROLE_PATH], route_class=TracedRoute)
 
 
 # 创建角色
@@ -58,6 +75,9 @@ async def create_role(
         is_active=role.is_active,
     )
     db.add(new_role)
+    await db.flush()
+    # 写入闭包表自身行，继承关系才能生效
+    await ensure_role_closure(db, [cast(int, new_role.id)])
     await db.commit()
     await db.refresh(new_role)
     return SuccessResponse()
@@ -73,6 +93,7 @@ async def create_role(
 async def assign_permissions_to_role(
     role_id: int,
     permission_request: AssignPermissionsRequest,
+    request: Request,
     current_user: User = Depends(require_permission(ROLE_PATH, ROLE_POST_API)),
     db: AsyncSession = Depends(database.get_db),
 ):
@@ -114,11 +135,24 @@ async def assign_permissions_to_role(
 
     role.permissions.extend(new_permissions)
     db.add(role)
+    await db.flush()
+    # 增量同步：拥有该角色（或继承该角色）的用户获得新权限
+    await grant_effective_permissions(
+        db,
+        source_role_ids=[role_id],
+        permission_ids=[cast(int, p.id) for p in new_permissions],
+    )
     await db.commit()
     await db.refresh(role)
+    await audit_log.record(
+        "role.assign_permissions",
+        actor_id=cast(int, current_user.id),
+        target_type="role",
+        target_id=role_id,
+        detail={"permission_ids": sorted(found_permission_ids)},
+        request=request,
+    )
 
-    print(role.id)
-    print(new_permissions)
     # 返回角色信息
     return SuccessResponse()
 
@@ -188,7 +222,15 @@ async def remove_role(
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail="Role not found"
         )
+    # 删除前记录受影响范围：继承该角色的子孙角色，以及持有这些角色的用户
+    descendant_ids = await get_role_descendant_ids(db, role_id)
+    affected_user_ids = await get_role_holder_ids(db, [role_id, *descendant_ids])
+
     await db.delete(role)
+    await db.flush()
+    # 子孙角色可能经由该角色继承了其他祖先，需要重算闭包
+    await rebuild_role_closure(db, role_ids=descendant_ids)
+    await revoke_stale_effective_permissions(db, user_ids=affected_user_ids)
     await db.commit()
     return SuccessResponse()
 
@@ -247,3 +289,127 @@ async def get_role_permissions(
         "role_id": role.id,
         "permission_ids": [p.id for p in role.permissions],
     }
+
+
+# 为角色添加父角色（继承父角色的全部权限）
+@router.post(
+    "/{role_id}/assign-parents",
+    summary="为角色添加父角色（通过ID）",
+    description="角色将继承父角色及其所有祖先角色的权限，禁止形成循环继承。",
+    response_model=SuccessResponse,
+)
+async def assign_parents_to_role(
+    role_id: int,
+    parent_request: AssignParentRolesRequest,
+    request: Request,
+    current_user: User = Depends(require_permission(ROLE_PATH, ROLE_POST_API)),
+    db: AsyncSession = Depends(database.get_db),
+):
+    result = await db.execute(select(Role.id).where(Role.id == role_id))
+    if result.scalar_one_or_none() is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Role not found"
+        )
+
+    # 如果部分父角色不存在，则抛出错误提示具体缺失项
+    parent_ids = set(parent_request.parent_ids)
+    result = await db.execute(select(Role.id).where(Role.id.in_(parent_ids)))
+    missing_parent_ids = parent_ids - set(result.scalars().all())
+    if missing_parent_ids:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Roles with IDs {list(missing_parent_ids)} not found",
+        )
+
+    # 逐个添加，后一个的环检测需要看到前一个的闭包
+    for parent_id in parent_request.parent_ids:
+        if await would_create_cycle(db, role_id, parent_id):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Role {parent_id} inherits from role {role_id}, cycle detected",
+            )
+        await add_role_parent(db, role_id, parent_id)
+
+    await db.commit()
+    await audit_log.record(
+        "role.assign_parents",
+        actor_id=cast(int, current_user.id),
+        target_type="role",
+        target_id=role_id,
+        detail={"parent_ids": sorted(parent_ids)},
+        request=request,
+    )
+    return SuccessResponse()
+
+
+# 移除角色的父角色
+@router.post(
+    "/{role_id}/remove-parents",
+    summary="移除角色的父角色",
+    description="移除角色对父角色的继承，经由其他路径继承的权限保持不变。",
+    response_model=SuccessResponse,
+)
+async def remove_parents_from_role(
+    role_id: int,
+    parent_request: RemoveParentRolesRequest,
+    request: Request,
+    current_user: User = Depends(require_permission(ROLE_PATH, ROLE_DELETE_API)),
+    db: AsyncSession = Depends(database.get_db),
+):
+    result = await db.execute(
+        select(Role).where(Role.id == role_id).options(selectinload(Role.parents))
+    )
+    role = result.scalar_one_or_none()
+    if not role:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Role not found"
+        )
+
+    existing_parent_ids = {cast(int, r.id) for r in role.parents}
+    missing_parent_ids = set(parent_request.parent_ids) - existing_parent_ids
+    if missing_parent_ids:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Role does not inherit from roles: {list(missing_parent_ids)}",
+        )
+
+    for parent_id in parent_request.parent_ids:
+        await remove_role_parent(db, role_id, parent_id)
+
+    await db.commit()
+    await audit_log.record(
+        "role.remove_parents",
+        actor_id=cast(int, current_user.id),
+        target_type="role",
+        target_id=role_id,
+        detail={"parent_ids": sorted(set(parent_request.parent_ids))},
+        request=request,
+    )
+    return SuccessResponse()
+
+
+# 获取角色的继承关系
+@router.get(
+    "/{role_id}/parents",
+    summary="获取角色的父角色",
+    description="获取角色直接继承的父角色，以及直接或间接继承的所有祖先角色",
+    response_model=RoleParentResponse,
+)
+async def get_role_parents(
+    role_id: int,
+    current_user: User = Depends(require_permission(ROLE_PATH, ROLE_GET_API)),
+    db: AsyncSession = Depends(database.get_db),
+):
+    result = await db.execute(
+        select(Role).where(Role.id == role_id).options(selectinload(Role.parents))
+    )
+    role = result.scalar_one_or_none()
+    if not role:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Role not found"
+        )
+    return RoleParentResponse(
+        role_id=role_id,
+        parent_ids=[cast(int, r.id) for r in role.parents],
+        ancestor_ids=await get_role_ancestor_ids(db, role_id),
+    )
@@ -16,8 +16,9 @@ from console_server.schema.user import (
 )
 
 from console_server.utils.auth import get_current_user
+from console_server.utils.tracing import TracedRoute
 
-router = APIRouter(prefix=f"/{SELF_PATH}", tags=[SELF_PATH])
+router = APIRouter(prefix=f"/{SELF_PATH}", tags=[SELF_PATH], route_class=TracedRoute)
 
 
 # 获取当前用户信息
@@ -27,7 +28,12 @@ router = APIRouter(prefix=f"/{SELF_PATH}", tags=[SELF_PATH])
     description="使用 JWT token 获取当前登录用户的信息",
     response_model=CurrentUserResponse,
 )
-async def read_users_me(current_user: User = Depends(get_current_user)):
+async def read_users_me(
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(database.get_db),
+):
+    # 有效权限（已排除过期的临时权限）
+    await db.refresh(current_user, ["effective_permissions"])
     return CurrentUserResponse(
         id=cast(int, current_user.id),
         name=cast(str, current_user.name),
@@ -42,7 +48,7 @@ async def read_users_me(current_user: User = Depends(get_current_user)):
                 name=cast(str, role.name),
                 display_name=cast(str, role.display_name),
             )
-            for role in current_user.roles
+            for role in current_user.active_roles
         ],
         permissions=[
             PermissionResponse(
@@ -50,7 +56,7 @@ async def read_users_me(current_user: User = Depends(get_current_user)):
                 name=cast(str, perm.name),
                 display_name=cast(str, perm.display_name),
             )
-            for perm in current_user.permissions
+            for perm in current_user.effective_permissions
         ],
     )
 
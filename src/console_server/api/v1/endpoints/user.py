@@ -1,9 +1,10 @@
+from datetime import datetime, timedelta, timezone
 from typing import List, cast
-from sqlalchemy import func, select, update
+from sqlalchemy import and_, delete, func, or_, select, update
 from sqlalchemy.orm import selectinload
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status, Body
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status, Body
 
 from console_server.core.constants import (
     USER_PATH,
@@ -13,10 +14,13 @@ from console_server.core.constants import (
     USER_DELETE_API,
 )
 
+from console_server.core.tenant import get_tenant_id
 from console_server.db import database
-from console_server.model.rbac import User, Role
+from console_server.db.instrument import query_budget
+from console_server.model.rbac import User, Role, user_roles
 from console_server.schema.common import SuccessResponse
 from console_server.schema.permission import PermissionResponse
+from console_server.socket.main import logout_users
 from console_server.schema.user import (
     UserInfoResponse,
     UserListResponse,
@@ -27,11 +31,28 @@ from console_server.schema.role import (
     RemoveRolesRequest,
     UserRoleResponse,
 )
+from console_server.utils.archive import restore_archived_user
+from console_server.utils.audit import audit_log
 from console_server.utils.auth import require_permission
+from console_server.utils.expiry import role_expiry
+from console_server.utils.rbac import (
+    assign_user_roles,
+    revoke_stale_effective_permissions,
+)
 from console_server.core.config import settings
+from console_server.utils.tracing import TracedRoute
+
+
+router = APIRouter(prefix=f"/{USER_PATH}", tags=[USER_PATH], route_class=TracedRoute)
 
 
-router = APIRouter(prefix=f"/{USER_PATH}", tags=[USER_PATH])
+async def _get_user(db: AsyncSession, user_id: int, *options) -> User | None:
+    """按 ID 查询用户，已归档的用户会被透明恢复"""
+    stmt = select(User).where(User.id == user_id).options(*options)
+    user = (await db.execute(stmt)).scalar_one_or_none()
+    if user is None and await restore_archived_user(db, user_id=user_id):
+        user = (await db.execute(stmt)).scalar_one_or_none()
+    return user
 
 
 # 禁用/启用某个用户
@@ -43,15 +64,13 @@ router = APIRouter(prefix=f"/{USER_PATH}", tags=[USER_PATH])
 )
 async def disable_user(
     user_id: int,
+    request: Request,
     role_request: DisableUserRequest = Body(),
     current_user: User = Depends(require_permission(USER_PATH, USER_PUT_API)),
     db: AsyncSession = Depends(database.get_db),
 ):
     # 查询目标用户是否存在
-    result = await db.execute(
-        select(User).where(User.id == user_id).options(selectinload(User.roles))
-    )
-    user = result.scalar_one_or_none()
+    user = await _get_user(db, user_id, selectinload(User.roles))
     if not user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail="User not found"
@@ -59,6 +78,16 @@ async def disable_user(
     is_active = role_request.is_active
     await db.execute(update(User).where(User.id == user_id).values(is_active=is_active))
     await db.commit()
+    await audit_log.record(
+        "user.enable" if is_active else "user.disable",
+        actor_id=cast(int, current_user.id),
+        target_type="user",
+        target_id=user_id,
+        request=request,
+    )
+    if not is_active:
+        # 已建立的推送连接通知客户端退出
+        await logout_users([user_id])
     return SuccessResponse()
 
 
@@ -66,53 +95,70 @@ async def disable_user(
 @router.post(
     "/{user_id}/assign-roles",
     summary="为用户分配多个角色（通过ID）",
-    description="根据角色ID列表为特定用户分配角色权限。",
+    description="根据角色ID列表为特定用户分配角色权限，可指定过期时间（临时授权），已分配的角色会更新过期时间。",
     response_model=SuccessResponse,
 )
+@query_budget(10)
 async def assign_role_to_user(
     user_id: int,
+    request: Request,
     role_request: AssignRolesRequest = Body(default=AssignRolesRequest(role_ids=[])),
     current_user: User = Depends(require_permission(USER_PATH, USER_POST_API)),
     db: AsyncSession = Depends(database.get_db),
 ):
-    # 查询目标用户是否存在
-    result = await db.execute(
-        select(User).where(User.id == user_id).options(selectinload(User.roles))
-    )
-    user = result.scalar_one_or_none()
-    if not user:
+    # 查询目标用户是否存在（不需要加载已有角色，分配时按主键冲突更新）
+    if await _get_user(db, user_id) is None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail="User not found"
         )
 
-    # 查询所有待分配的角色对象
-    stmt = select(Role).where(Role.id.in_(role_request.role_ids))
-    result = await db.execute(stmt)
-    roles_to_assign = result.scalars().all()
+    # 只查询待分配角色的 ID
+    result = await db.execute(
+        select(Role.id).where(Role.id.in_(role_request.role_ids))
+    )
+    found_role_ids = set(result.scalars().all())
 
     # 如果部分角色不存在，则抛出错误提示具体缺失项
-    found_role_ids = {cast(int, r.id) for r in roles_to_assign}
-    print(f"Found roles: {found_role_ids}")
     missing_role_ids = {
         int(role_id) for role_id in role_request.role_ids
     } - found_role_ids
-    print(f"Missing roles: {missing_role_ids}")
     if missing_role_ids:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Roles with IDs {list(missing_role_ids)} not found",
         )
 
-    # 过滤掉已存在的角色关系，防止重复添加
-    existing_role_ids = {r.id for r in user.roles}
-    new_roles = [r for r in roles_to_assign if r.id not in existing_role_ids]
+    # 临时授权的过期时间必须晚于当前时间，未带时区按 UTC 处理
+    expires_at = role_request.expires_at
+    if expires_at is not None:
+        if expires_at.tzinfo is None:
+            expires_at = expires_at.replace(tzinfo=timezone.utc)
+        if expires_at <= datetime.now(timezone.utc):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="expires_at must be in the future",
+            )
 
-    # 添加新角色并提交事务
-    user.roles.extend(new_roles)
-    db.add(user)
+    # 分配角色（已存在的更新过期时间）并同步有效权限
+    await assign_user_roles(db, user_id, found_role_ids, expires_at)
     await db.commit()
-    await db.refresh(user)
 
+    # 登记到过期调度器，到期时精确移除
+    if expires_at is not None:
+        for role_id in found_role_ids:
+            role_expiry.schedule(user_id, role_id, expires_at)
+
+    await audit_log.record(
+        "user.assign_roles",
+        actor_id=cast(int, current_user.id),
+        target_type="user",
+        target_id=user_id,
+        detail={
+            "role_ids": sorted(found_role_ids),
+            "expires_at": expires_at.isoformat() if expires_at is not None else None,
+        },
+        request=request,
+    )
     return SuccessResponse()
 
 
@@ -129,19 +175,33 @@ async def get_user_roles(
     db: AsyncSession = Depends(database.get_db),
 ):
     # 获取用户信息
-    result = await db.execute(
-        select(User).where(User.id == user_id).options(selectinload(User.roles))
-    )
-    user = result.scalar_one_or_none()
-    if not user:
+    if await _get_user(db, user_id) is None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail="User not found"
         )
+    # 连同分配的过期时间一起返回
+    result = await db.execute(
+        select(Role, user_roles.c.expires_at)
+        .join(
+            user_roles,
+            and_(
+                user_roles.c.tenant_id == Role.tenant_id,
+                user_roles.c.role_id == Role.id,
+            ),
+        )
+        .where(
+            user_roles.c.tenant_id == get_tenant_id(),
+            user_roles.c.user_id == user_id,
+        )
+    )
     return [
         UserRoleResponse(
-            id=cast(int, role.id), name=str(role.name), display_name=role.display_name
+            id=cast(int, role.id),
+            name=str(role.name),
+            display_name=role.display_name,
+            expires_at=expires_at,
         )
-        for role in user.roles
+        for role, expires_at in result.all()
     ]
 
 
@@ -152,52 +212,73 @@ async def get_user_roles(
     description="批量删除某个用户的角色（需要登录）",
     response_model=SuccessResponse,
 )
+@query_budget(9)
 async def delete_user_roles(
     user_id: int,
+    request: Request,
     role_request: RemoveRolesRequest = Body(default=RemoveRolesRequest(role_ids=[])),
     current_user: User = Depends(require_permission(USER_PATH, USER_DELETE_API)),
     db: AsyncSession = Depends(database.get_db),
 ):
+    tenant_id = get_tenant_id()
     # 获取用户信息
-    result = await db.execute(
-        select(User).where(User.id == user_id).options(selectinload(User.roles))
-    )
-    user = result.scalar_one_or_none()
-    if not user:
+    if await _get_user(db, user_id) is None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail="User not found"
         )
-    role_ids = role_request.role_ids
-    # 获取所有待删除的角色对象
-    stmt = select(Role).where(Role.id.in_(role_ids))
-    result = await db.execute(stmt)
-    roles_to_delete = result.scalars().all()
+    role_ids = set(role_request.role_ids)
+    # 一次查询取得待删除角色的名称以及该用户是否持有
+    result = await db.execute(
+        select(Role.id, Role.name, user_roles.c.user_id)
+        .outerjoin(
+            user_roles,
+            and_(
+                user_roles.c.tenant_id == Role.tenant_id,
+                user_roles.c.role_id == Role.id,
+                user_roles.c.user_id == user_id,
+            ),
+        )
+        .where(Role.id.in_(role_ids))
+    )
+    roles_to_delete = result.all()
     if not roles_to_delete:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail="Role not found"
         )
     # 验证待删除的角色是否属于该用户
-    existing_role_ids = {r.id for r in user.roles}
-    missing_role_ids = set(role_ids) - existing_role_ids
+    existing_role_ids = {row.id for row in roles_to_delete if row.user_id is not None}
+    missing_role_ids = role_ids - existing_role_ids
     if missing_role_ids:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"User does not have roles: {list(missing_role_ids)}",
         )
 
-    # 根据 name 为 user 获取普通角色
-    user_role_result = await db.execute(select(Role).where(Role.name == "user"))
     # 如果是 user 角色，则禁止删除
-    user_role = user_role_result.scalar_one_or_none()
-    if user_role and user_role.id in role_ids:
+    if any(row.name == "user" for row in roles_to_delete):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Cannot remove 'user' role from user",
         )
-    # 删除角色并提交事务
-    user.roles = [role for role in user.roles if role.id not in role_ids]
-    db.add(user)
+    # 删除角色
+    await db.execute(
+        delete(user_roles).where(
+            user_roles.c.tenant_id == tenant_id,
+            user_roles.c.user_id == user_id,
+            user_roles.c.role_id.in_(role_ids),
+        )
+    )
+    # 删除不再有角色支撑的有效权限
+    await revoke_stale_effective_permissions(db, user_ids=[user_id])
     await db.commit()
+    await audit_log.record(
+        "user.remove_roles",
+        actor_id=cast(int, current_user.id),
+        target_type="user",
+        target_id=user_id,
+        detail={"role_ids": sorted(role_ids)},
+        request=request,
+    )
     return SuccessResponse()
 
 
@@ -218,6 +299,9 @@ async def read_users(
         le=settings.MAX_PAGE_SIZE,
         description="每页数量，最大100",
     ),
+    stale_days: int | None = Query(
+        None, ge=1, description="只返回超过该天数未活跃（或从未活跃）的用户"
+    ),
 ):
     """
     获取用户列表接口（支持分页）
@@ -228,18 +312,30 @@ async def read_users(
     参数：
     - page: 页码，从1开始，默认为1
     - page_size: 每页返回的数量，默认为10，最大为100
+    - stale_days: 按 last_seen_at 筛选长期未活跃的用户
     """
     # 计算偏移量
     offset = (page - 1) * page_size
 
+    conditions = []
+    if stale_days is not None:
+        cutoff = datetime.now(timezone.utc) - timedelta(days=stale_days)
+        conditions.append(or_(User.last_seen_at.is_(None), User.last_seen_at < cutoff))
+
     # 获取总数
-    count_result = await db.execute(select(func.count()).select_from(User))
+    count_result = await db.execute(
+        select(func.count()).select_from(User).where(*conditions)
+    )
     total = count_result.scalar_one()
 
     # 获取分页数据
     # 预加载 roles，避免序列化时触发懒加载（async 环境中会触发 greenlet 错误）
     result = await db.execute(
-        select(User).options(selectinload(User.roles)).offset(offset).limit(page_size)
+        select(User)
+        .where(*conditions)
+        .options(selectinload(User.roles))
+        .offset(offset)
+        .limit(page_size)
     )
     users = result.scalars().all()
 
@@ -254,6 +350,8 @@ async def read_users(
             email=cast(str, user.email),
             description=cast(str, user.description),
             is_active=cast(bool, user.is_active),
+            last_login_at=user.last_login_at,
+            last_seen_at=user.last_seen_at,
         )
         for user in users
     ]
@@ -279,22 +377,12 @@ async def get_user_permissions(
     current_user: User = Depends(require_permission(USER_PATH, USER_GET_API)),
     db: AsyncSession = Depends(database.get_db),
 ):
-    # 获取用户信息
-    result = await db.execute(
-        select(User)
-        .where(User.id == user_id)
-        .options(selectinload(User.roles).selectinload(Role.permissions))
-    )
-    user = result.scalar_one_or_none()
+    # 获取用户信息，权限来自物化表 user_effective_permissions（已去重）
+    user = await _get_user(db, user_id, selectinload(User.effective_permissions))
     if not user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail="User not found"
         )
-    # 收集用户的所有权限
-    permissions = {}
-    for role in user.roles:
-        for permission in role.permissions:
-            permissions[permission.id] = permission
 
     return [
         PermissionResponse(
@@ -303,5 +391,5 @@ async def get_user_permissions(
             display_name=perm.display_name,
             description=perm.description,
         )
-        for perm in permissions.values()
+        for perm in user.effective_permissions
     ]
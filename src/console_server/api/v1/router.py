@@ -5,6 +5,8 @@ from .endpoints import (
     user,
     role,
     permission,
+    admin,
+    job,
 )
 
 v1_router = APIRouter(prefix="/v1")
@@ -12,3 +14,5 @@ v1_router.include_router(self.router)
 v1_router.include_router(user.router)
 v1_router.include_router(role.router)
 v1_router.include_router(permission.router)
+v1_router.include_router(admin.router)
+v1_router.include_router(job.router)
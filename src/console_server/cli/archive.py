@@ -0,0 +1,84 @@
+"""
+冷数据归档命令
+
+用法：
+    python -m console_server.cli.archive run                  # 按配置归档长期禁用的用户
+    python -m console_server.cli.archive run --days 90 --reindex
+    python -m console_server.cli.archive restore --email a@example.com --tenant 1
+"""
+
+import argparse
+import asyncio
+import sys
+
+from console_server.core.config import settings
+from console_server.core.tenant import tenant_scope
+from console_server.db import database
+from console_server.utils import archive
+from console_server.utils.console import print_error, print_info, print_success
+
+
+async def run(args: argparse.Namespace) -> int:
+    async with database.AsyncSessionLocal() as db:
+        report = await archive.archive_inactive_users(
+            db,
+            inactive_days=args.days,
+            batch_size=args.batch_size,
+            max_batches=args.max_batches,
+            reindex=args.reindex,
+        )
+    print_success(
+        f"归档 {report['users']} 个用户、{report['user_roles']} 条角色分配，共 {report['batches']} 批"
+    )
+    for name, (before, after) in report["indexes"].items():
+        print_info(f"{name}: {before} -> {after} 字节")
+    print_success(f"索引共节省 {report['index_bytes_saved']} 字节")
+    return 0
+
+
+async def restore(args: argparse.Namespace) -> int:
+    with tenant_scope(args.tenant):
+        async with database.AsyncSessionLocal() as db:
+            user_id = await archive.restore_archived_user(
+                db, user_id=args.user_id, email=args.email
+            )
+    if user_id is None:
+        print_error("冷表中没有该用户")
+        return 1
+    print_success(f"已恢复用户 {user_id}")
+    return 0
+
+
+COMMANDS = {
+    "run": run,
+    "restore": restore,
+}
+
+
+async def _run(args: argparse.Namespace) -> int:
+    try:
+        return await COMMANDS[args.command](args)
+    finally:
+        await database.engine.dispose()
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="console_server.cli.archive")
+    parser.add_argument("command", choices=COMMANDS.keys())
+    parser.add_argument("--days", type=int, default=None, help="禁用超过多少天")
+    parser.add_argument("--batch-size", type=int, default=None)
+    parser.add_argument("--max-batches", type=int, default=None)
+    parser.add_argument(
+        "--reindex", action="store_true", default=None, help="归档后重建索引"
+    )
+    parser.add_argument("--tenant", type=int, default=settings.DEFAULT_TENANT_ID)
+    parser.add_argument("--user-id", type=int, default=None)
+    parser.add_argument("--email", default=None)
+    args = parser.parse_args(argv)
+
+    print_info(f"执行归档命令: {args.command}")
+    return asyncio.run(_run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
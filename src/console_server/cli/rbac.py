@@ -0,0 +1,83 @@
+"""
+RBAC 维护命令
+
+用法：
+    python -m console_server.cli.rbac check     # 检查有效权限表、角色闭包表是否与关系表一致
+    python -m console_server.cli.rbac rebuild   # 全量重建角色闭包表和有效权限表
+    python -m console_server.cli.rbac check --tenant 2   # 只处理指定租户，缺省处理全部租户
+"""
+
+import argparse
+import asyncio
+import sys
+
+from sqlalchemy import select
+
+from console_server.core.tenant import tenant_scope
+from console_server.db import database
+from console_server.model.tenant import Tenant
+from console_server.utils import rbac
+from console_server.utils.console import print_error, print_info, print_success
+
+
+async def check(tenant_id: int) -> int:
+    async with database.AsyncSessionLocal() as db:
+        result = await rbac.check_effective_permissions(db)
+    if any(result.values()):
+        print_error(
+            f"租户 {tenant_id} 有效权限表：缺少 {result['missing']} 行，多出 {result['extra']} 行；"
+            f"角色闭包表：缺少 {result['closure_missing']} 行，多出 {result['closure_extra']} 行，"
+            "请执行 rebuild"
+        )
+        return 1
+    print_success(f"租户 {tenant_id} 有效权限表与角色闭包表一致")
+    return 0
+
+
+async def rebuild(tenant_id: int) -> int:
+    async with database.AsyncSessionLocal() as db:
+        total = await rbac.rebuild_effective_permissions(db)
+    print_success(
+        f"租户 {tenant_id} 角色闭包表和有效权限表已重建，有效权限共 {total} 行"
+    )
+    return 0
+
+
+COMMANDS = {
+    "check": check,
+    "rebuild": rebuild,
+}
+
+
+async def _tenant_ids(tenant_id: int | None) -> list[int]:
+    if tenant_id is not None:
+        return [tenant_id]
+    async with database.AsyncSessionLocal() as db:
+        result = await db.execute(select(Tenant.id).order_by(Tenant.id))
+        return list(result.scalars().all())
+
+
+async def _run(command: str, tenant_id: int | None) -> int:
+    try:
+        code = 0
+        # 每个租户单独执行，语句只落在该租户的分区上
+        for tid in await _tenant_ids(tenant_id):
+            with tenant_scope(tid):
+                code = max(code, await COMMANDS[command](tid))
+        return code
+    finally:
+        await database.engine.dispose()
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="console_server.cli.rbac")
+    parser.add_argument("command", choices=COMMANDS.keys())
+    parser.add_argument("--tenant", type=int, default=None, help="租户 ID，缺省为全部租户")
+    args = parser.parse_args(argv)
+
+    print_info(f"执行 RBAC 命令: {args.command}")
+    return asyncio.run(_run(args.command, args.tenant))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
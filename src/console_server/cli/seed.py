@@ -0,0 +1,297 @@
+"""
+合成数据生成命令（性能排查用）
+
+新建一个租户并写入大规模 RBAC 数据：角色成员数服从 Zipf 分布（少数角色拥有大部分用户），
+权限标识覆盖 api / page / btn 三类。数据通过 asyncpg COPY 写入，所有用户共用一个预先计算的密码哈希，
+写入后全量重建该租户的角色闭包表和有效权限表。
+
+用法：
+    python -m console_server.cli.seed --tenant-name bench                  # 100 万用户、2000 角色、2 万权限
+    python -m console_server.cli.seed --tenant-name small --users 10000 --roles 100 --permissions 1000
+    python -m console_server.cli.seed --tenant-name bench --password secret --zipf 1.2 --seed 7
+"""
+
+import argparse
+import asyncio
+import bisect
+import itertools
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Iterator
+
+from console_server.core.constants import API_METHODS, PERM_TYPE, PERM_TYPE_MAP
+from console_server.core.tenant import tenant_scope
+from console_server.db import database
+from console_server.utils import rbac
+from console_server.utils.auth import get_password_hash
+from console_server.utils.console import print_error, print_info, print_success
+
+# 每个用户的角色数及其权重（平均约 2.2 个）
+ROLES_PER_USER = (1, 2, 3, 4, 5)
+ROLES_PER_USER_WEIGHTS = (35, 30, 20, 10, 5)
+# 按钮权限的动作
+BTN_ACTIONS = ("create", "edit", "delete", "export")
+# 禁用用户的比例（归档任务的候选）
+INACTIVE_RATIO = 0.05
+# 写入后更新统计信息的表
+ANALYZE_TABLES = (
+    "users",
+    "roles",
+    "permissions",
+    "user_roles",
+    "role_permissions",
+    "role_closure",
+    "user_effective_permissions",
+)
+
+
+def permission_names(count: int) -> list[tuple[str, str]]:
+    """
+    生成 count 个 (权限标识, 显示名称)
+
+    每个资源依次生成 api:res:{get,post,put,delete,*}、page:res、btn:res:{create,edit,delete,export}，
+    三类权限约各占 5:1:4。
+    """
+    names: list[tuple[str, str]] = []
+    for resource in itertools.count():
+        res = f"res{resource}"
+        for method in (*API_METHODS, "*"):
+            names.append(
+                (f"{PERM_TYPE[0]}:{res}:{method}", f"{PERM_TYPE_MAP['api']} {res} {method}")
+            )
+        names.append((f"{PERM_TYPE[1]}:{res}", f"{PERM_TYPE_MAP['page']} {res}"))
+        for action in BTN_ACTIONS:
+            names.append(
+                (f"{PERM_TYPE[2]}:{res}:{action}", f"{PERM_TYPE_MAP['btn']} {res} {action}")
+            )
+        if len(names) >= count:
+            return names[:count]
+    return names
+
+
+class ZipfSampler:
+    """按 Zipf 分布（第 k 个元素的概率正比于 1/k^s）从 0..n-1 中抽取不重复的元素"""
+
+    def __init__(self, n: int, s: float, rng: random.Random):
+        self.rng = rng
+        self.cumulative = list(
+            itertools.accumulate(1 / rank**s for rank in range(1, n + 1))
+        )
+        self.total = self.cumulative[-1]
+
+    def sample(self, k: int) -> set[int]:
+        k = min(k, len(self.cumulative))
+        picked: set[int] = set()
+        while len(picked) < k:
+            point = self.rng.random() * self.total
+            picked.add(bisect.bisect_left(self.cumulative, point))
+        return picked
+
+
+async def _reserve_ids(conn, table: str, count: int) -> int:
+    """从表的主键序列中预留 count 个连续 ID，返回第一个 ID"""
+    last = await conn.fetchval(
+        "SELECT setval(seq, nextval(seq) + $2 - 1) "
+        "FROM pg_get_serial_sequence($1, 'id') AS seq",
+        table,
+        count,
+    )
+    return last - count + 1
+
+
+async def seed(args: argparse.Namespace) -> int:
+    rng = random.Random(args.seed)
+    now = datetime.now(timezone.utc)
+    # 所有用户共用一个哈希，避免为每个用户计算 bcrypt
+    password_hash = get_password_hash(args.password)
+    timings: dict[str, float] = {}
+
+    async with database.engine.connect() as sa_conn:
+        raw = await sa_conn.get_raw_connection()
+        conn = raw.driver_connection  # asyncpg 连接
+        assert conn is not None
+
+        exists = await conn.fetchval(
+            "SELECT 1 FROM tenants WHERE name = $1", args.tenant_name
+        )
+        if exists:
+            print_error(f"租户 {args.tenant_name} 已存在，请换一个名称")
+            return 1
+
+        async with conn.transaction():
+            tenant_id = await conn.fetchval(
+                "INSERT INTO tenants (name, display_name, is_active, created_at) "
+                "VALUES ($1, $1, true, now()) RETURNING id",
+                args.tenant_name,
+            )
+            first_permission = await _reserve_ids(conn, "permissions", args.permissions)
+            first_role = await _reserve_ids(conn, "roles", args.roles)
+            first_user = await _reserve_ids(conn, "users", args.users)
+
+            start = time.perf_counter()
+            await conn.copy_records_to_table(
+                "permissions",
+                columns=(
+                    "tenant_id",
+                    "id",
+                    "name",
+                    "display_name",
+                    "is_deletable",
+                    "is_editable",
+                    "created_at",
+                    "updated_at",
+                ),
+                records=(
+                    (tenant_id, first_permission + i, name, display, True, True, now, now)
+                    for i, (name, display) in enumerate(
+                        permission_names(args.permissions)
+                    )
+                ),
+            )
+            await conn.copy_records_to_table(
+                "roles",
+                columns=(
+                    "tenant_id",
+                    "id",
+                    "name",
+                    "display_name",
+                    "is_active",
+                    "is_deletable",
+                    "is_editable",
+                    "created_at",
+                    "updated_at",
+                ),
+                records=(
+                    (
+                        tenant_id,
+                        first_role + i,
+                        f"role{i}",
+                        f"角色 {i}",
+                        True,
+                        True,
+                        True,
+                        now,
+                        now,
+                    )
+                    for i in range(args.roles)
+                ),
+            )
+            # 每个角色 5~15 个权限，按 Zipf 分布偏向常用资源
+            permission_sampler = ZipfSampler(args.permissions, args.zipf, rng)
+            await conn.copy_records_to_table(
+                "role_permissions",
+                columns=("tenant_id", "role_id", "permission_id"),
+                records=[
+                    (tenant_id, first_role + role, first_permission + permission)
+                    for role in range(args.roles)
+                    for permission in permission_sampler.sample(rng.randint(5, 15))
+                ],
+            )
+            timings["permissions/roles"] = time.perf_counter() - start
+
+            start = time.perf_counter()
+            spread = timedelta(days=730).total_seconds()
+
+            def users() -> Iterator[tuple]:
+                for i in range(args.users):
+                    created = now - timedelta(seconds=rng.random() * spread)
+                    yield (
+                        tenant_id,
+                        first_user + i,
+                        f"user{i}",
+                        f"user{i}@{args.tenant_name}.example.com",
+                        password_hash,
+                        None,
+                        rng.random() >= INACTIVE_RATIO,
+                        True,
+                        True,
+                        created,
+                        created,
+                    )
+
+            await conn.copy_records_to_table(
+                "users",
+                columns=(
+                    "tenant_id",
+                    "id",
+                    "name",
+                    "email",
+                    "password",
+                    "description",
+                    "is_active",
+                    "is_deletable",
+                    "is_editable",
+                    "created_at",
+                    "updated_at",
+                ),
+                records=users(),
+            )
+            timings["users"] = time.perf_counter() - start
+
+            start = time.perf_counter()
+            role_sampler = ZipfSampler(args.roles, args.zipf, rng)
+
+            def user_roles() -> Iterator[tuple]:
+                counts = rng.choices(ROLES_PER_USER, ROLES_PER_USER_WEIGHTS, k=args.users)
+                for i, count in enumerate(counts):
+                    for role in role_sampler.sample(count):
+                        yield tenant_id, first_user + i, first_role + role, None
+
+            await conn.copy_records_to_table(
+                "user_roles",
+                columns=("tenant_id", "user_id", "role_id", "expires_at"),
+                records=user_roles(),
+            )
+            timings["user_roles"] = time.perf_counter() - start
+
+    print_info(f"租户 {args.tenant_name}（ID {tenant_id}）基础数据已写入，重建有效权限表")
+    start = time.perf_counter()
+    with tenant_scope(tenant_id):
+        async with database.AsyncSessionLocal() as db:
+            total = await rbac.rebuild_effective_permissions(db)
+    timings["effective_permissions"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    async with database.engine.connect() as sa_conn:
+        raw = await sa_conn.get_raw_connection()
+        for table in ANALYZE_TABLES:
+            await raw.driver_connection.execute(f"ANALYZE {table}")  # type: ignore[union-attr]
+    timings["analyze"] = time.perf_counter() - start
+
+    for phase, seconds in timings.items():
+        print_info(f"{phase}: {seconds:.1f}s")
+    print_success(
+        f"租户 {args.tenant_name}（ID {tenant_id}）：{args.users} 个用户、{args.roles} 个角色、"
+        f"{args.permissions} 个权限，有效权限 {total} 行，共 {sum(timings.values()):.1f}s"
+    )
+    return 0
+
+
+async def _run(args: argparse.Namespace) -> int:
+    try:
+        return await seed(args)
+    finally:
+        await database.engine.dispose()
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="console_server.cli.seed")
+    parser.add_argument("--tenant-name", required=True, help="新建租户的名称（不能已存在）")
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--roles", type=int, default=2_000)
+    parser.add_argument("--permissions", type=int, default=20_000)
+    parser.add_argument("--zipf", type=float, default=1.1, help="Zipf 分布指数，越大越集中")
+    parser.add_argument("--password", default="seed-password", help="所有用户的登录密码")
+    parser.add_argument("--seed", type=int, default=42, help="随机种子")
+    args = parser.parse_args(argv)
+
+    print_info(
+        f"生成合成数据：{args.users} 个用户、{args.roles} 个角色、{args.permissions} 个权限"
+    )
+    return asyncio.run(_run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
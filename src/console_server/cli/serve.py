@@ -0,0 +1,141 @@
+"""
+生产环境启动命令
+
+使用 uvicorn 的多进程模式启动：主进程监听端口并管理 worker（worker 异常退出时自动重启），
+事件循环和 HTTP 解析器优先使用 uvloop / httptools。各参数的缺省值来自 Settings（环境变量），
+命令行参数优先。
+
+设置了 DB_MAX_CONNECTIONS 时，按 worker 数分摊每个 worker 的连接池大小（扣除池外的监听连接），
+通过环境变量 DB_POOL_SIZE / DB_MAX_OVERFLOW 传给 worker。上限不够每个 worker 至少一个池连接时：
+显式指定 --workers 则报错退出，按 CPU 核数时减少 worker 数。
+
+用法：
+    python -m console_server.cli.serve                    # 按 CPU 核数启动 worker
+    python -m console_server.cli.serve --workers 4 --port 8080
+    scripts/start.sh --workers 4                          # 同上，自动设置 PYTHONPATH
+"""
+
+import argparse
+import importlib.util
+import os
+import sys
+
+from console_server.core.config import settings
+from console_server.utils.console import print_error, print_info, print_warn
+
+APP = "console_server.main:app"
+
+# auto 时按顺序选择第一个已安装的实现：(uvicorn 参数值, 需要的模块)
+LOOPS = (("uvloop", "uvloop"), ("asyncio", None))
+HTTP_PARSERS = (("httptools", "httptools"), ("h11", "h11"))
+
+
+def worker_count(requested: int) -> int:
+    """0 表示按当前进程可用的 CPU 核数（容器内受 cpuset 限制）"""
+    if requested > 0:
+        return requested
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+# 每个 worker 在连接池之外的连接：utils/invalidation.py 监听权限变更通知的专用连接
+CONNECTIONS_OUTSIDE_POOL = 1
+
+
+def max_workers() -> int | None:
+    """DB_MAX_CONNECTIONS 能支撑的 worker 数（每个至少 1 个池连接和池外连接），不限制时为 None"""
+    if settings.DB_MAX_CONNECTIONS <= 0:
+        return None
+    return settings.DB_MAX_CONNECTIONS // (1 + CONNECTIONS_OUTSIDE_POOL)
+
+
+def pool_per_worker(workers: int) -> tuple[int, int]:
+    """每个 worker 的 (pool_size, max_overflow)，合计（含池外连接）不超过 DB_MAX_CONNECTIONS"""
+    pool_size, max_overflow = settings.DB_POOL_SIZE, settings.DB_MAX_OVERFLOW
+    if settings.DB_MAX_CONNECTIONS <= 0:
+        return pool_size, max_overflow
+    # 调用前已保证 workers 不超过 max_workers()，budget 至少为 1
+    budget = settings.DB_MAX_CONNECTIONS // workers - CONNECTIONS_OUTSIDE_POOL
+    pool_size = min(pool_size, budget)
+    return pool_size, min(max_overflow, budget - pool_size)
+
+
+def resolve(option: str, choices: tuple[tuple[str, str | None], ...]) -> str | None:
+    """auto 时返回第一个已安装的实现；指定的实现未安装时返回 None"""
+    for name, module in choices:
+        if option not in ("auto", name):
+            continue
+        if module is None or importlib.util.find_spec(module) is not None:
+            return name
+    return None
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="console_server.cli.serve")
+    parser.add_argument("--host", default=settings.HOST)
+    parser.add_argument("--port", type=int, default=settings.PORT)
+    parser.add_argument(
+        "--workers", type=int, default=settings.SERVER_WORKERS, help="0 表示按 CPU 核数"
+    )
+    parser.add_argument("--loop", default=settings.SERVER_LOOP, help="auto / uvloop / asyncio")
+    parser.add_argument("--http", default=settings.SERVER_HTTP, help="auto / httptools / h11")
+    args = parser.parse_args(argv)
+
+    loop = resolve(args.loop, LOOPS)
+    http = resolve(args.http, HTTP_PARSERS)
+    if loop is None or http is None:
+        print_error(f"事件循环 {args.loop} 或 HTTP 解析器 {args.http} 不可用，请先安装")
+        return 1
+
+    workers = worker_count(args.workers)
+    limit = max_workers()
+    if limit is not None and workers > limit:
+        if limit == 0 or args.workers > 0:
+            print_error(
+                f"DB_MAX_CONNECTIONS={settings.DB_MAX_CONNECTIONS} 不足以启动 {workers} 个 worker"
+                f"（每个 worker 至少需要 {1 + CONNECTIONS_OUTSIDE_POOL} 个连接），"
+                "请增大 DB_MAX_CONNECTIONS 或减少 --workers"
+            )
+            return 1
+        print_warn(
+            f"DB_MAX_CONNECTIONS={settings.DB_MAX_CONNECTIONS} 最多支撑 {limit} 个 worker，"
+            f"worker 数由 {workers} 减为 {limit}"
+        )
+        workers = limit
+    pool_size, max_overflow = pool_per_worker(workers)
+    # worker 是新启动的进程，通过环境变量读取连接池配置
+    os.environ["DB_POOL_SIZE"] = str(pool_size)
+    os.environ["DB_MAX_OVERFLOW"] = str(max_overflow)
+
+    print_info(
+        f"启动 {workers} 个 worker：{args.host}:{args.port}，事件循环 {loop}，HTTP {http}，"
+        f"每个 worker 连接池 {pool_size} + {max_overflow}"
+    )
+
+    import uvicorn
+
+    uvicorn.run(
+        APP,
+        host=args.host,
+        port=args.port,
+        workers=workers,
+        loop=loop,
+        http=http,
+        backlog=settings.SERVER_BACKLOG,
+        timeout_keep_alive=settings.SERVER_KEEPALIVE_SECONDS,
+        timeout_graceful_shutdown=settings.SERVER_GRACEFUL_TIMEOUT_SECONDS,
+        limit_concurrency=settings.SERVER_LIMIT_CONCURRENCY or None,
+        limit_max_requests=settings.SERVER_MAX_REQUESTS or None,
+        proxy_headers=True,
+        forwarded_allow_ips=settings.SERVER_FORWARDED_ALLOW_IPS,
+        access_log=settings.SERVER_ACCESS_LOG,
+        server_header=False,
+        # 不使用 uvicorn 的日志配置，uvicorn 的日志也经 utils/log.py 的队列输出
+        log_config=None,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,105 @@
+"""
+启动耗时分析
+
+在子进程中以 python -X importtime 导入 console_server.main，汇总每个模块的导入耗时：
+按累计耗时和自身耗时分别列出最慢的模块，并按顶层包汇总自身耗时。
+
+用法：
+    python -m console_server.cli.startup             # 输出耗时最多的 20 个模块和各顶层包的汇总
+    python -m console_server.cli.startup --top 40
+    python -m console_server.cli.startup --json      # 输出 JSON，便于对比不同版本
+"""
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+from collections import defaultdict
+
+from console_server.utils.console import print_error
+
+TARGET = "console_server.main"
+
+# import time:       self |  cumulative | name（name 前的缩进表示嵌套层级）
+_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)$")
+
+
+def measure(module: str = TARGET) -> list[tuple[str, int, int, int]]:
+    """返回 [(模块名, 自身耗时 us, 累计耗时 us, 嵌套层级)]，按导入完成顺序排列"""
+    env = dict(os.environ, GLOBAL_LOG_LEVEL="ERROR")
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    rows = []
+    for line in proc.stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            rows.append((name, int(self_us), int(cumulative_us), len(indent) // 2))
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr else "导入失败")
+    return rows
+
+
+def report(rows: list[tuple[str, int, int, int]], top: int) -> dict:
+    total = next((cumulative for name, _, cumulative, _ in rows if name == TARGET), 0)
+    packages: dict[str, int] = defaultdict(int)
+    for name, self_us, _, _ in rows:
+        packages[name.split(".")[0]] += self_us
+    return {
+        "total_ms": round(total / 1000, 1),
+        "modules": len(rows),
+        "by_cumulative": [
+            {"module": name, "cumulative_ms": round(cumulative / 1000, 1)}
+            for name, _, cumulative, _ in sorted(rows, key=lambda r: r[2], reverse=True)[:top]
+        ],
+        "by_self": [
+            {"module": name, "self_ms": round(self_us / 1000, 1)}
+            for name, self_us, _, _ in sorted(rows, key=lambda r: r[1], reverse=True)[:top]
+        ],
+        "by_package": [
+            {"package": package, "self_ms": round(self_us / 1000, 1)}
+            for package, self_us in sorted(
+                packages.items(), key=lambda item: item[1], reverse=True
+            )[:top]
+        ],
+    }
+
+
+def _print_table(title: str, items: list[dict], key: str, value: str) -> None:
+    print(f"\n{title}")
+    for item in items:
+        print(f"  {item[value]:>9.1f} ms  {item[key]}")
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="console_server.cli.startup")
+    parser.add_argument("--top", type=int, default=20, help="每项列出的条数")
+    parser.add_argument("--json", action="store_true", help="输出 JSON")
+    args = parser.parse_args(argv)
+
+    try:
+        result = report(measure(), args.top)
+    except RuntimeError as e:
+        print_error(f"导入 {TARGET} 失败：{str(e)}")
+        return 1
+
+    if args.json:
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+        return 0
+
+    print(f"导入 {TARGET}：{result['total_ms']} ms，共 {result['modules']} 个模块")
+    _print_table("累计耗时（含子模块）", result["by_cumulative"], "module", "cumulative_ms")
+    _print_table("自身耗时", result["by_self"], "module", "self_ms")
+    _print_table("按顶层包汇总的自身耗时", result["by_package"], "package", "self_ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -31,6 +31,119 @@ class Settings(BaseSettings):
     # 定时任务配置
     CLEANUP_EXPIRED_TOKENS_INTERVAL_HOURS: int = 24  # 清理过期 token 的间隔（小时）
 
+    # 多租户配置
+    DEFAULT_TENANT_ID: int = 1  # 未携带 token 时使用的租户
+    TENANT_HEADER: str = "X-Tenant-ID"  # 注册/登录等未认证接口通过该请求头指定租户
+
+    # 权限缓存配置
+    PERMISSION_CACHE_MAX_ENTRIES: int = 10000  # 每个租户缓存的用户权限条目上限
+    PERMISSION_CACHE_TENANT_LIMITS: dict[int, int] = {}  # 按租户覆盖上限，如 {"2": 50000}
+    PERMISSION_CACHE_TTL_SECONDS: int = 60  # 缓存条目最长有效期（通知频道断开时其他 worker 变更的最大延迟）
+
+    # 临时角色过期调度配置
+    ROLE_EXPIRY_HORIZON_SECONDS: int = 300  # 每次装载未来多长时间内到期的分配
+    ROLE_EXPIRY_RETRY_SECONDS: int = 30  # 调度失败后的重试间隔
+
+    # 定时任务选主配置（所有 worker 都启动调度器，只有持有租约的进程执行任务）
+    SCHEDULER_LEASE_TTL_SECONDS: float = 30  # 租约有效期，持有者失联超过该时间后由其他进程接管
+    SCHEDULER_LEASE_RENEW_SECONDS: float = 10  # 续约 / 尝试获取租约的间隔，应明显小于有效期
+
+    # 后台任务队列配置
+    JOB_WORKER_CONCURRENCY: int = 2  # 每个 worker 进程同时执行的任务数，0 表示本进程不消费任务
+    JOB_POLL_INTERVAL_SECONDS: float = 1  # 空闲时查询新任务的间隔
+    JOB_LEASE_SECONDS: float = 60  # 执行中的任务每 1/3 该时间续期一次，超过该时间未续期视为执行进程失联
+    JOB_MAX_ATTEMPTS: int = 3  # 默认最多执行次数（含首次）
+    JOB_RETRY_BASE_SECONDS: float = 10  # 第 n 次失败后等待 base * 2^(n-1) 秒再重试
+    JOB_RETRY_MAX_SECONDS: float = 600  # 重试间隔上限
+    JOB_PROGRESS_INTERVAL_SECONDS: float = 1  # 进度最多每隔该时间写一次数据库
+    JOB_BATCH_SIZE: int = 500  # 批量任务每批（每个事务）处理的行数
+    JOB_RETENTION_DAYS: int = 7  # 结束的任务保留天数
+    JOB_MAINTENANCE_INTERVAL_SECONDS: int = 60  # 回收失联任务的定时任务间隔
+
+    # 审计日志配置（事件先进入内存队列，由后台任务批量写入 audit_logs）
+    AUDIT_ENABLED: bool = True
+    AUDIT_QUEUE_SIZE: int = 10000  # 队列容量，写入跟不上时按 AUDIT_OVERFLOW_POLICY 处理
+    AUDIT_OVERFLOW_POLICY: str = "block"  # 队列已满时：block 让请求等待队列腾出空间，drop 直接丢弃
+    AUDIT_BLOCK_TIMEOUT_SECONDS: float = 0.5  # block 时最多等待的时间，超时后丢弃
+    AUDIT_BATCH_SIZE: int = 500  # 每次写入的最大条数，积压达到该条数时立即写入
+    AUDIT_FLUSH_INTERVAL_SECONDS: float = 1  # 未达到批量时的写入间隔
+
+    # 用户最近登录 / 活跃时间配置（先在内存中合并，再批量写入 users）
+    USER_ACTIVITY_ENABLED: bool = True
+    USER_ACTIVITY_FLUSH_INTERVAL_SECONDS: float = 60  # 写入间隔，也是 last_seen_at 的精度
+    USER_ACTIVITY_BATCH_SIZE: int = 1000  # 每条 UPDATE 的用户数，缓冲的用户数达到该值时立即写入
+
+    # Socket.IO 推送配置（连接管理器、传输方式见 env.py 的 WEBSOCKET_*）
+    WEBSOCKET_CORS_ALLOWED_ORIGINS: list[str] | None = None  # 缺省只允许同源，["*"] 允许所有来源
+    WEBSOCKET_TOKEN_EXPIRY_NOTICE_SECONDS: int = 60  # access token 过期前多久推送 session:expiring
+
+    # 冷数据归档配置
+    ARCHIVE_INACTIVE_DAYS: int = 180  # 禁用超过该天数的用户迁入冷表
+    ARCHIVE_BATCH_SIZE: int = 500  # 每批迁移的用户数（每批一个事务）
+    ARCHIVE_INTERVAL_HOURS: int = 24  # 归档任务的执行间隔（小时）
+    ARCHIVE_REINDEX: bool = False  # 归档后重建 users 索引以立即回收空间（REINDEX CONCURRENTLY）
+
+    # SQL 语句统计配置
+    DB_ECHO: bool = False  # 打印所有 SQL（同步写日志，只用于本地调试）
+    SLOW_QUERY_MS: float = 200  # 慢查询阈值（毫秒）
+    SLOW_QUERY_BUFFER_SIZE: int = 200  # 保留最近多少条慢查询
+    SLOW_QUERY_EXPLAIN_RATE: float = 0.0  # 对慢 SELECT 抽样执行 EXPLAIN (ANALYZE, BUFFERS) 的比例，0 表示关闭
+    QUERY_STATS_HEADER: bool = False  # 在响应头 X-DB-Queries / X-DB-Time 中返回语句数和耗时（调试用）
+    QUERY_BUDGET_ENFORCE: bool = False  # 超过 query_budget 时抛出异常（测试环境开启），否则只记录警告
+    N_PLUS_ONE_THRESHOLD: int = 5  # 同一语句在一个请求中执行达到该次数时记录疑似 N+1 警告
+
+    # 链路追踪配置
+    TRACE_SAMPLE_RATE: float = 0.01  # 头部采样比例（上游 traceparent 带 sampled 标志的请求总是采样）
+    TRACE_BUFFER_SIZE: int = 100  # 保留最近多少个 trace
+    TRACE_EXPORT_FILE: str = ""  # 同时按行追加 OTLP/JSON 的文件路径，空表示只保存在内存中
+
+    # 事件循环阻塞检测配置
+    LOOP_MONITOR_ENABLED: bool = False  # 启动看门狗线程检测事件循环阻塞
+    LOOP_MONITOR_INTERVAL_MS: float = 50  # 心跳间隔（毫秒）
+    LOOP_BLOCK_THRESHOLD_MS: float = 100  # 心跳延迟超过该值视为阻塞并记录调用栈
+
+    # 采样分析配置
+    PROFILER_MAX_SECONDS: int = 60  # /api/v1/admin/profile 单次最长采样时长
+    # 进程级诊断接口只对该租户的管理员开放（进程由所有租户共享，其他租户的 admin 不可用）
+    OPERATOR_TENANT_ID: int = 1
+
+    # 内存分析配置
+    MEMORY_SNAPSHOT_LIMIT: int = 5  # 最多保留的 tracemalloc 快照数
+    MEMORY_TRACE_FRAMES: int = 10  # tracemalloc 默认记录的调用栈深度
+
+    # 健康检查配置
+    HEALTH_CHECK_INTERVAL_SECONDS: float = 5  # 后台探测数据库连通性的间隔（秒），探针只读取缓存结果
+    HEALTH_DB_TIMEOUT_SECONDS: float = 2  # 单次数据库探测超时（秒）
+    HEALTH_MAX_POOL_SATURATION: float = 0.9  # 连接池占用率（已借出 / (pool_size + max_overflow)）达到该值时未就绪
+    HEALTH_MAX_LOOP_LAG_MS: float = 500  # 事件循环延迟超过该值时未就绪
+
+    # 服务进程配置（python -m console_server.cli.serve / scripts/start.sh）
+    HOST: str = "0.0.0.0"
+    PORT: int = 8000
+    SERVER_WORKERS: int = 0  # worker 进程数，0 表示按可用 CPU 核数
+    SERVER_LOOP: str = "auto"  # auto：安装了 uvloop 时使用 uvloop，否则 asyncio
+    SERVER_HTTP: str = "auto"  # auto：安装了 httptools 时使用 httptools，否则 h11
+    SERVER_BACKLOG: int = 2048  # listen 队列长度（受内核 net.core.somaxconn 限制）
+    SERVER_KEEPALIVE_SECONDS: int = 75  # 空闲 keep-alive 连接保持时间，应大于负载均衡器的空闲超时
+    SERVER_GRACEFUL_TIMEOUT_SECONDS: int = 30  # 开始关闭后等待进行中请求完成的最长时间
+    SERVER_DRAIN_SECONDS: float = 0  # 收到 SIGTERM 后先保持未就绪并继续处理请求的时间，0 表示立即关闭
+    SERVER_LIMIT_CONCURRENCY: int = 0  # 每个 worker 的最大并发连接数，超过返回 503，0 表示不限制
+    SERVER_MAX_REQUESTS: int = 0  # worker 处理该数量的请求后退出并由主进程重启，0 表示不限制
+    SERVER_ACCESS_LOG: bool = False  # 访问日志（请求指标已由 /api/metrics 提供）
+    SERVER_FORWARDED_ALLOW_IPS: str = "*"  # 信任其 X-Forwarded-* 请求头的代理地址
+
+    # 数据库连接池配置（每个 worker 进程一个连接池）
+    DB_POOL_SIZE: int = 5  # 常驻连接数
+    DB_MAX_OVERFLOW: int = 10  # 高峰时额外创建的连接数
+    DB_POOL_TIMEOUT_SECONDS: float = 30  # 等待空闲连接的最长时间
+    DB_POOL_RECYCLE_SECONDS: int = 1800  # 连接使用超过该时间后重建，-1 表示不重建
+    DB_MAX_CONNECTIONS: int = 0  # 本机所有 worker 合计的连接上限，serve 据此分摊每个 worker 的连接池，0 表示不限制
+
+    # 启动预热配置（每个 worker 在开始接收请求前执行）
+    WARMUP_DB_CONNECTIONS: int = 2  # 预先建立的连接数（不超过 DB_POOL_SIZE），并在每个连接上预编译热点语句，0 表示关闭
+    WARMUP_PRELOAD_RBAC: bool = False  # 预先读取各租户的权限目录和启用的角色
+    WARMUP_TIMEOUT_SECONDS: float = 10  # 单项预热的超时时间，超时后跳过，不影响启动
+
     # 分页配置
     DEFAULT_PAGE_SIZE: int = 10
     MAX_PAGE_SIZE: int = 100
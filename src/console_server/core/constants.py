@@ -41,3 +41,14 @@ PERMISSION_GET_API = f"{PERM_TYPE[0]}:{PERMISSION_PATH}:{API_METHODS[0]}"
 PERMISSION_POST_API = f"{PERM_TYPE[0]}:{PERMISSION_PATH}:{API_METHODS[1]}"
 PERMISSION_PUT_API = f"{PERM_TYPE[0]}:{PERMISSION_PATH}:{API_METHODS[2]}"
 PERMISSION_DELETE_API = f"{PERM_TYPE[0]}:{PERMISSION_PATH}:{API_METHODS[3]}"
+
+# 运维路径：慢查询等诊断接口
+ADMIN_PATH = "admin"
+ADMIN_GET_API = f"{PERM_TYPE[0]}:{ADMIN_PATH}:{API_METHODS[0]}"
+ADMIN_POST_API = f"{PERM_TYPE[0]}:{ADMIN_PATH}:{API_METHODS[1]}"
+ADMIN_DELETE_API = f"{PERM_TYPE[0]}:{ADMIN_PATH}:{API_METHODS[3]}"
+
+# 后台任务路径：批量操作以任务提交，轮询进度
+JOB_PATH = "job"
+JOB_GET_API = f"{PERM_TYPE[0]}:{JOB_PATH}:{API_METHODS[0]}"
+JOB_POST_API = f"{PERM_TYPE[0]}:{JOB_PATH}:{API_METHODS[1]}"
@@ -0,0 +1,34 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from console_server.core.config import settings
+from console_server.utils.log import register_log_context
+
+# 当前请求所属租户，由 AuthMiddleware 在每个请求开始时根据 token 的 tid 声明解析一次
+_current_tenant_id: ContextVar[int] = ContextVar(
+    "current_tenant_id", default=settings.DEFAULT_TENANT_ID
+)
+
+
+def get_tenant_id() -> int:
+    """获取当前租户 ID"""
+    return _current_tenant_id.get()
+
+
+def set_tenant_id(tenant_id: int):
+    """设置当前租户 ID，返回值可用于 ContextVar.reset"""
+    return _current_tenant_id.set(tenant_id)
+
+
+@contextmanager
+def tenant_scope(tenant_id: int):
+    """在请求之外（定时任务、命令行）切换到指定租户"""
+    token = _current_tenant_id.set(tenant_id)
+    try:
+        yield
+    finally:
+        _current_tenant_id.reset(token)
+
+
+# 每条日志带上当前租户
+register_log_context("tenant_id", get_tenant_id)
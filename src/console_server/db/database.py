@@ -1,17 +1,50 @@
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
+from sqlalchemy.orm import ORMExecuteState, Session, with_loader_criteria
 
 from console_server.core.config import settings
+from console_server.core.tenant import get_tenant_id
+from console_server.model.common import TenantMixin
+from console_server.utils import metrics, tracing
 from console_server.utils.console import print_info
+from console_server.db.instrument import instrument
+from console_server.db.slow_query import slow_query_log
 
 import os
 
 # 支持环境变量配置，便于 Docker 部署
 DATABASE_URL = os.getenv("DATABASE_URL", settings.DATABASE_URL)
 
-print_info(f"数据库地址: {DATABASE_URL}")
+# 创建异步引擎（不会连接数据库，首次使用时才建立连接）
+engine = create_async_engine(
+    DATABASE_URL,
+    echo=settings.DB_ECHO,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+    pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+)
+
+print_info(f"数据库地址: {engine.url.render_as_string(hide_password=True)}")
+
+# 统计每个请求的 SQL 语句数和耗时，记录慢查询
+instrument(engine.sync_engine)
+slow_query_log.install(engine)
+# 采样到的请求把 SQL 语句附加到链路追踪
+tracing.instrument(engine.sync_engine)
+
 
-# 创建异步引擎
-engine = create_async_engine(DATABASE_URL, echo=True)
+def _pool_stats() -> dict[tuple[str, ...], float]:
+    pool = engine.pool
+    return {
+        ("size",): pool.size(),  # type: ignore[attr-defined]
+        ("checked_in",): pool.checkedin(),  # type: ignore[attr-defined]
+        ("checked_out",): pool.checkedout(),  # type: ignore[attr-defined]
+        ("overflow",): pool.overflow(),  # type: ignore[attr-defined]
+    }
+
+
+metrics.db_pool_connections.set_function(_pool_stats)
 
 # 创建异步会话工厂
 AsyncSessionLocal = async_sessionmaker(
@@ -23,3 +56,24 @@ AsyncSessionLocal = async_sessionmaker(
 async def get_db():
     async with AsyncSessionLocal() as session:
         yield session
+
+
+# 租户隔离：所有 ORM 查询/批量更新/删除自动追加 tenant_id = 当前租户，查询只扫描一个分区
+# 需要跨租户访问时使用 execution_options(all_tenants=True)
+@event.listens_for(Session, "do_orm_execute")
+def _filter_by_tenant(state: ORMExecuteState) -> None:
+    if state.is_column_load or state.is_relationship_load:
+        # 关系/延迟列加载沿用父查询的条件
+        return
+    if not (state.is_select or state.is_update or state.is_delete):
+        return
+    if state.execution_options.get("all_tenants", False):
+        return
+    tenant_id = get_tenant_id()
+    state.statement = state.statement.options(
+        with_loader_criteria(
+            TenantMixin,
+            lambda cls: cls.tenant_id == tenant_id,
+            include_aliases=True,
+        )
+    )
@@ -0,0 +1,88 @@
+"""
+SQL 语句统计
+
+在引擎的 before/after_cursor_execute 事件中累加当前请求的语句数和耗时，统计对象通过
+ContextVar 绑定到请求（middleware/metrics.py），不在请求内执行的语句（定时任务等）不统计。
+
+同一条语句在一个请求中重复执行多次通常意味着 N+1 查询；路由可以用 query_budget 声明语句数上限。
+"""
+
+import time
+from contextvars import ContextVar
+from typing import Callable, Optional, TypeVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+class QueryStats:
+    __slots__ = ("source", "count", "duration", "statements")
+
+    def __init__(self, source: str = ""):
+        self.source = source  # 请求来源（"GET /api/v1/user/1/roles"），用于慢查询日志
+        self.count = 0  # 执行的语句数
+        self.duration = 0.0  # 语句总耗时（秒）
+        self.statements: dict[str, int] = {}  # 语句文本 -> 执行次数（参数已绑定为占位符）
+
+    def repeated(self, threshold: int) -> dict[str, int]:
+        """执行次数达到 threshold 的语句（疑似 N+1）"""
+        return {sql: n for sql, n in self.statements.items() if n >= threshold}
+
+
+class QueryBudgetExceeded(AssertionError):
+    """路由执行的语句数超过了 query_budget 声明的上限（QUERY_BUDGET_ENFORCE 开启时抛出）"""
+
+
+_current_stats: ContextVar[Optional[QueryStats]] = ContextVar(
+    "query_stats", default=None
+)
+
+
+def start_query_stats(source: str = "") -> QueryStats:
+    """为当前请求开始统计（在请求入口调用，子任务共享同一个统计对象）"""
+    stats = QueryStats(source)
+    _current_stats.set(stats)
+    return stats
+
+
+def get_query_stats() -> Optional[QueryStats]:
+    return _current_stats.get()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._query_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.count += 1
+        stats.duration += time.perf_counter() - context._query_start
+        stats.statements[statement] = stats.statements.get(statement, 0) + 1
+
+
+def instrument(engine: Engine) -> None:
+    """为同步引擎（AsyncEngine.sync_engine）注册统计事件"""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+F = TypeVar("F", bound=Callable)
+
+
+def query_budget(max_queries: int) -> Callable[[F], F]:
+    """
+    声明路由允许执行的 SQL 语句数上限（包含认证依赖中的查询）
+
+    放在 @router.xxx 装饰器下方，只给函数加属性，不改变签名：
+
+        @router.post("/{user_id}/assign-roles")
+        @query_budget(10)
+        async def assign_role_to_user(...): ...
+    """
+
+    def decorator(func: F) -> F:
+        func.__query_budget__ = max_queries  # type: ignore[attr-defined]
+        return func
+
+    return decorator
@@ -0,0 +1,136 @@
+"""
+慢查询日志
+
+替代 create_async_engine(echo=True)：只记录耗时超过 SLOW_QUERY_MS 的语句，保存在有界环形缓冲区中，
+通过 GET /api/v1/admin/slow-queries 查看。记录的是绑定参数前的语句文本和参数类型，不记录参数值。
+
+对慢 SELECT 按 SLOW_QUERY_EXPLAIN_RATE 抽样，在后台用独立连接执行 EXPLAIN (ANALYZE, BUFFERS)
+并附到记录上（会再执行一次该语句，因此只对 SELECT 执行，同一时刻最多一个）。
+"""
+
+import asyncio
+import contextvars
+import logging
+import random
+import re
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Optional
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from console_server.core.config import settings
+from console_server.core.tenant import get_tenant_id
+from console_server.db.instrument import get_query_stats
+from console_server.env import SRC_LOG_LEVELS
+from console_server.utils import metrics
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["DB"])
+
+_WHITESPACE = re.compile(r"\s+")
+# IN (...) 展开后的占位符列表：$1, $2, ..., $n -> $1, ...
+_PLACEHOLDER_LIST = re.compile(r"(\$\d+|%s|\?)(?:\s*,\s*(?:\$\d+|%s|\?))+")
+
+
+def normalize_statement(statement: str) -> str:
+    """压缩空白，折叠 IN 列表的占位符，使同一语句不因参数个数不同而分散"""
+    statement = _WHITESPACE.sub(" ", statement).strip()
+    return _PLACEHOLDER_LIST.sub(r"\1, ...", statement)
+
+
+def parameters_shape(parameters: Any, executemany: bool) -> str:
+    """参数的类型概要（不含参数值），如 (int, str) 或 100 x (int, str)"""
+    if executemany:
+        rows = list(parameters or ())
+        first = parameters_shape(rows[0], False) if rows else "()"
+        return f"{len(rows)} x {first}"
+    if isinstance(parameters, dict):
+        items = ", ".join(f"{k}: {type(v).__name__}" for k, v in parameters.items())
+        return "{" + items + "}"
+    if isinstance(parameters, (list, tuple)):
+        return "(" + ", ".join(type(v).__name__ for v in parameters) + ")"
+    return type(parameters).__name__
+
+
+class SlowQueryLog:
+    def __init__(self, maxlen: int):
+        self._records: deque[dict] = deque(maxlen=maxlen)
+        self._engine: Optional[AsyncEngine] = None
+        self._explain_task: Optional[asyncio.Task] = None
+
+    def install(self, engine: AsyncEngine) -> None:
+        """注册到引擎（需在 instrument() 之后，依赖其记录的开始时间）"""
+        self._engine = engine
+        event.listen(engine.sync_engine, "after_cursor_execute", self._after_cursor_execute)
+
+    def records(self, tenant_id: Optional[int] = None, limit: Optional[int] = None) -> list[dict]:
+        """按时间倒序返回慢查询，tenant_id 为 None 时返回全部租户"""
+        result = [
+            r
+            for r in reversed(self._records)
+            if tenant_id is None or r["tenant_id"] == tenant_id
+        ]
+        return result[:limit] if limit is not None else result
+
+    def clear(self, tenant_id: Optional[int] = None) -> None:
+        """清空指定租户的记录，None 表示全部"""
+        if tenant_id is None:
+            self._records.clear()
+            return
+        kept = [r for r in self._records if r["tenant_id"] != tenant_id]
+        self._records.clear()
+        self._records.extend(kept)
+
+    def _after_cursor_execute(
+        self, conn, cursor, statement, parameters, context, executemany
+    ):
+        duration = time.perf_counter() - context._query_start
+        if duration * 1000 < settings.SLOW_QUERY_MS:
+            return
+        if statement.startswith("EXPLAIN"):
+            return
+        stats = get_query_stats()
+        record = {
+            "at": datetime.now(timezone.utc),
+            "tenant_id": get_tenant_id(),
+            "source": stats.source if stats is not None else "",
+            "statement": normalize_statement(statement),
+            "parameters": parameters_shape(parameters, executemany),
+            "duration_ms": round(duration * 1000, 3),
+            "explain": None,
+        }
+        self._records.append(record)
+        metrics.db_slow_queries_total.inc()
+        log.warning(
+            f"慢查询 {record['duration_ms']}ms [{record['source'] or '-'}] {record['statement']}"
+        )
+
+        if (
+            not executemany
+            and (self._explain_task is None or self._explain_task.done())
+            and statement.lstrip()[:6].upper() == "SELECT"
+            and random.random() < settings.SLOW_QUERY_EXPLAIN_RATE
+        ):
+            # 在空上下文中执行，不计入当前请求的语句统计
+            self._explain_task = asyncio.get_running_loop().create_task(
+                self._explain(record, statement, parameters),
+                context=contextvars.Context(),
+            )
+
+    async def _explain(self, record: dict, statement: str, parameters: Any) -> None:
+        assert self._engine is not None
+        try:
+            async with self._engine.connect() as conn:
+                result = await conn.exec_driver_sql(
+                    f"EXPLAIN (ANALYZE, BUFFERS) {statement}", parameters
+                )
+                record["explain"] = "\n".join(row[0] for row in result)
+                await conn.rollback()
+        except Exception as e:
+            log.warning(f"慢查询 EXPLAIN 失败：{str(e)}")
+
+
+slow_query_log = SlowQueryLog(maxlen=settings.SLOW_QUERY_BUFFER_SIZE)
@@ -6,13 +6,26 @@ import logging
 import os
 import sys
 
+from console_server.utils.log import setup_logging
+
 
 GLOBAL_LOG_LEVEL = os.environ.get("GLOBAL_LOG_LEVEL", "").upper()
-if GLOBAL_LOG_LEVEL in logging.getLevelNamesMapping():
-    logging.basicConfig(stream=sys.stdout, level=GLOBAL_LOG_LEVEL, force=True)
-else:
+if GLOBAL_LOG_LEVEL not in logging.getLevelNamesMapping():
     GLOBAL_LOG_LEVEL = "INFO"
 
+# json：每行一个 JSON 对象；text：带颜色的文本。缺省时终端（本地开发、CLI）为 text，否则为 json
+LOG_FORMAT = os.environ.get("LOG_FORMAT", "").lower() or (
+    "text" if sys.stdout.isatty() else "json"
+)
+# 带 sample_key 的高频日志（如认证失败）每个窗口内每种最多输出的条数
+LOG_SAMPLE_BURST = int(os.environ.get("LOG_SAMPLE_BURST", "10"))
+LOG_SAMPLE_WINDOW_SECONDS = float(os.environ.get("LOG_SAMPLE_WINDOW_SECONDS", "60"))
+
+# 所有日志经队列由后台线程写出，不在请求路径上同步写 stdout
+setup_logging(
+    GLOBAL_LOG_LEVEL, LOG_FORMAT, LOG_SAMPLE_BURST, LOG_SAMPLE_WINDOW_SECONDS
+)
+
 log = logging.getLogger(__name__)
 log.info(f"GLOBAL_LOG_LEVEL: {GLOBAL_LOG_LEVEL}")
 
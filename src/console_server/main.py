@@ -1,9 +1,10 @@
+# ✅ 最先开始计时，记录启动各阶段耗时
+from console_server.utils.startup import register_warmup, run_warmup, startup_timer
+
 # ✅ 先导入标准库和第三方库
 import os
-import sys
-from dotenv import load_dotenv
 from colorama import init
-from console_server.env import GLOBAL_LOG_LEVEL, SRC_LOG_LEVELS
+from console_server.env import SRC_LOG_LEVELS
 from console_server.middleware.auth import AuthMiddleware
 from console_server.utils.console import (
     print_success,
@@ -27,6 +28,9 @@ _debug: bool = False
 if env == settings.ENV:
     _debug = settings.DEBUG
 else:
+    # python-dotenv 只在开发环境安装，用到时再导入
+    from dotenv import load_dotenv
+
     load_dotenv()
     _debug = bool(os.getenv("DEBUG"))
 
@@ -36,28 +40,45 @@ print_info(f"DEBUG: {_debug}")
 
 from fastapi import FastAPI
 from contextlib import asynccontextmanager
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from apscheduler.triggers.interval import IntervalTrigger
+from typing import TYPE_CHECKING, Optional
+import asyncio
 import logging
+import time
 
 # ✅ 第二步：导入本地模块（必须放在前面）
 from .db import database
 from .api.router import router
-from .utils import auth
+from .utils import archive, auth, jobs, metrics, warmup
+from .utils.activity import user_activity
+from .utils.audit import audit_log
+from .utils import job_handlers  # noqa: F401  注册内置的后台任务类型
+from .middleware.metrics import MetricsMiddleware
+from .middleware.request_id import RequestIdMiddleware
+from .middleware.tracing import TracingMiddleware
+from .socket.main import app as socket_app
+from .utils.expiry import role_expiry
+from .utils.health import health_checker
+from .utils.invalidation import permission_sync
+from .utils.leader import leader_lease, leader_only
+from .utils.loop_monitor import loop_monitor
 from .core.config import settings
 
-# 配置日志
-logging.basicConfig(stream=sys.stdout, level=GLOBAL_LOG_LEVEL)
+# 日志处理器在 env.py 中配置（队列 + 后台线程写出）
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["MAIN"])
 
+if TYPE_CHECKING:
+    from apscheduler.schedulers.asyncio import AsyncIOScheduler
 
-# 创建全局调度器
-scheduler = AsyncIOScheduler()
+# 全局调度器，在应用开始接收请求后创建（APScheduler 导入较慢，定时任务不影响就绪）
+scheduler: Optional["AsyncIOScheduler"] = None
 
 
+@leader_only
 async def cleanup_expired_tokens_task():
     """定时清理过期 token 的任务"""
+    start = time.perf_counter()
+    job_status = "ok"
     try:
         async with database.AsyncSessionLocal() as db:
             deleted_count = await auth.cleanup_expired_tokens(db)
@@ -66,17 +87,80 @@ async def cleanup_expired_tokens_task():
             else:
                 log.debug("定时任务：没有需要清理的过期 token")
     except Exception as e:
+        job_status = "error"
         log.error(f"定时任务执行失败：{str(e)}", exc_info=True)
+    finally:
+        metrics.job_duration_seconds.observe(
+            time.perf_counter() - start, "cleanup_expired_tokens", job_status
+        )
 
 
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    print_success("✅ 应用启动中")
-    if env == "dev":
-        print_warn("请执行 sql/init.sql 初始化数据库")
+@leader_only
+async def archive_inactive_users_task():
+    """定时将长期禁用的用户迁入冷表"""
+    start = time.perf_counter()
+    job_status = "ok"
+    try:
+        async with database.AsyncSessionLocal() as db:
+            report = await archive.archive_inactive_users(db)
+            if report["users"] > 0:
+                log.info(
+                    f"定时任务：归档了 {report['users']} 个用户，"
+                    f"索引节省 {report['index_bytes_saved']} 字节"
+                )
+            else:
+                log.debug("定时任务：没有需要归档的用户")
+    except Exception as e:
+        job_status = "error"
+        log.error(f"归档任务执行失败：{str(e)}", exc_info=True)
+    finally:
+        metrics.job_duration_seconds.observe(
+            time.perf_counter() - start, "archive_inactive_users", job_status
+        )
+
+
+@leader_only
+async def maintain_job_queue_task():
+    """回收执行进程失联的后台任务"""
+    start = time.perf_counter()
+    job_status = "ok"
+    try:
+        requeued = await jobs.requeue_stale_jobs()
+        if requeued > 0:
+            log.warning(f"定时任务：回收了 {requeued} 个执行进程失联的后台任务")
+    except Exception as e:
+        job_status = "error"
+        log.error(f"回收后台任务失败：{str(e)}", exc_info=True)
+    finally:
+        metrics.job_duration_seconds.observe(
+            time.perf_counter() - start, "requeue_stale_jobs", job_status
+        )
+
+
+@leader_only
+async def purge_finished_jobs_task():
+    """删除过了保留期的后台任务"""
+    start = time.perf_counter()
+    job_status = "ok"
+    try:
+        purged = await jobs.purge_finished_jobs()
+        log.debug(f"定时任务：删除了 {purged} 个已结束的后台任务")
+    except Exception as e:
+        job_status = "error"
+        log.error(f"删除后台任务失败：{str(e)}", exc_info=True)
+    finally:
+        metrics.job_duration_seconds.observe(
+            time.perf_counter() - start, "purge_finished_jobs", job_status
+        )
+
 
-    # 启动定时任务
-    print_success("✅ 应用启动：启动定时任务")
+def start_scheduler() -> None:
+    """创建并启动定时任务调度器"""
+    global scheduler
+    from apscheduler.schedulers.asyncio import AsyncIOScheduler
+    from apscheduler.triggers.interval import IntervalTrigger
+
+    scheduler = AsyncIOScheduler()
     scheduler.add_job(
         cleanup_expired_tokens_task,
         trigger=IntervalTrigger(hours=settings.CLEANUP_EXPIRED_TOKENS_INTERVAL_HOURS),
@@ -84,16 +168,119 @@ async def lifespan(app: FastAPI):
         name="清理过期 token",
         replace_existing=True,
     )
+    scheduler.add_job(
+        archive_inactive_users_task,
+        trigger=IntervalTrigger(hours=settings.ARCHIVE_INTERVAL_HOURS),
+        id="archive_inactive_users",
+        name="归档长期禁用的用户",
+        replace_existing=True,
+    )
+    scheduler.add_job(
+        maintain_job_queue_task,
+        trigger=IntervalTrigger(seconds=settings.JOB_MAINTENANCE_INTERVAL_SECONDS),
+        id="requeue_stale_jobs",
+        name="回收失联的后台任务",
+        replace_existing=True,
+    )
+    scheduler.add_job(
+        purge_finished_jobs_task,
+        trigger=IntervalTrigger(hours=24),
+        id="purge_finished_jobs",
+        name="删除过期的后台任务",
+        replace_existing=True,
+    )
     scheduler.start()
     print_info(
         f"✅ 定时任务已启动：每 {settings.CLEANUP_EXPIRED_TOKENS_INTERVAL_HOURS} 小时执行一次清理"
     )
 
+
+async def start_deferred() -> None:
+    """非关键子系统：lifespan 完成（开始接收请求）后再启动，启动后才纳入就绪检查"""
+    try:
+        # 定时任务只在持有租约的进程中执行
+        await leader_lease.start()
+        health_checker.register_component("leader_lease", lambda: leader_lease.running)
+        with startup_timer.phase("scheduler"):
+            start_scheduler()
+        health_checker.register_component(
+            "scheduler", lambda: scheduler is not None and scheduler.running
+        )
+
+        # 临时角色过期调度（到期时精确触发，不做周期扫描）
+        with startup_timer.phase("role_expiry"):
+            await role_expiry.start()
+        health_checker.register_component("role_expiry", lambda: role_expiry.running)
+
+        # 后台任务消费者（JOB_WORKER_CONCURRENCY 为 0 时本进程不消费）
+        if settings.JOB_WORKER_CONCURRENCY > 0:
+            await jobs.job_queue.start()
+            health_checker.register_component("job_queue", lambda: jobs.job_queue.running)
+
+        # 事件循环阻塞检测（按需开启）
+        if settings.LOOP_MONITOR_ENABLED:
+            loop_monitor.start()
+    except Exception as e:
+        log.error(f"后台子系统启动失败：{str(e)}", exc_info=True)
+        health_checker.register_component("deferred_startup", lambda: False)
+        return
+
+    startup_timer.mark("deferred")
+    log.info(f"启动耗时：{startup_timer.summary()}")
+
+
+# 启动预热：连接池和热点语句，按需预读权限目录
+register_warmup("db_pool", warmup.warm_pool)
+if settings.WARMUP_PRELOAD_RBAC:
+    register_warmup("rbac", warmup.preload_rbac)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    print_success("✅ 应用启动中")
+    if env == "dev":
+        print_warn("请执行 sql/init.sql 初始化数据库")
+
+    # 就绪探针：后台探测数据库（定时任务等在 start_deferred 中启动后再登记）
+    with startup_timer.phase("health_checker"):
+        health_checker.start()
+    # 收到 SIGTERM 后先摘流量再关闭
+    if settings.SERVER_DRAIN_SECONDS > 0:
+        health_checker.drain_on_sigterm(settings.SERVER_DRAIN_SECONDS)
+    # 审计日志写入任务，请求只把事件放入队列
+    await audit_log.start()
+    health_checker.register_component("audit_log", lambda: audit_log.running)
+    # last_login_at / last_seen_at 批量写入
+    await user_activity.start()
+    # 其他 worker 的角色 / 权限变更经 LISTEN/NOTIFY 失效本地权限缓存（在预热前开始监听）
+    await permission_sync.start()
+    # 预热完成后才开始接收请求
+    await run_warmup()
+    deferred = asyncio.create_task(start_deferred(), name="start-deferred")
+    startup_timer.mark("ready")
+
     yield
 
+    # 先标记为未就绪，负载均衡器停止转发新请求
+    await health_checker.stop()
+    if not deferred.done():
+        deferred.cancel()
+
+    # 停止消费后台任务，执行中的任务放回队列
+    await jobs.job_queue.stop()
+
     # 关闭调度器
     print_info("应用关闭：停止定时任务")
-    scheduler.shutdown(wait=False)
+    await role_expiry.stop()
+    loop_monitor.stop()
+    if scheduler is not None and scheduler.running:
+        scheduler.shutdown(wait=False)
+    # 释放租约，其他进程立即接管定时任务
+    await leader_lease.stop()
+    await permission_sync.stop()
+    # 最后写入剩余的审计事件（包括后台任务产生的）和用户活跃时间
+    await audit_log.stop()
+    await user_activity.stop()
     print_info("应用关闭：目前无额外清理任务")
 
 
@@ -108,5 +295,15 @@ app = FastAPI(
 
 # 添加中间件
 app.add_middleware(AuthMiddleware)
+# 链路追踪在认证外层，认证耗时计入 trace
+app.add_middleware(TracingMiddleware)
+# 最后添加的中间件位于最外层，指标覆盖认证失败的请求
+app.add_middleware(MetricsMiddleware)
+# 请求 ID 在最外层设置，所有中间件的日志都带上
+app.add_middleware(RequestIdMiddleware)
 
 app.include_router(router, prefix=settings.API_STR)
+# Socket.IO 推送（/ws/socket.io）
+app.mount("/ws", socket_app)
+
+startup_timer.mark("import")
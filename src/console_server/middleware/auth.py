@@ -2,18 +2,36 @@ from fastapi import Request, Response, status
 from fastapi.responses import JSONResponse
 from starlette.middleware.base import BaseHTTPMiddleware
 from console_server.core.config import settings
-from jose import JWTError, jwt
+from console_server.core.tenant import set_tenant_id
+from console_server.utils import metrics, tracing
+from jose import ExpiredSignatureError, JWTError, jwt
+import logging
 import re
 
+from console_server.env import SRC_LOG_LEVELS
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["OAUTH"])
+
 # 定义不需要认证的路径列表
 EXCLUDED_PATH_PATTERNS = [
     r"^/docs$",  # 精确匹配 /docs 路径
     r"^/api/openapi.json$",  # 精确匹配 /api/openapi.json 路径
     r"^/api/auth/.*$",  # 匹配所有 /api/auth/ 开头的路径
-    r"^/api/health$",  # 精确匹配 /api/health 路径
+    r"^/api/health(/live|/ready)?$",  # 健康检查与存活/就绪探针
+    r"^/api/metrics$",  # 精确匹配 /api/metrics 路径（Prometheus 抓取）
+    r"^/ws/.*$",  # Socket.IO 在连接事件中校验 token
 ]
 
 
+def _header_tenant_id(request: Request) -> int:
+    """未认证接口（注册、登录）通过请求头指定租户，缺省为默认租户"""
+    value = request.headers.get(settings.TENANT_HEADER)
+    if value and value.isdigit():
+        return int(value)
+    return settings.DEFAULT_TENANT_ID
+
+
 class AuthMiddleware(BaseHTTPMiddleware):
     async def dispatch(self, request: Request, call_next) -> Response:
         # 检查当前请求路径是否匹配任何排除模式
@@ -22,55 +40,72 @@ class AuthMiddleware(BaseHTTPMiddleware):
 
         if is_excluded:
             # 直接调用下一个处理器，跳过身份验证
+            set_tenant_id(_header_tenant_id(request))
             return await call_next(request)
 
-        # 对于不在排除列表中的路径，执行原有的身份验证逻辑
-        token = request.headers.get("Authorization")
+        # 认证耗时单独记一个 span，之后的处理不计入
+        with tracing.span("auth.middleware"):
+            # 对于不在排除列表中的路径，执行原有的身份验证逻辑
+            token = request.headers.get("Authorization")
 
-        if not token:
-            return JSONResponse(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                content={"detail": "Unauthorized: Missing or invalid token"},
-            )
-        try:
-            # 移除Bearer前缀（如果有）
-            if token.startswith(f"{settings.TOKEN_TYPE} "):
-                token = token[7:]
-            # 检查 token 格式是否正确（应该有3个部分）
-            if len(token.split(".")) != 3:
+            if not token:
+                metrics.auth_requests_total.inc("missing")
                 return JSONResponse(
                     status_code=status.HTTP_400_BAD_REQUEST,
-                    content={"detail": "Unauthorized: Invalid token format"},
+                    content={"detail": "Unauthorized: Missing or invalid token"},
                 )
+            try:
+                # 移除Bearer前缀（如果有）
+                if token.startswith(f"{settings.TOKEN_TYPE} "):
+                    token = token[7:]
+                # 检查 token 格式是否正确（应该有3个部分）
+                if len(token.split(".")) != 3:
+                    metrics.auth_requests_total.inc("invalid")
+                    return JSONResponse(
+                        status_code=status.HTTP_400_BAD_REQUEST,
+                        content={"detail": "Unauthorized: Invalid token format"},
+                    )
 
-            # 解码和验证 JWT token
-            payload = jwt.decode(
-                token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
-            )
+                # 解码和验证 JWT token
+                with tracing.span("jwt.decode"):
+                    payload = jwt.decode(
+                        token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
+                    )
 
-            is_active = payload.get("is_active")
-            if is_active is False:
+                is_active = payload.get("is_active")
+                if is_active is False:
+                    metrics.auth_requests_total.inc("inactive")
+                    return JSONResponse(
+                        status_code=status.HTTP_400_BAD_REQUEST,
+                        content={"detail": "Unauthorized: Inactive user"},
+                    )
+                # 将 payload 信息附加到请求状态中供后续使用
+                request.state.user = payload
+                # 每个请求只解析一次租户，后续查询都限定在该租户的分区内
+                set_tenant_id(payload.get("tid", settings.DEFAULT_TENANT_ID))
+                metrics.auth_requests_total.inc("ok")
+            # jose库会自动检查exp声明并验证令牌是否过期
+            except JWTError as e:
+                # 过期的令牌会在这里被捕获
+                metrics.auth_requests_total.inc(
+                    "expired" if isinstance(e, ExpiredSignatureError) else "invalid"
+                )
+                # 认证失败量可能很大（扫描、过期 token），按 sample_key 采样输出
+                log.info(
+                    f"JWT decode error: {e}", extra={"sample_key": "auth_failure"}
+                )
                 return JSONResponse(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    content={"detail": "Unauthorized: Inactive user"},
+                    status_code=status.HTTP_401_UNAUTHORIZED,
+                    content={"detail": f"Unauthorized: Invalid token format - {str(e)}"},
+                )
+            # 处理其他异常
+            except Exception as e:
+                metrics.auth_requests_total.inc("error")
+                log.error(f"Unexpected error: {e}", exc_info=True)
+                return JSONResponse(
+                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                    content={"detail": "Unauthorized: Token validation failed"},
                 )
-            # 将 payload 信息附加到请求状态中供后续使用
-            request.state.user = payload
-        # jose库会自动检查exp声明并验证令牌是否过期
-        except JWTError as e:
-            # 过期的令牌会在这里被捕获
-            print(f"JWT decode error: {e}")
-            return JSONResponse(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                content={"detail": f"Unauthorized: Invalid token format - {str(e)}"},
-            )
-        # 处理其他异常
-        except Exception as e:
-            print(f"Unexpected error: {e}")
-            return JSONResponse(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                content={"detail": "Unauthorized: Token validation failed"},
-            )
 
         # 继续处理请求
         return await call_next(request)
@@ -0,0 +1,107 @@
+import logging
+import time
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from console_server.core.config import settings
+from console_server.db.instrument import (
+    QueryBudgetExceeded,
+    QueryStats,
+    start_query_stats,
+)
+from console_server.env import SRC_LOG_LEVELS
+from console_server.utils import metrics
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["DB"])
+
+
+def _route_template(scope: Scope) -> str:
+    """
+    路由模板（如 /api/v1/user/{user_id}/roles）
+
+    由请求路径把路径参数的值替换回参数名得到，不依赖路由对象上的 path（被 include_router 加前缀的
+    路由在不同 FastAPI 版本中 path 不一定包含前缀）。未匹配路由的请求（404、被认证中间件拦截）
+    统一归为 unmatched，避免标签基数膨胀。
+    """
+    if "route" not in scope:
+        return "unmatched"
+    path = scope["path"]
+    params = scope.get("path_params")
+    if not params:
+        return path
+    names = {str(value): name for name, value in params.items()}
+    return "/".join(
+        f"{{{names[segment]}}}" if segment in names else segment
+        for segment in path.split("/")
+    )
+
+
+def _check_query_budget(scope: Scope, stats: QueryStats) -> None:
+    """检查路由通过 query_budget 声明的语句数上限"""
+    budget = getattr(scope.get("endpoint"), "__query_budget__", None)
+    if budget is None or stats.count <= budget:
+        return
+    route = _route_template(scope)
+    metrics.db_query_budget_exceeded_total.inc(route)
+    message = f"{scope['method']} {route} 执行了 {stats.count} 条 SQL，超过上限 {budget}"
+    if settings.QUERY_BUDGET_ENFORCE:
+        raise QueryBudgetExceeded(message)
+    log.warning(message)
+
+
+def _check_repeated(scope: Scope, stats: QueryStats) -> None:
+    """同一语句重复执行多次，疑似 N+1"""
+    repeated = stats.repeated(settings.N_PLUS_ONE_THRESHOLD)
+    if not repeated:
+        return
+    route = _route_template(scope)
+    metrics.db_repeated_statements_total.inc(route)
+    for statement, times in repeated.items():
+        log.warning(f"{scope['method']} {route} 疑似 N+1：以下语句执行了 {times} 次\n{statement}")
+
+
+class MetricsMiddleware:
+    """
+    记录请求耗时、并发数和 SQL 语句数
+
+    纯 ASGI 中间件（不使用 BaseHTTPMiddleware，不额外创建任务），放在最外层以覆盖认证失败的请求。
+    响应开始时检查 query_budget，QUERY_STATS_HEADER 开启时把语句数和耗时写入响应头。
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                _check_query_budget(scope, stats)
+                if settings.QUERY_STATS_HEADER:
+                    headers = MutableHeaders(scope=message)
+                    headers.append("X-DB-Queries", str(stats.count))
+                    headers.append("X-DB-Time", f"{stats.duration * 1000:.2f}ms")
+            await send(message)
+
+        stats = start_query_stats(f"{scope['method']} {scope['path']}")
+        metrics.http_requests_in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration = time.perf_counter() - start
+            metrics.http_requests_in_flight.dec()
+            route = _route_template(scope)
+            metrics.http_request_duration_seconds.observe(
+                duration, scope["method"], route, str(status_code)
+            )
+            metrics.db_queries_per_request.observe(stats.count, route)
+            _check_repeated(scope, stats)
@@ -0,0 +1,51 @@
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from console_server.core.tenant import get_tenant_id
+from console_server.middleware.metrics import _route_template
+from console_server.utils import tracing
+
+
+class TracingMiddleware:
+    """
+    为采样到的请求创建根 span，请求结束后导出整个 trace
+
+    纯 ASGI 中间件，放在认证中间件外层，认证耗时（auth.middleware）计入同一个 trace。
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        traceparent = None
+        for key, value in scope["headers"]:
+            if key == b"traceparent":
+                traceparent = value.decode("latin-1")
+                break
+        root = tracing.start_trace(
+            f"{scope['method']} {scope['path']}",
+            traceparent,
+            **{"http.method": scope["method"], "http.target": scope["path"]},
+        )
+        if root is None:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                root.span.set_attribute("http.status_code", message["status"])
+                if message["status"] >= 500:
+                    root.span.status = tracing.STATUS_ERROR
+            await send(message)
+
+        try:
+            with root:
+                await self.app(scope, receive, send_wrapper)
+        finally:
+            route = _route_template(scope)
+            root.span.name = f"{scope['method']} {route}"
+            root.span.set_attribute("http.route", route)
+            tracing.end_trace(root, get_tenant_id())
@@ -0,0 +1,47 @@
+from sqlalchemy import (
+    Table,
+    Column,
+    Integer,
+    String,
+    DateTime,
+    Boolean,
+    Index,
+)
+from sqlalchemy.sql import func
+
+from .common import Base
+
+
+# 冷数据表：长期未启用的用户及其角色分配由 utils/archive.py 分批迁入，登录或管理员查询时自动恢复
+# 列与 users / user_roles 一致（多出 archived_at），不分区，不参与权限计算
+users_archive = Table(
+    "users_archive",
+    Base.metadata,
+    Column("tenant_id", Integer, primary_key=True),
+    Column("id", Integer, primary_key=True),
+    Column("name", String(100), nullable=False),
+    Column("email", String(100), nullable=False),
+    Column("password", String(255), nullable=False),
+    Column("description", String(128), nullable=True),
+    Column("is_active", Boolean, nullable=False),
+    Column("is_deletable", Boolean, nullable=False),
+    Column("is_editable", Boolean, nullable=False),
+    Column("created_at", DateTime(timezone=True), nullable=False),
+    Column("updated_at", DateTime(timezone=True), nullable=False),
+    Column("last_login_at", DateTime(timezone=True), nullable=True),
+    Column("last_seen_at", DateTime(timezone=True), nullable=True),
+    Column(
+        "archived_at", DateTime(timezone=True), server_default=func.now(), nullable=False
+    ),
+    # 登录时按邮箱恢复
+    Index("idx_users_archive_email", "tenant_id", "email", unique=True),
+)
+
+user_roles_archive = Table(
+    "user_roles_archive",
+    Base.metadata,
+    Column("tenant_id", Integer, primary_key=True),
+    Column("user_id", Integer, primary_key=True),
+    Column("role_id", Integer, primary_key=True),
+    Column("expires_at", DateTime(timezone=True), nullable=True),
+)
@@ -0,0 +1,33 @@
+from sqlalchemy import JSON, BigInteger, Boolean, Column, DateTime, Index, Integer, String
+from sqlalchemy.dialects.postgresql import JSONB
+
+from .common import Base, TenantMixin
+
+# PostgreSQL 上为 jsonb / bigint（基准测试的 SQLite 数据集也会创建该表）
+_JSON = JSON().with_variant(JSONB(), "postgresql")
+_ID = BigInteger().with_variant(Integer(), "sqlite")
+
+
+class AuditLog(TenantMixin, Base):
+    """
+    审计日志（utils/audit.py 批量写入，只追加）
+
+    按 tenant_id 哈希分区，查询按 id 倒序分页。
+    """
+
+    __tablename__ = "audit_logs"
+    __table_args__ = (
+        # 按操作人查询
+        Index("idx_audit_logs_actor_id", "tenant_id", "actor_id", "id"),
+    )
+
+    id = Column(_ID, primary_key=True)
+    created_at = Column(DateTime(timezone=True), nullable=False)  # 事件发生的时间（不是写入时间）
+    actor_id = Column(Integer, nullable=True)  # 操作人，登录失败等未认证的事件为空
+    action = Column(String(64), nullable=False)  # 如 auth.login、user.assign_roles
+    target_type = Column(String(32), nullable=True)  # user / role / permission
+    target_id = Column(Integer, nullable=True)
+    success = Column(Boolean, nullable=False, default=True)
+    detail = Column(_JSON, nullable=True)  # 操作参数，如分配的角色 ID
+    ip = Column(String(64), nullable=True)
+    request_id = Column(String(64), nullable=True)
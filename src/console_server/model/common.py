@@ -1,5 +1,23 @@
-from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy import Column, ForeignKey, Integer
+from sqlalchemy.orm import DeclarativeBase, declared_attr
+
+from console_server.core.tenant import get_tenant_id
 
 
 class Base(DeclarativeBase):
     pass
+
+
+class TenantMixin:
+    """
+    租户隔离的模型
+
+    tenant_id 是分区键，插入时默认取当前租户；ORM 查询由 db/database.py 自动追加
+    tenant_id = 当前租户 的条件，使查询只落在一个分区上。
+    """
+
+    @declared_attr
+    def tenant_id(cls):
+        return Column(
+            Integer, ForeignKey("tenants.id"), nullable=False, default=get_tenant_id
+        )
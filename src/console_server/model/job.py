@@ -0,0 +1,63 @@
+from sqlalchemy import JSON, Column, DateTime, Index, Integer, String, Text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.sql import func, text
+
+from .common import Base, TenantMixin
+
+# PostgreSQL 上为 jsonb（基准测试的 SQLite 数据集也会创建该表）
+_JSON = JSON().with_variant(JSONB(), "postgresql")
+
+# 任务状态
+JOB_QUEUED = "queued"  # 等待执行（包括等待重试）
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"  # 重试次数用完
+JOB_CANCELLED = "cancelled"
+JOB_FINISHED = (JOB_SUCCEEDED, JOB_FAILED, JOB_CANCELLED)
+
+
+class BackgroundJob(TenantMixin, Base):
+    """
+    后台任务队列（utils/jobs.py）
+
+    不分区：消费者跨租户按 run_at 取任务，用 FOR UPDATE SKIP LOCKED 避免多个 worker 争抢同一行。
+    """
+
+    __tablename__ = "background_jobs"
+    __table_args__ = (
+        # 消费者只扫描等待中的任务
+        Index(
+            "idx_background_jobs_queued_run_at",
+            "run_at",
+            postgresql_where=text("status = 'queued'"),
+        ),
+        # 回收执行者失联的任务
+        Index(
+            "idx_background_jobs_running_locked_until",
+            "locked_until",
+            postgresql_where=text("status = 'running'"),
+        ),
+        Index("idx_background_jobs_tenant_created_at", "tenant_id", "created_at"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    kind = Column(String(64), nullable=False)  # 任务类型，对应 utils/jobs.py 中注册的处理函数
+    payload = Column(_JSON, nullable=False, default=dict)
+    status = Column(String(16), nullable=False, server_default=JOB_QUEUED)
+    attempts = Column(Integer, nullable=False, server_default="0")  # 已开始执行的次数
+    max_attempts = Column(Integer, nullable=False)
+    run_at = Column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )  # 最早可执行的时间（重试时后移）
+    locked_by = Column(String(128), nullable=True)  # 执行中的进程
+    locked_until = Column(DateTime(timezone=True), nullable=True)  # 执行者需在此之前续期，否则任务被回收
+    progress = Column(Integer, nullable=False, server_default="0")  # 进度百分比
+    message = Column(String(255), nullable=True)  # 进度说明
+    result = Column(_JSON, nullable=True)
+    error = Column(Text, nullable=True)  # 最近一次失败的原因
+    created_by = Column(Integer, nullable=True)  # 提交任务的用户，定时任务提交时为空
+    created_at = Column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
+    started_at = Column(DateTime(timezone=True), nullable=True)  # 首次开始执行的时间
+    finished_at = Column(DateTime(timezone=True), nullable=True)
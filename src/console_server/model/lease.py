@@ -0,0 +1,17 @@
+from sqlalchemy import Column, DateTime, String
+from sqlalchemy.sql import func
+
+from .common import Base
+
+
+class SchedulerLease(Base):
+    """定时任务的主节点租约：持有未过期租约的进程执行定时任务（见 utils/leader.py），不分租户"""
+
+    __tablename__ = "scheduler_leases"
+
+    name = Column(String(64), primary_key=True)  # 租约名称
+    holder = Column(String(128), nullable=False)  # 持有者：主机名:进程号:随机后缀
+    expires_at = Column(DateTime(timezone=True), nullable=False)  # 持有者需在此之前续约
+    acquired_at = Column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )  # 当前持有者获得租约的时间
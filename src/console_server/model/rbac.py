@@ -1,5 +1,7 @@
 from sqlalchemy.orm import relationship
 from sqlalchemy import (
+    and_,
+    or_,
     Table,
     Column,
     Integer,
@@ -7,36 +9,116 @@ from sqlalchemy import (
     DateTime,
     Boolean,
     Text,
-    ForeignKey,
+    ForeignKeyConstraint,
+    Index,
+    UniqueConstraint,
 )
-from sqlalchemy.sql import func
+from sqlalchemy.sql import func, text
 
-from .common import Base
+from console_server.core.tenant import get_tenant_id
+
+from .common import Base, TenantMixin
+from .tenant import Tenant  # noqa: F401  确保 tenants 表先注册，供外键解析
+
+
+def _tenant_column():
+    """关联表的租户列：分区键，同时是主键和复合外键的第一列"""
+    return Column(
+        "tenant_id", Integer, primary_key=True, nullable=False, default=get_tenant_id
+    )
+
+
+def _tenant_fk(column: str, target: str, **kw):
+    """指向 users/roles/permissions 的复合外键，分区表的主键包含 tenant_id"""
+    return ForeignKeyConstraint(
+        ["tenant_id", column], [f"{target}.tenant_id", f"{target}.id"], **kw
+    )
 
 
 # 中间表（无主键类）
 user_roles = Table(
     "user_roles",
     Base.metadata,
-    Column("user_id", Integer, ForeignKey("users.id"), primary_key=True),
-    Column("role_id", Integer, ForeignKey("roles.id"), primary_key=True),
+    _tenant_column(),
+    Column("user_id", Integer, primary_key=True),
+    Column("role_id", Integer, primary_key=True),
+    # 过期时间，为空表示永久有效；到期后由 utils/expiry.py 移除
+    Column("expires_at", DateTime(timezone=True), nullable=True, index=True),
+    _tenant_fk("user_id", "users"),
+    _tenant_fk("role_id", "roles"),
 )
 
 # 角色-权限关联表（无主键类）
 role_permissions = Table(
     "role_permissions",
     Base.metadata,
-    Column("role_id", Integer, ForeignKey("roles.id"), primary_key=True),
-    Column("permission_id", Integer, ForeignKey("permissions.id"), primary_key=True),
+    _tenant_column(),
+    Column("role_id", Integer, primary_key=True),
+    Column("permission_id", Integer, primary_key=True),
+    _tenant_fk("role_id", "roles"),
+    _tenant_fk("permission_id", "permissions"),
+)
+
+# 角色继承关系：role_id 继承 parent_id 的全部权限
+role_inheritance = Table(
+    "role_inheritance",
+    Base.metadata,
+    _tenant_column(),
+    Column("role_id", Integer, primary_key=True),
+    Column("parent_id", Integer, primary_key=True),
+    _tenant_fk("role_id", "roles", ondelete="CASCADE"),
+    _tenant_fk("parent_id", "roles", ondelete="CASCADE"),
+    Index("idx_role_inheritance_parent_id", "tenant_id", "parent_id"),
+)
+
+# 角色继承传递闭包：role_id 直接或间接继承 ancestor_id（包含 depth=0 的自身行）
+# 由 utils/rbac.py 在继承关系变化时增量维护
+role_closure = Table(
+    "role_closure",
+    Base.metadata,
+    _tenant_column(),
+    Column("role_id", Integer, primary_key=True),
+    Column("ancestor_id", Integer, primary_key=True),
+    Column("depth", Integer, nullable=False, default=0),
+    _tenant_fk("role_id", "roles", ondelete="CASCADE"),
+    _tenant_fk("ancestor_id", "roles", ondelete="CASCADE"),
+    Index("idx_role_closure_ancestor_id", "tenant_id", "ancestor_id"),
 )
 
+# 用户有效权限物化表：user_roles ⋈ role_closure ⋈ role_permissions 的去重结果
+# 由 utils/rbac.py 在分配/移除角色或权限时增量维护，权限读取只需一次索引扫描
+user_effective_permissions = Table(
+    "user_effective_permissions",
+    Base.metadata,
+    _tenant_column(),
+    Column("user_id", Integer, primary_key=True),
+    Column("permission_id", Integer, primary_key=True),
+    # 支撑该权限的角色分配中最晚的过期时间，为空表示永久有效
+    Column("expires_at", DateTime(timezone=True), nullable=True),
+    _tenant_fk("user_id", "users", ondelete="CASCADE"),
+    _tenant_fk("permission_id", "permissions", ondelete="CASCADE"),
+    Index(
+        "idx_user_effective_permissions_permission_id", "tenant_id", "permission_id"
+    ),
+)
 
-class User(Base):
+
+class User(TenantMixin, Base):
     __tablename__ = "users"
+    __table_args__ = (
+        # 邮箱在租户内唯一
+        UniqueConstraint("tenant_id", "email"),
+        # 归档任务按禁用时间挑选用户，只索引已禁用的行
+        Index(
+            "idx_users_inactive_updated_at",
+            "updated_at",
+            postgresql_where=text("is_active = false"),
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(100), nullable=False, index=True)  # 必填
-    email = Column(String(100), unique=True, index=True, nullable=False)  # 必填
+    email = Column(String(100), index=True, nullable=False)  # 必填
     password = Column(String(255), nullable=False)  # 通常密码也是必填的
     description = Column(String(128), nullable=True, index=True)
     is_active = Column(Boolean, default=True, nullable=False, index=True)
@@ -57,28 +139,80 @@ class User(Base):
         nullable=False,
     )
 
-    # 多对多关系
-    roles = relationship("Role", secondary=user_roles, back_populates="users")
+    # 最近登录 / 活跃时间：由 utils/activity.py 批量写入，不刷新 updated_at
+    # 不建索引，避免每次写入都更新索引（无法 HOT 更新）
+    last_login_at = Column(DateTime(timezone=True), nullable=True)
+    last_seen_at = Column(DateTime(timezone=True), nullable=True)
+
+    # 多对多关系（关联表按租户分区，连接条件带上 tenant_id 以便分区裁剪）
+    roles = relationship(
+        "Role",
+        secondary=user_roles,
+        primaryjoin=lambda: and_(
+            User.tenant_id == user_roles.c.tenant_id,
+            User.id == user_roles.c.user_id,
+        ),
+        secondaryjoin=lambda: and_(
+            Role.tenant_id == user_roles.c.tenant_id,
+            Role.id == user_roles.c.role_id,
+        ),
+        back_populates="users",
+    )
+
+    # 未过期的角色（只读），权限校验使用
+    active_roles = relationship(
+        "Role",
+        secondary=user_roles,
+        primaryjoin=lambda: and_(
+            User.tenant_id == user_roles.c.tenant_id,
+            User.id == user_roles.c.user_id,
+            or_(
+                user_roles.c.expires_at.is_(None),
+                user_roles.c.expires_at > func.now(),
+            ),
+        ),
+        secondaryjoin=lambda: and_(
+            Role.tenant_id == user_roles.c.tenant_id,
+            Role.id == user_roles.c.role_id,
+        ),
+        viewonly=True,
+    )
+
+    # 有效权限（只读），来自物化表 user_effective_permissions，已去重
+    # 过期时间在查询条件中校验，过期行即使尚未清理也不会生效
+    effective_permissions = relationship(
+        "Permission",
+        secondary=user_effective_permissions,
+        primaryjoin=lambda: and_(
+            User.tenant_id == user_effective_permissions.c.tenant_id,
+            User.id == user_effective_permissions.c.user_id,
+            or_(
+                user_effective_permissions.c.expires_at.is_(None),
+                user_effective_permissions.c.expires_at > func.now(),
+            ),
+        ),
+        secondaryjoin=lambda: and_(
+            Permission.tenant_id == user_effective_permissions.c.tenant_id,
+            Permission.id == user_effective_permissions.c.permission_id,
+        ),
+        viewonly=True,
+    )
 
     @property
     def permissions(self):
-        perms = set()
-        for role in self.roles:
-            for permission in role.permissions:
-                perms.add(permission)
-        return list(perms)
+        return list(self.effective_permissions)
 
     def __repr__(self):
         return f"<User(id={self.id}, name='{self.name}', email='{self.email}', is_active={self.is_active})>"
 
 
-class Role(Base):
+class Role(TenantMixin, Base):
     __tablename__ = "roles"
+    # 角色标识在租户内唯一
+    __table_args__ = (UniqueConstraint("tenant_id", "name"),)
 
     id = Column(Integer, primary_key=True, index=True)
-    name = Column(
-        String(64), unique=True, nullable=False, index=True
-    )  # 角色标识，必填且唯一
+    name = Column(String(64), nullable=False, index=True)  # 角色标识，必填且租户内唯一
     display_name = Column(String(128), nullable=False, index=True)  # 显示名称，必填
     description = Column(Text, nullable=True)  # 描述，使用 Text 类型，不必填
     is_active = Column(Boolean, default=True, nullable=False, index=True)  # 是否启用
@@ -101,20 +235,58 @@ class Role(Base):
         nullable=False,
     )
 
-    users = relationship("User", secondary=user_roles, back_populates="roles")
+    users = relationship(
+        "User",
+        secondary=user_roles,
+        primaryjoin=lambda: and_(
+            Role.tenant_id == user_roles.c.tenant_id,
+            Role.id == user_roles.c.role_id,
+        ),
+        secondaryjoin=lambda: and_(
+            User.tenant_id == user_roles.c.tenant_id,
+            User.id == user_roles.c.user_id,
+        ),
+        back_populates="roles",
+    )
     permissions = relationship(
-        "Permission", secondary=role_permissions, back_populates="roles"
+        "Permission",
+        secondary=role_permissions,
+        primaryjoin=lambda: and_(
+            Role.tenant_id == role_permissions.c.tenant_id,
+            Role.id == role_permissions.c.role_id,
+        ),
+        secondaryjoin=lambda: and_(
+            Permission.tenant_id == role_permissions.c.tenant_id,
+            Permission.id == role_permissions.c.permission_id,
+        ),
+        back_populates="roles",
+    )
+    # 直接继承的父角色（只读，修改请使用 utils/rbac.py 以同步闭包表）
+    parents = relationship(
+        "Role",
+        secondary=role_inheritance,
+        primaryjoin=lambda: and_(
+            Role.tenant_id == role_inheritance.c.tenant_id,
+            Role.id == role_inheritance.c.role_id,
+        ),
+        secondaryjoin=lambda: and_(
+            Role.tenant_id == role_inheritance.c.tenant_id,
+            Role.id == role_inheritance.c.parent_id,
+        ),
+        viewonly=True,
     )
 
     def __repr__(self):
         return f"<Role(id={self.id}, name='{self.name}', display_name='{self.display_name}', is_active={self.is_active})>"
 
 
-class Permission(Base):
+class Permission(TenantMixin, Base):
     __tablename__ = "permissions"
+    # 权限标识在租户内唯一
+    __table_args__ = (UniqueConstraint("tenant_id", "name"),)
 
     id = Column(Integer, primary_key=True, index=True)
-    name = Column(String(128), unique=True, nullable=False, index=True)
+    name = Column(String(128), nullable=False, index=True)
     display_name = Column(String(256), nullable=False, index=True)
     description = Column(Text, nullable=True)
 
@@ -133,7 +305,17 @@ class Permission(Base):
     )
 
     roles = relationship(
-        "Role", secondary=role_permissions, back_populates="permissions"
+        "Role",
+        secondary=role_permissions,
+        primaryjoin=lambda: and_(
+            Permission.tenant_id == role_permissions.c.tenant_id,
+            Permission.id == role_permissions.c.permission_id,
+        ),
+        secondaryjoin=lambda: and_(
+            Role.tenant_id == role_permissions.c.tenant_id,
+            Role.id == role_permissions.c.role_id,
+        ),
+        back_populates="permissions",
     )
 
     def __repr__(self):
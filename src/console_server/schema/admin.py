@@ -0,0 +1,62 @@
+from datetime import datetime
+from typing import Any, List, Optional
+
+from pydantic import BaseModel, ConfigDict
+
+
+class SlowQueryResponse(BaseModel):
+    at: datetime
+    tenant_id: int
+    source: str  # 请求方法和路径，请求外执行时为空
+    statement: str
+    parameters: str  # 参数类型概要，不含参数值
+    duration_ms: float
+    explain: Optional[str] = None  # 抽样执行的 EXPLAIN (ANALYZE, BUFFERS) 结果
+
+
+class LoopBlockerResponse(BaseModel):
+    stack: List[str]  # 调用栈，最内层在前
+    count: int  # 阻塞次数
+    total_ms: float  # 总阻塞时长
+    max_ms: float  # 最长一次阻塞
+
+
+class MemorySnapshotResponse(BaseModel):
+    id: int
+    taken_at: datetime
+    traced_bytes: int
+
+
+class MemoryStatusResponse(BaseModel):
+    rss_bytes: int
+    tracing: bool  # tracemalloc 是否开启
+    traceback_frames: int
+    traced_bytes: int
+    traced_peak_bytes: int
+    tracemalloc_overhead_bytes: int  # tracemalloc 自身占用
+    gc_counts: List[int]
+    gc_stats: List[dict[str, Any]]
+    snapshots: List[MemorySnapshotResponse]
+
+
+class AllocationStatResponse(BaseModel):
+    location: List[str]  # 分配位置（group_by=traceback 时为完整调用栈）
+    size_bytes: int
+    count: int
+    size_diff_bytes: Optional[int] = None  # 仅 diff 返回
+    count_diff: Optional[int] = None
+
+
+class AuditLogResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    created_at: datetime
+    actor_id: Optional[int] = None
+    action: str
+    target_type: Optional[str] = None
+    target_id: Optional[int] = None
+    success: bool
+    detail: Optional[dict[str, Any]] = None
+    ip: Optional[str] = None
+    request_id: Optional[str] = None
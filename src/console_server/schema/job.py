@@ -0,0 +1,56 @@
+from datetime import datetime
+from typing import Any, List, Optional
+
+from pydantic import BaseModel, Field
+
+from .common import PaginatedResponse
+
+
+class SubmitJobRequest(BaseModel):
+    kind: str  # 任务类型，见 GET /api/v1/job/kinds
+    payload: dict[str, Any] = {}
+    max_attempts: Optional[int] = Field(default=None, ge=1, le=20)  # 为空时使用 JOB_MAX_ATTEMPTS
+
+
+class JobResponse(BaseModel):
+    id: int
+    kind: str
+    status: str  # queued / running / succeeded / failed / cancelled
+    progress: int  # 进度百分比
+    message: Optional[str] = None
+    attempts: int
+    max_attempts: int
+    result: Optional[dict[str, Any]] = None
+    error: Optional[str] = None
+    created_by: Optional[int] = None
+    created_at: datetime
+    run_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class JobListResponse(PaginatedResponse[JobResponse]):
+    """任务列表分页响应"""
+
+    pass
+
+
+# 内置任务类型的 payload（utils/job_handlers.py）
+
+
+class BulkAssignRolesPayload(BaseModel):
+    user_ids: List[int] = Field(min_length=1, max_length=100_000)
+    role_ids: List[int] = Field(min_length=1)
+    expires_at: Optional[datetime] = None  # 为空表示永久有效
+
+
+class BulkSetUserActivePayload(BaseModel):
+    user_ids: List[int] = Field(min_length=1, max_length=100_000)
+    is_active: bool
+
+
+class CleanupTokenBlacklistPayload(BaseModel):
+    pass
@@ -1,3 +1,4 @@
+from datetime import datetime
 from pydantic import BaseModel
 from typing import Optional, TypeVar, List
 
@@ -28,6 +29,7 @@ class UserRoleResponse(BaseModel):
     id: int
     name: str
     display_name: str
+    expires_at: Optional[datetime] = None
 
 
 class RoleListResponse(PaginatedResponse[RoleResponse]):
@@ -47,8 +49,23 @@ class RolePermissionResponse(BaseModel):
     permission_ids: List[int] = []
 
 
+class RoleParentResponse(BaseModel):
+    role_id: int
+    parent_ids: List[int] = []
+    ancestor_ids: List[int] = []
+
+
+class AssignParentRolesRequest(BaseModel):
+    parent_ids: list[int]
+
+
+class RemoveParentRolesRequest(BaseModel):
+    parent_ids: list[int]
+
+
 class AssignRolesRequest(BaseModel):
     role_ids: list[int]
+    expires_at: Optional[datetime] = None  # 为空表示永久有效
 
 
 class RemoveRolesRequest(BaseModel):
@@ -1,3 +1,5 @@
+from datetime import datetime
+
 from pydantic import BaseModel, EmailStr
 from typing import List, Optional
 
@@ -53,6 +55,8 @@ class UserInfoResponse(BaseModel):
     email: str
     description: Optional[str] = None
     is_active: bool
+    last_login_at: Optional[datetime] = None
+    last_seen_at: Optional[datetime] = None  # 精度为 USER_ACTIVITY_FLUSH_INTERVAL_SECONDS
 
 
 class UserListResponse(PaginatedResponse[UserInfoResponse]):
@@ -0,0 +1,233 @@
+"""
+Socket.IO 推送
+
+挂载在 /ws，客户端使用 access token 连接：
+
+    io(origin, {path: "/ws/socket.io", auth: {token}, transports: ["websocket"]})
+
+每个连接加入所属用户的房间 user:<租户>:<用户>、租户房间 tenant:<租户> 和 token 房间 token:<token 哈希>。
+服务端推送的事件：
+
+- permissions:changed：有效权限发生变化（角色 / 权限分配、继承变更、临时角色到期），客户端应重新获取
+  /api/v1/self/current，不再需要轮询。
+- session:logout：用户被禁用（reason=disabled）或该 token 已登出（reason=logout），客户端应退出登录。
+  本进程上的连接随即被断开。
+- session:expiring：access token 将在 expires_in 秒后过期（提前 WEBSOCKET_TOKEN_EXPIRY_NOTICE_SECONDS 秒），
+  客户端刷新 token 后发送 session:refresh 事件（数据为 {token}）续期，无需重新连接。
+- session:expired：access token 已过期，随后断开连接。
+
+多 worker / 多实例部署时设置 WEBSOCKET_MANAGER=redis，事件经 Redis（WEBSOCKET_REDIS_URL，或
+WEBSOCKET_SENTINEL_HOSTS 指定的哨兵）转发到所有进程；未设置时使用进程内的管理器，只适用于单进程
+（本地开发、测试）。ENABLE_WEBSOCKET_SUPPORT 为 true（默认）时只使用 websocket 传输，不需要粘性会话；
+为 false 时只使用 HTTP 长轮询，多个进程之间需要粘性会话。
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Coroutine, Iterable, Optional
+from urllib.parse import urlparse
+
+import socketio
+from jose import JWTError, jwt
+from socketio.exceptions import ConnectionRefusedError
+from sqlalchemy import select
+
+from console_server.core.config import settings
+from console_server.core.tenant import get_tenant_id, tenant_scope
+from console_server.db import database
+from console_server.env import (
+    ENABLE_WEBSOCKET_SUPPORT,
+    SRC_LOG_LEVELS,
+    WEBSOCKET_MANAGER,
+    WEBSOCKET_REDIS_URL,
+    WEBSOCKET_SENTINEL_HOSTS,
+    WEBSOCKET_SENTINEL_PORT,
+)
+from console_server.model.rbac import User
+from console_server.utils import metrics
+from console_server.utils.activity import user_activity
+from console_server.utils.auth import get_token_hash, is_token_blacklisted
+from console_server.utils.rbac import on_permissions_changed
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["SOCKET"])
+
+
+def _sentinel_url(redis_url: str, hosts: str, port: str) -> str:
+    """由 Redis 地址（库号、密码、主节点名称取自这里）和哨兵列表拼出 redis+sentinel:// 地址"""
+    parsed = urlparse(redis_url)
+    auth = ""
+    if parsed.password:
+        auth = f"{parsed.username or ''}:{parsed.password}@"
+    nodes = ",".join(f"{host.strip()}:{port}" for host in hosts.split(",") if host.strip())
+    db = parsed.path.strip("/") or "0"
+    return f"redis+sentinel://{auth}{nodes}/{db}/{parsed.hostname or 'mymaster'}"
+
+
+def _client_manager() -> Optional[socketio.AsyncManager]:
+    if WEBSOCKET_MANAGER != "redis":
+        return None
+    url = WEBSOCKET_REDIS_URL
+    if WEBSOCKET_SENTINEL_HOSTS:
+        url = _sentinel_url(url, WEBSOCKET_SENTINEL_HOSTS, WEBSOCKET_SENTINEL_PORT)
+    return socketio.AsyncRedisManager(url)
+
+
+sio = socketio.AsyncServer(
+    async_mode="asgi",
+    client_manager=_client_manager(),
+    cors_allowed_origins=(
+        "*"
+        if settings.WEBSOCKET_CORS_ALLOWED_ORIGINS == ["*"]
+        else settings.WEBSOCKET_CORS_ALLOWED_ORIGINS
+    ),
+    transports=["websocket"] if ENABLE_WEBSOCKET_SUPPORT else ["polling"],
+    allow_upgrades=ENABLE_WEBSOCKET_SUPPORT,
+    logger=False,
+    engineio_logger=False,
+)
+# 挂载到 /ws 时路径以挂载前缀开头
+app = socketio.ASGIApp(sio, socketio_path="/ws/socket.io")
+
+# 本进程的连接：sid -> token 过期提醒 / 过期的定时器
+_timers: dict[str, list[asyncio.TimerHandle]] = {}
+# 由同步回调发起的推送任务，保留引用直到完成
+_background: set[asyncio.Task] = set()
+
+metrics.websocket_connections.set_function(lambda: {(): len(_timers)})
+
+
+def user_room(tenant_id: int, user_id: int) -> str:
+    return f"user:{tenant_id}:{user_id}"
+
+
+def tenant_room(tenant_id: int) -> str:
+    return f"tenant:{tenant_id}"
+
+
+def token_room(token: str) -> str:
+    return f"token:{get_token_hash(token)}"
+
+
+def _spawn(coro: Coroutine[Any, Any, None]) -> None:
+    """在同步回调（如事务提交后）中发起推送，没有事件循环时（命令行）跳过"""
+    try:
+        task = asyncio.get_running_loop().create_task(coro)
+    except RuntimeError:
+        coro.close()
+        return
+    _background.add(task)
+    task.add_done_callback(_background.discard)
+
+
+async def _authenticate(token: Any) -> tuple[str, int, int, float]:
+    """校验 access token，返回 (去掉类型前缀的 token, 租户, 用户, 过期时间戳)，失败时拒绝连接"""
+    if not isinstance(token, str) or not token:
+        raise ConnectionRefusedError("Missing token")
+    if token.startswith(f"{settings.TOKEN_TYPE} "):
+        token = token[len(settings.TOKEN_TYPE) + 1 :]
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    except JWTError:
+        raise ConnectionRefusedError("Invalid token")
+    email = payload.get("sub")
+    tenant_id = payload.get("tid", settings.DEFAULT_TENANT_ID)
+    with tenant_scope(tenant_id):
+        async with database.AsyncSessionLocal() as db:
+            if await is_token_blacklisted(token, db):
+                raise ConnectionRefusedError("Token revoked")
+            result = await db.execute(
+                select(User.id, User.is_active).where(User.email == email)
+            )
+            user = result.one_or_none()
+    if user is None or not user.is_active:
+        raise ConnectionRefusedError("Inactive user")
+    return token, tenant_id, user.id, float(payload.get("exp", 0))
+
+
+def _schedule_expiry(sid: str, expires_at: float) -> None:
+    """按 token 过期时间登记提醒和断开（重新认证时先取消旧的）"""
+    for handle in _timers.pop(sid, []):
+        handle.cancel()
+    loop = asyncio.get_running_loop()
+    remaining = expires_at - time.time()
+    notice = remaining - settings.WEBSOCKET_TOKEN_EXPIRY_NOTICE_SECONDS
+    _timers[sid] = [
+        loop.call_later(max(notice, 0), lambda: _spawn(_notify_expiring(sid, expires_at))),
+        loop.call_later(max(remaining, 0), lambda: _spawn(_expire(sid))),
+    ]
+
+
+async def _notify_expiring(sid: str, expires_at: float) -> None:
+    expires_in = max(int(expires_at - time.time()), 0)
+    await sio.emit("session:expiring", {"expires_in": expires_in}, to=sid)
+
+
+async def _expire(sid: str) -> None:
+    await sio.emit("session:expired", {}, to=sid)
+    await sio.disconnect(sid)
+
+
+@sio.event
+async def connect(sid: str, environ: dict, auth: Optional[dict] = None):
+    # token_room 使用规范化后的 token，与 logout_token 计算的房间一致
+    token, tenant_id, user_id, expires_at = await _authenticate((auth or {}).get("token"))
+    await sio.save_session(sid, {"tenant_id": tenant_id, "user_id": user_id})
+    for room in (user_room(tenant_id, user_id), tenant_room(tenant_id), token_room(token)):
+        await sio.enter_room(sid, room)
+    _schedule_expiry(sid, expires_at)
+    user_activity.touch(tenant_id, user_id)
+    log.debug(f"socket {sid} 已连接：租户 {tenant_id} 用户 {user_id}")
+
+
+@sio.on("session:refresh")
+async def refresh(sid: str, data: Optional[dict] = None) -> dict:
+    """用刷新后的 access token 续期当前连接，返回 {ok}"""
+    session = await sio.get_session(sid)
+    try:
+        token, tenant_id, user_id, expires_at = await _authenticate((data or {}).get("token"))
+    except ConnectionRefusedError as e:
+        return {"ok": False, "detail": e.error_args["message"]}
+    if (tenant_id, user_id) != (session["tenant_id"], session["user_id"]):
+        return {"ok": False, "detail": "Token belongs to another user"}
+    for room in sio.rooms(sid):
+        if room.startswith("token:"):
+            await sio.leave_room(sid, room)
+    await sio.enter_room(sid, token_room(token))
+    _schedule_expiry(sid, expires_at)
+    return {"ok": True}
+
+
+@sio.event
+async def disconnect(sid: str, *args):
+    for handle in _timers.pop(sid, []):
+        handle.cancel()
+
+
+@on_permissions_changed
+def _push_permissions_changed(tenant_id: int, user_ids: Optional[set[int]]) -> None:
+    if user_ids is None:
+        rooms = [tenant_room(tenant_id)]
+    else:
+        rooms = [user_room(tenant_id, user_id) for user_id in user_ids]
+    _spawn(sio.emit("permissions:changed", {}, to=rooms))
+
+
+async def _logout_room(room: str, reason: str) -> None:
+    await sio.emit("session:logout", {"reason": reason}, to=room)
+    # 只能枚举本进程的连接，其他进程上的连接由客户端收到事件后断开
+    for sid, _ in list(sio.manager.get_participants("/", room)):
+        await sio.disconnect(sid)
+
+
+async def logout_users(user_ids: Iterable[int], reason: str = "disabled") -> None:
+    """通知当前租户的用户退出登录（如被禁用）"""
+    tenant_id = get_tenant_id()
+    for user_id in user_ids:
+        await _logout_room(user_room(tenant_id, user_id), reason)
+
+
+async def logout_token(token: str) -> None:
+    """通知使用该 token 的连接退出登录"""
+    await _logout_room(token_room(token), "logout")
@@ -0,0 +1,161 @@
+"""
+用户最近登录 / 活跃时间
+
+登录和每次认证成功时只在内存中记下 (租户, 用户) 的时间，同一用户在一个周期内多次请求只保留最新值；
+后台任务每 USER_ACTIVITY_FLUSH_INTERVAL_SECONDS 秒（缓冲的用户数达到 USER_ACTIVITY_BATCH_SIZE 时立即）
+用一条 UPDATE users ... FROM (VALUES ...) 批量写入 last_login_at / last_seen_at。
+
+这两列的写入不改变 updated_at：语句中显式保留原值（跳过 ORM 的 onupdate），并通过
+SET LOCAL console.skip_updated_at 让 trigger_set_updated_at 触发器不做修改。updated_at 仍只反映资料变更，
+归档任务按它挑选长期禁用的用户。
+
+写入失败的时间合并回缓冲区，下次重试；lifespan 关闭时写入剩余的部分。多个 worker 各自写入，
+取 GREATEST 保证时间不会倒退。
+"""
+
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import DateTime, Integer, cast, column, func, text, update, values
+
+from console_server.core.config import settings
+from console_server.db import database
+from console_server.env import SRC_LOG_LEVELS
+from console_server.model.rbac import User
+from console_server.utils import metrics
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["DB"])
+
+users = User.__table__
+
+# (tenant_id, user_id) -> [last_login_at, last_seen_at]
+Activity = dict[tuple[int, int], list[Optional[datetime]]]
+
+
+class UserActivityTracker:
+    def __init__(self, flush_interval: float, batch_size: int):
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self._buffer: Activity = {}
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    @property
+    def buffered(self) -> int:
+        return len(self._buffer)
+
+    def touch(self, tenant_id: int, user_id: int, *, login: bool = False) -> None:
+        """记录用户活跃（login 为 True 时同时记录登录），只写内存"""
+        if not settings.USER_ACTIVITY_ENABLED:
+            return
+        now = datetime.now(timezone.utc)
+        entry = self._buffer.get((tenant_id, user_id))
+        if entry is None:
+            self._buffer[(tenant_id, user_id)] = [now if login else None, now]
+            if len(self._buffer) >= self.batch_size:
+                self._wakeup.set()
+            return
+        if login:
+            entry[0] = now
+        entry[1] = now
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="user-activity")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                async with asyncio.timeout(self.flush_interval):
+                    await self._wakeup.wait()
+            except TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    def _merge_back(self, batch: Activity) -> None:
+        """写入失败的时间放回缓冲区（期间有新的时间时保留较新的）"""
+        for key, (login_at, seen_at) in batch.items():
+            entry = self._buffer.setdefault(key, [None, None])
+            if login_at is not None and (entry[0] is None or entry[0] < login_at):
+                entry[0] = login_at
+            if entry[1] is None or (seen_at is not None and entry[1] < seen_at):
+                entry[1] = seen_at
+
+    async def flush(self) -> int:
+        """写入缓冲区中的全部时间，返回写入的用户数"""
+        if not self._buffer:
+            return 0
+        pending, self._buffer = self._buffer, {}
+        # 按主键排序，多个 worker 更新同一批用户时加锁顺序一致
+        keys = sorted(pending)
+        written = 0
+        for start in range(0, len(keys), self.batch_size):
+            batch = {key: pending[key] for key in keys[start : start + self.batch_size]}
+            started = time.perf_counter()
+            try:
+                await self._write(batch)
+            except Exception as e:
+                metrics.user_activity_flush_seconds.observe(
+                    time.perf_counter() - started, "error"
+                )
+                log.error(
+                    f"写入 {len(keys) - start} 个用户的活跃时间失败，稍后重试：{str(e)}",
+                    extra={"sample_key": "user_activity_flush_error"},
+                )
+                self._merge_back({key: pending[key] for key in keys[start:]})
+                return written
+            metrics.user_activity_flush_seconds.observe(time.perf_counter() - started, "ok")
+            written += len(batch)
+        return written
+
+    async def _write(self, batch: Activity) -> None:
+        rows = values(
+            column("tenant_id", Integer),
+            column("user_id", Integer),
+            column("last_login_at", DateTime(timezone=True)),
+            column("last_seen_at", DateTime(timezone=True)),
+            name="activity",
+        ).data([(tenant_id, user_id, *times) for (tenant_id, user_id), times in batch.items()])
+        # 一批中都没有登录时该列全为 NULL，PostgreSQL 会推断为 text，需显式转换
+        login_at = cast(rows.c.last_login_at, DateTime(timezone=True))
+        stmt = (
+            update(users)
+            .where(users.c.tenant_id == rows.c.tenant_id, users.c.id == rows.c.user_id)
+            .values(
+                # GREATEST 忽略 NULL：没有登录的用户保留原 last_login_at
+                last_login_at=func.greatest(users.c.last_login_at, login_at),
+                last_seen_at=func.greatest(users.c.last_seen_at, rows.c.last_seen_at),
+                # 显式保留原值，否则 ORM 的 onupdate 会刷新 updated_at
+                updated_at=users.c.updated_at,
+            )
+        )
+        async with database.engine.begin() as conn:
+            await conn.execute(text("SET LOCAL console.skip_updated_at = 'on'"))
+            await conn.execute(stmt)
+
+
+user_activity = UserActivityTracker(
+    flush_interval=settings.USER_ACTIVITY_FLUSH_INTERVAL_SECONDS,
+    batch_size=settings.USER_ACTIVITY_BATCH_SIZE,
+)
+
+metrics.user_activity_buffered.set_function(lambda: {(): user_activity.buffered})
@@ -0,0 +1,237 @@
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import Row, and_, delete, func, select, text, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from console_server.core.config import settings
+from console_server.core.tenant import get_tenant_id
+from console_server.db import database
+from console_server.env import SRC_LOG_LEVELS
+from console_server.model.archive import user_roles_archive, users_archive
+from console_server.model.rbac import Role, User, user_roles
+from console_server.utils.rbac import grant_effective_permissions
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
+
+# 使用 Core 表而不是 ORM 实体：归档任务跨租户执行，不受 ORM 租户条件限制
+users = User.__table__
+roles = Role.__table__
+
+USER_COLUMNS = [c.name for c in users.c]
+USER_ROLE_COLUMNS = [c.name for c in user_roles.c]
+
+# 归档前后对比大小的索引（分区索引按所有分区求和）
+USER_INDEXES = (
+    "ix_users_name",
+    "ix_users_email",
+    "ix_users_description",
+    "ix_users_is_active",
+    "ix_users_created_at",
+    "ix_users_updated_at",
+    "ix_users_id",
+    "users_pkey",
+)
+
+
+async def index_sizes(db: AsyncSession) -> dict[str, int]:
+    """获取 users 各索引的大小（字节）"""
+    result = await db.execute(
+        text(
+            "SELECT i.name, ("
+            "  SELECT coalesce(sum(pg_relation_size(t.relid)), 0)"
+            "  FROM pg_partition_tree(i.name::regclass) AS t"
+            ") AS size "
+            "FROM unnest(CAST(:names AS text[])) AS i(name)"
+        ),
+        {"names": list(USER_INDEXES)},
+    )
+    return {row.name: int(row.size) for row in result.all()}
+
+
+async def reindex_users() -> None:
+    """重建 users 的索引以回收已删除行占用的空间（不阻塞读写，需在事务外执行）"""
+    async with database.engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await conn.execute(text('REINDEX TABLE CONCURRENTLY "public"."users"'))
+
+
+async def _archive_batch(
+    db: AsyncSession, cutoff: datetime, batch_size: int
+) -> tuple[int, int]:
+    """迁移一批用户，返回 (用户数, 角色分配数)"""
+    # SKIP LOCKED：多个 worker 同时执行时互不等待，也不影响正在被修改的用户
+    result = await db.execute(
+        select(users.c.tenant_id, users.c.id)
+        .where(users.c.is_active.is_(False), users.c.updated_at < cutoff)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    )
+    keys = [tuple(row) for row in result.all()]
+    if not keys:
+        return 0, 0
+
+    # 先迁移角色分配：删除用户时 user_roles / user_effective_permissions 会被级联删除
+    moved_roles = (
+        delete(user_roles)
+        .where(tuple_(user_roles.c.tenant_id, user_roles.c.user_id).in_(keys))
+        .returning(*user_roles.c)
+        .cte("moved_roles")
+    )
+    roles_result = await db.execute(
+        insert(user_roles_archive)
+        .from_select(USER_ROLE_COLUMNS, select(moved_roles))
+        .on_conflict_do_nothing()
+    )
+
+    moved_users = (
+        delete(users)
+        .where(tuple_(users.c.tenant_id, users.c.id).in_(keys))
+        .returning(*users.c)
+        .cte("moved_users")
+    )
+    users_result = await db.execute(
+        insert(users_archive).from_select(USER_COLUMNS, select(moved_users))
+    )
+    await db.commit()
+    return users_result.rowcount, roles_result.rowcount
+
+
+async def archive_inactive_users(
+    db: AsyncSession,
+    *,
+    inactive_days: Optional[int] = None,
+    batch_size: Optional[int] = None,
+    max_batches: Optional[int] = None,
+    reindex: Optional[bool] = None,
+) -> dict:
+    """
+    将禁用超过 inactive_days 天的用户及其角色分配分批迁入冷表
+
+    每批一个事务，批与批之间释放锁，不长时间阻塞用户表。删除的行在 VACUUM 后才会被索引复用，
+    reindex=True 时归档完成后重建索引以立即回收空间。
+
+    Returns:
+        {
+            "users": 迁移的用户数,
+            "user_roles": 迁移的角色分配数,
+            "batches": 批次数,
+            "index_bytes_before": 归档前索引总大小,
+            "index_bytes_after": 归档后索引总大小,
+            "index_bytes_saved": 节省的索引空间,
+            "indexes": {索引名: [归档前, 归档后]},
+        }
+    """
+    inactive_days = inactive_days or settings.ARCHIVE_INACTIVE_DAYS
+    batch_size = batch_size or settings.ARCHIVE_BATCH_SIZE
+    reindex = settings.ARCHIVE_REINDEX if reindex is None else reindex
+    cutoff = datetime.now(timezone.utc) - timedelta(days=inactive_days)
+
+    before = await index_sizes(db)
+    moved_users = moved_roles = batches = 0
+    while max_batches is None or batches < max_batches:
+        n_users, n_roles = await _archive_batch(db, cutoff, batch_size)
+        if n_users == 0:
+            break
+        moved_users += n_users
+        moved_roles += n_roles
+        batches += 1
+
+    if reindex and moved_users:
+        await reindex_users()
+    after = await index_sizes(db)
+
+    report = {
+        "users": moved_users,
+        "user_roles": moved_roles,
+        "batches": batches,
+        "index_bytes_before": sum(before.values()),
+        "index_bytes_after": sum(after.values()),
+        "index_bytes_saved": sum(before.values()) - sum(after.values()),
+        "indexes": {name: [before[name], after[name]] for name in USER_INDEXES},
+    }
+    log.info(
+        f"归档：迁移 {moved_users} 个用户、{moved_roles} 条角色分配（{batches} 批），"
+        f"索引 {report['index_bytes_before']} -> {report['index_bytes_after']} 字节"
+    )
+    return report
+
+
+async def find_archived_user(db: AsyncSession, email: str) -> Optional[Row]:
+    """按邮箱查找当前租户冷表中的用户（id、password），只读，不恢复"""
+    result = await db.execute(
+        select(users_archive.c.id, users_archive.c.password).where(
+            users_archive.c.tenant_id == get_tenant_id(),
+            users_archive.c.email == email,
+        )
+    )
+    return result.one_or_none()
+
+
+async def restore_archived_user(
+    db: AsyncSession, *, user_id: Optional[int] = None, email: Optional[str] = None
+) -> Optional[int]:
+    """
+    从冷表恢复当前租户的用户（按 ID 或邮箱），连同仍然存在的角色分配，并重建其有效权限
+
+    恢复时刷新 updated_at，避免下一轮归档立即再次迁出。
+
+    Returns:
+        恢复的用户 ID，冷表中没有该用户时返回 None
+    """
+    if user_id is None and email is None:
+        return None
+    tenant_id = get_tenant_id()
+    match = (
+        users_archive.c.id == user_id
+        if user_id is not None
+        else users_archive.c.email == email
+    )
+    moved = (
+        delete(users_archive)
+        .where(users_archive.c.tenant_id == tenant_id, match)
+        .returning(*(users_archive.c[name] for name in USER_COLUMNS))
+        .cte("moved")
+    )
+    restored = select(
+        *(
+            func.now().label(name) if name == "updated_at" else moved.c[name]
+            for name in USER_COLUMNS
+        )
+    )
+    result = await db.execute(
+        insert(users).from_select(USER_COLUMNS, restored).returning(users.c.id)
+    )
+    restored_id = result.scalar_one_or_none()
+    if restored_id is None:
+        return None
+
+    # 归档期间被删除的角色不再恢复
+    moved_roles = (
+        delete(user_roles_archive)
+        .where(
+            user_roles_archive.c.tenant_id == tenant_id,
+            user_roles_archive.c.user_id == restored_id,
+        )
+        .returning(*user_roles_archive.c)
+        .cte("moved_roles")
+    )
+    await db.execute(
+        insert(user_roles).from_select(
+            USER_ROLE_COLUMNS,
+            select(*(moved_roles.c[name] for name in USER_ROLE_COLUMNS)).join(
+                roles,
+                and_(
+                    roles.c.tenant_id == moved_roles.c.tenant_id,
+                    roles.c.id == moved_roles.c.role_id,
+                ),
+            ),
+        )
+    )
+    await grant_effective_permissions(db, user_ids=[restored_id])
+    await db.commit()
+    log.info(f"归档：已恢复租户 {tenant_id} 的用户 {restored_id}")
+    return restored_id
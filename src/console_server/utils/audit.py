@@ -0,0 +1,242 @@
+"""
+审计日志
+
+登录、登出、刷新 token、角色/权限分配、用户启用/禁用等事件由 audit_log.record() 放入有界的内存队列，
+后台任务每 AUDIT_FLUSH_INTERVAL_SECONDS 秒（积压达到 AUDIT_BATCH_SIZE 条时立即）批量写入 audit_logs：
+PostgreSQL（asyncpg）上用 COPY，其他数据库用多行 INSERT。请求路径上只做一次入队，不增加数据库往返。
+
+队列已满（写入跟不上或数据库不可用）时按 AUDIT_OVERFLOW_POLICY 处理：
+
+- block：请求等待队列腾出空间，最多 AUDIT_BLOCK_TIMEOUT_SECONDS 秒，超时后丢弃该事件；
+- drop：直接丢弃。
+
+丢弃的事件数记在 audit_events_dropped_total 中。写入失败的一批事件保留下来，下次写入时重试，
+期间新事件继续在队列中积压。lifespan 关闭时调用 stop()，写入队列中剩余的事件。
+
+事件记录时即确定租户、请求 ID 和时间；写入与请求的事务无关，应在操作提交之后记录。
+"""
+
+import asyncio
+import json
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Any, Optional
+
+from fastapi import Request
+from sqlalchemy import insert
+
+from console_server.core.config import settings
+from console_server.core.tenant import get_tenant_id
+from console_server.db import database
+from console_server.env import SRC_LOG_LEVELS
+from console_server.model.audit import AuditLog
+from console_server.utils import metrics
+from console_server.utils.log import get_request_id
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["DB"])
+
+# 事件元组的字段顺序，与 COPY 的列一致
+COLUMNS = (
+    "tenant_id",
+    "created_at",
+    "actor_id",
+    "action",
+    "target_type",
+    "target_id",
+    "success",
+    "detail",
+    "ip",
+    "request_id",
+)
+AuditEvent = tuple[
+    int,
+    datetime,
+    Optional[int],
+    str,
+    Optional[str],
+    Optional[int],
+    bool,
+    Optional[dict[str, Any]],
+    Optional[str],
+    Optional[str],
+]
+
+
+def client_ip(request: Optional[Request]) -> Optional[str]:
+    """客户端地址（经代理时由 uvicorn 按 X-Forwarded-For 还原）"""
+    if request is None or request.client is None:
+        return None
+    return request.client.host
+
+
+class AuditLogger:
+    def __init__(
+        self,
+        maxsize: int,
+        batch_size: int,
+        flush_interval: float,
+        overflow: str,
+        block_timeout: float,
+    ):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overflow = overflow
+        self.block_timeout = block_timeout
+        self._queue: asyncio.Queue[AuditEvent] = asyncio.Queue(maxsize)
+        # 写入失败、等待重试的一批
+        self._pending: list[AuditEvent] = []
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize() + len(self._pending)
+
+    async def record(
+        self,
+        action: str,
+        *,
+        actor_id: Optional[int] = None,
+        target_type: Optional[str] = None,
+        target_id: Optional[int] = None,
+        success: bool = True,
+        detail: Optional[dict[str, Any]] = None,
+        request: Optional[Request] = None,
+    ) -> None:
+        """记录当前租户的一个事件，只入队，不访问数据库"""
+        if not settings.AUDIT_ENABLED:
+            return
+        event: AuditEvent = (
+            get_tenant_id(),
+            datetime.now(timezone.utc),
+            actor_id,
+            action,
+            target_type,
+            target_id,
+            success,
+            detail,
+            client_ip(request),
+            get_request_id(),
+        )
+        try:
+            self._queue.put_nowait(event)
+        except asyncio.QueueFull:
+            if not await self._put_overflow(event):
+                metrics.audit_events_dropped_total.inc("full")
+                log.warning(
+                    f"审计日志队列已满，丢弃事件 {action}",
+                    extra={"sample_key": "audit_dropped"},
+                )
+                return
+        if self._queue.qsize() >= self.batch_size:
+            self._wakeup.set()
+
+    async def _put_overflow(self, event: AuditEvent) -> bool:
+        """队列已满时按策略等待，返回是否入队"""
+        # 先让写入任务立即开始，尽快腾出空间
+        self._wakeup.set()
+        if self.overflow != "block":
+            return False
+        try:
+            async with asyncio.timeout(self.block_timeout):
+                await self._queue.put(event)
+            return True
+        except TimeoutError:
+            return False
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="audit-log")
+
+    async def stop(self) -> None:
+        """停止写入任务，写入剩余的事件（失败的计为丢弃）"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+        remaining = self.depth
+        if remaining > 0:
+            metrics.audit_events_dropped_total.inc("shutdown", amount=remaining)
+            log.error(f"关闭时有 {remaining} 条审计事件未能写入")
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                async with asyncio.timeout(self.flush_interval):
+                    await self._wakeup.wait()
+            except TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    def _take(self) -> list[AuditEvent]:
+        events: list[AuditEvent] = []
+        while len(events) < self.batch_size:
+            try:
+                events.append(self._queue.get_nowait())
+            except asyncio.QueueEmpty:
+                break
+        return events
+
+    async def flush(self) -> int:
+        """分批写入待重试的和队列中的全部事件，返回写入的条数；写入失败时保留该批，下次重试"""
+        written = 0
+        while True:
+            if not self._pending:
+                self._pending = self._take()
+                if not self._pending:
+                    return written
+            start = time.perf_counter()
+            try:
+                await self._write(self._pending)
+            except Exception as e:
+                metrics.audit_flush_seconds.observe(time.perf_counter() - start, "error")
+                log.error(
+                    f"写入 {len(self._pending)} 条审计事件失败，稍后重试：{str(e)}",
+                    extra={"sample_key": "audit_flush_error"},
+                )
+                return written
+            metrics.audit_flush_seconds.observe(time.perf_counter() - start, "ok")
+            written += len(self._pending)
+            self._pending = []
+
+    async def _write(self, events: list[AuditEvent]) -> None:
+        async with database.engine.begin() as conn:
+            if conn.dialect.driver == "asyncpg":
+                raw = await conn.get_raw_connection()
+                detail = COLUMNS.index("detail")
+                # asyncpg 的 jsonb 编解码使用 JSON 文本
+                records = [
+                    event[:detail]
+                    + (None if event[detail] is None else json.dumps(event[detail]),)
+                    + event[detail + 1 :]
+                    for event in events
+                ]
+                await raw.driver_connection.copy_records_to_table(  # type: ignore[union-attr]
+                    AuditLog.__tablename__, columns=COLUMNS, records=records
+                )
+            else:
+                await conn.execute(
+                    insert(AuditLog), [dict(zip(COLUMNS, event)) for event in events]
+                )
+
+
+audit_log = AuditLogger(
+    maxsize=settings.AUDIT_QUEUE_SIZE,
+    batch_size=settings.AUDIT_BATCH_SIZE,
+    flush_interval=settings.AUDIT_FLUSH_INTERVAL_SECONDS,
+    overflow=settings.AUDIT_OVERFLOW_POLICY,
+    block_timeout=settings.AUDIT_BLOCK_TIMEOUT_SECONDS,
+)
+
+metrics.audit_queue_depth.set_function(lambda: {(): audit_log.depth})
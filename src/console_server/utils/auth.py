@@ -1,20 +1,30 @@
 from datetime import datetime, timedelta, timezone
-from typing import List, Optional
+from typing import List, Optional, cast
 import hashlib
+import logging
+import time
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, delete, func
+from sqlalchemy import select, delete, func, or_
 from sqlalchemy.orm import selectinload
 
 from console_server.db import database
 
-from console_server.model.rbac import User, Role
+from console_server.model.rbac import User, Permission, user_effective_permissions
 from console_server.model.token import TokenBlacklist
 from console_server.core.config import settings
+from console_server.env import SRC_LOG_LEVELS
+from console_server.core.tenant import get_tenant_id, set_tenant_id
+from console_server.utils.cache import TenantLRUCache
+from console_server.utils import tracing
+from console_server.utils.activity import user_activity
+from console_server.utils.rbac import on_permissions_changed
 
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["OAUTH"])
 
 # 密码加密上下文
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -169,7 +179,9 @@ async def get_current_user(
     )
 
     # 检查 token 是否在黑名单中
-    if await is_token_blacklisted(token, db):
+    with tracing.span("auth.blacklist_check"):
+        revoked = await is_token_blacklisted(token, db)
+    if revoked:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Token 已被撤销，请重新登录",
@@ -179,65 +191,163 @@ async def get_current_user(
     # 解码 JWT token，验证其有效性
     try:
         # 使用密钥和算法解码 token，获取 payload 数据
-        payload = jwt.decode(
-            token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
-        )
+        with tracing.span("jwt.decode"):
+            payload = jwt.decode(
+                token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
+            )
         # 从 payload 中提取用户邮箱（"sub" 字段通常存储用户标识）
         email: str | None = payload.get("sub") or None
         # 如果邮箱为空，说明 token 无效，抛出认证异常
         if email is None:
             raise credentials_exception
+        # 用户所属租户，之后的查询都限定在该租户内
+        tenant_id = payload.get("tid", settings.DEFAULT_TENANT_ID)
     except JWTError:
         # 如果 token 解码失败（过期、格式错误等），抛出认证异常
         raise credentials_exception
 
+    # token 中的租户优先于请求头（refresh 等未经过 AuthMiddleware 校验的接口）
+    if tenant_id != get_tenant_id():
+        set_tenant_id(tenant_id)
+
     # 根据邮箱从数据库中查询用户信息
-    # 预加载 roles 关系，避免在序列化时触发懒加载（会在 async 环境中触发 greenlet 错误）
-    result = await db.execute(
-        select(User)
-        .options(selectinload(User.roles).selectinload(Role.permissions))
-        .where(User.email == email)
-    )
-    user = result.scalar_one_or_none()
+    # 预加载未过期的角色，避免在序列化时触发懒加载（会在 async 环境中触发 greenlet 错误）
+    # 权限由 require_permission 通过 get_permission_names 按需读取（带缓存）
+    with tracing.span("auth.load_principal"):
+        user = await get_user_with_roles(email, db)
     # 如果用户不存在，抛出认证异常
     if user is None:
         raise credentials_exception
+    # 只记在内存中，由 utils/activity.py 批量写入 last_seen_at
+    user_activity.touch(cast(int, user.tenant_id), cast(int, user.id))
 
-    # 返回查询到的用户对象（已包含角色和权限信息）
+    # 返回查询到的用户对象（已包含未过期的角色）
     return user
 
 
+async def get_user_with_roles(email: str, db: AsyncSession) -> Optional[User]:
+    """按邮箱查询用户并预加载未过期的角色（get_current_user 和启动预热共用）"""
+    result = await db.execute(
+        select(User).options(selectinload(User.active_roles)).where(User.email == email)
+    )
+    return result.scalar_one_or_none()
+
+
+# 用户有效权限名称缓存：(tenant_id) user_id -> frozenset(permission.name)，每个租户单独限制容量
+permission_cache: TenantLRUCache[frozenset[str]] = TenantLRUCache(
+    settings.PERMISSION_CACHE_MAX_ENTRIES,
+    settings.PERMISSION_CACHE_TENANT_LIMITS,
+)
+
+
+@on_permissions_changed
+def invalidate_permission_cache(tenant_id: int, user_ids: Optional[set[int]]) -> None:
+    """失效用户的权限缓存（本进程提交后调用；其他进程的变更由 utils/invalidation.py 转发）"""
+    if user_ids is None:
+        permission_cache.clear(tenant_id)
+        return
+    for user_id in user_ids:
+        permission_cache.pop(tenant_id, user_id)
+
+
+async def get_permission_names(user: User, db: AsyncSession) -> frozenset[str]:
+    """
+    获取用户的有效权限名称（带缓存）
+
+    未命中时对 user_effective_permissions 做一次索引扫描。缓存条目在最早到期的临时权限过期时
+    自动失效，角色/权限变更提交后立即失效（其他进程经 LISTEN/NOTIFY 失效）。
+    """
+    tenant_id = cast(int, user.tenant_id)
+    user_id = user.id
+    cached = permission_cache.get(tenant_id, user_id)
+    if cached is not None:
+        return cached
+
+    uep = user_effective_permissions
+    result = await db.execute(
+        select(Permission.name, uep.c.expires_at)
+        .join(uep, uep.c.permission_id == Permission.id)
+        .where(
+            uep.c.tenant_id == tenant_id,
+            uep.c.user_id == user_id,
+            or_(uep.c.expires_at.is_(None), uep.c.expires_at > func.now()),
+        )
+    )
+    rows = result.all()
+    names = frozenset(row.name for row in rows)
+
+    valid_until = time.time() + settings.PERMISSION_CACHE_TTL_SECONDS
+    for row in rows:
+        if row.expires_at is not None:
+            valid_until = min(valid_until, row.expires_at.timestamp())
+    permission_cache.set(tenant_id, user_id, names, valid_until)
+    return names
+
+
 ADMIN_API = "api:*"
 
 
+async def check_permission(
+    current_user: User, db: AsyncSession, curr_api_path: str, required_permission: str
+) -> None:
+    """校验用户是否拥有 curr_api_path 下的 required_permission，没有时抛出 403"""
+    # 如果用户是管理员，无需权限检查
+    for role in current_user.active_roles:
+        if role.name in ("admin", f"{curr_api_path}_admin"):
+            return
+    # 遍历用户的有效权限（已去重）
+    for p_name in await get_permission_names(current_user, db):
+        # 如果当前用户拥有 ['api:*', 'api:PATH:*'] 通过校验
+        if p_name == ADMIN_API or p_name == f"api:{curr_api_path}:*":
+            return
+        # 如果当前用户拥有 ['api:PATH:get', 'api:PATH:get,POST,put', etc... ] 通过校验
+        elif p_name.startswith(f"api:{curr_api_path}:"):
+            api_name = p_name.split(":")[2].lower()
+            r_name = required_permission.split(":")[2]
+            if r_name in api_name:
+                return
+
+    log.info(
+        f"用户 {current_user.id} 缺少权限 {required_permission}",
+        extra={"sample_key": "permission_denied"},
+    )
+    raise HTTPException(
+        status_code=status.HTTP_403_FORBIDDEN,
+        detail=f"Permission {required_permission} required",
+    )
+
+
 def require_permission(curr_api_path: str, required_permission: str):
     """权限验证装饰器"""
 
     async def permission_checker(
         current_user: User = Depends(get_current_user),
+        db: AsyncSession = Depends(database.get_db),
     ) -> User:
-        # 如果用户是管理员，无需权限检查
-        for role in current_user.roles:
-            if role.name == "admin" or f"{curr_api_path}_admin":
-                return current_user
-        # 遍历用户的角色，获取每个角色的权限
-        for role in current_user.roles:
-            for permission in role.permissions:
-                p_name = permission.name
-                # 如果当前用户拥有 ['api:*', 'api:PATH:*'] 通过校验
-                if p_name == ADMIN_API or p_name == f"api:{curr_api_path}:*":
-                    return current_user
-                # 如果当前用户拥有 ['api:PATH:get', 'api:PATH:get,POST,put', etc... ] 通过校验
-                elif p_name.startswith(f"api:{curr_api_path}:"):
-                    api_name = p_name.split(":")[2].lower()
-                    r_name = required_permission.split(":")[2]
-                    if r_name in api_name:
-                        return current_user
-
-        print(f"Permission {required_permission} required =====================")
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail=f"Permission {required_permission} required",
-        )
+        await check_permission(current_user, db, curr_api_path, required_permission)
+        return current_user
 
     return permission_checker
+
+
+def require_operator(curr_api_path: str, required_permission: str):
+    """进程级诊断接口的权限验证：除 required_permission 外，用户还必须属于 OPERATOR_TENANT_ID"""
+
+    async def operator_checker(
+        current_user: User = Depends(get_current_user),
+        db: AsyncSession = Depends(database.get_db),
+    ) -> User:
+        # 采样、内存追踪等作用于所有租户共享的进程，租户内的管理员角色不足以使用
+        if current_user.tenant_id != settings.OPERATOR_TENANT_ID:
+            log.info(
+                f"用户 {current_user.id}（租户 {current_user.tenant_id}）不是运维租户的用户",
+                extra={"sample_key": "operator_denied"},
+            )
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Operator tenant required",
+            )
+        await check_permission(current_user, db, curr_api_path, required_permission)
+        return current_user
+
+    return operator_checker
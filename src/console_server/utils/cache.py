@@ -0,0 +1,100 @@
+import time
+from collections import OrderedDict
+from typing import Generic, Hashable, Mapping, Optional, TypeVar
+
+V = TypeVar("V")
+
+
+class LRUCache(Generic[V]):
+    """
+    带过期时间的进程内 LRU 缓存
+
+    只在事件循环线程中使用，不做加锁。每个条目有独立的失效时间（time.time() 时间戳）。
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict[Hashable, tuple[V, float]] = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[V]:
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        value, valid_until = entry
+        if valid_until <= time.time():
+            del self._data[key]
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: V, valid_until: float) -> None:
+        if self.maxsize <= 0:
+            return
+        self._data[key] = (value, valid_until)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key: Hashable) -> None:
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class TenantLRUCache(Generic[V]):
+    """
+    按租户分区的 LRU 缓存
+
+    每个租户一个独立的 LRUCache，容量互不挤占：一个大租户的访问不会把小租户的条目淘汰出去。
+    """
+
+    def __init__(self, maxsize: int, limits: Optional[Mapping[int, int]] = None):
+        self.maxsize = maxsize  # 未单独配置的租户使用的容量
+        self.limits = dict(limits or {})
+        self._partitions: dict[int, LRUCache[V]] = {}
+
+    def partition(self, tenant_id: int) -> LRUCache[V]:
+        cache = self._partitions.get(tenant_id)
+        if cache is None:
+            cache = LRUCache(self.limits.get(tenant_id, self.maxsize))
+            self._partitions[tenant_id] = cache
+        return cache
+
+    def get(self, tenant_id: int, key: Hashable) -> Optional[V]:
+        return self.partition(tenant_id).get(key)
+
+    def set(self, tenant_id: int, key: Hashable, value: V, valid_until: float) -> None:
+        self.partition(tenant_id).set(key, value, valid_until)
+
+    def pop(self, tenant_id: int, key: Hashable) -> None:
+        cache = self._partitions.get(tenant_id)
+        if cache is not None:
+            cache.pop(key)
+
+    def clear(self, tenant_id: Optional[int] = None) -> None:
+        """清空指定租户，None 表示清空全部租户"""
+        if tenant_id is None:
+            for cache in self._partitions.values():
+                cache.clear()
+        elif tenant_id in self._partitions:
+            self._partitions[tenant_id].clear()
+
+    @property
+    def hits(self) -> int:
+        return sum(cache.hits for cache in self._partitions.values())
+
+    @property
+    def misses(self) -> int:
+        return sum(cache.misses for cache in self._partitions.values())
+
+    def __len__(self) -> int:
+        return sum(len(cache) for cache in self._partitions.values())
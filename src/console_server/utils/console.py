@@ -1,26 +1,38 @@
-from colorama import Fore, Back, Style
+"""
+控制台输出
+
+print_* 保留原有的调用方式，但不再直接 print：统一写入日志队列（utils/log.py），由后台线程输出，
+LOG_FORMAT=text 时仍是原来的彩色格式。
+"""
+
+import logging
+
+from console_server.env import SRC_LOG_LEVELS
+
+log = logging.getLogger("console_server.console")
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
 
 
 def print_error(message: str):
-    """打印红色错误信息"""
-    print(f"{Fore.RED}[ERROR] {message}{Style.RESET_ALL}")
+    """输出错误信息（文本格式下为红色）"""
+    log.error(message)
 
 
 def print_warn(message: str):
-    """打印黄色警告信息"""
-    print(f"{Fore.YELLOW}[WARN] {message}{Style.RESET_ALL}")
+    """输出警告信息（文本格式下为黄色）"""
+    log.warning(message)
 
 
 def print_success(message: str):
-    """打印绿色成功信息"""
-    print(f"{Fore.GREEN}[OK] {message}{Style.RESET_ALL}")
+    """输出成功信息（文本格式下为绿色）"""
+    log.info(message, extra={"style": "success"})
 
 
 def print_info(message: str):
-    """打印蓝色信息"""
-    print(f"{Fore.BLUE}[INFO] {message}{Style.RESET_ALL}")
+    """输出普通信息（文本格式下为蓝色）"""
+    log.info(message)
 
 
 # 可选：带背景色
 def print_highlight(message: str):
-    print(f"{Back.CYAN}{Fore.BLACK}{message}{Style.RESET_ALL}")
+    log.info(message, extra={"style": "highlight"})
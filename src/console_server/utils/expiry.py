@@ -0,0 +1,128 @@
+import asyncio
+import heapq
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import select
+
+from console_server.core.config import settings
+from console_server.core.tenant import get_tenant_id, tenant_scope
+from console_server.db import database
+from console_server.env import SRC_LOG_LEVELS
+from console_server.model.rbac import user_roles
+from console_server.utils import rbac
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
+
+
+class RoleExpiryScheduler:
+    """
+    进程内的角色分配过期调度器
+
+    用最小堆保存即将到期的 (expires_at, tenant_id, user_id, role_id)，在到期时刻精确移除分配并失效缓存，
+    不做周期性全表扫描。堆只装载未来 horizon 时间窗内到期的分配（走 expires_at 索引的范围扫描），
+    窗口结束时重新装载，以覆盖其他 worker 创建的分配。
+
+    到期之前的权限校验不依赖本调度器：有效权限表的 expires_at 在读取时即被校验。
+    """
+
+    def __init__(self, horizon: timedelta):
+        self.horizon = horizon
+        self._heap: list[tuple[datetime, int, int, int]] = []
+        self._horizon_end: Optional[datetime] = None
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def schedule(self, user_id: int, role_id: int, expires_at: datetime) -> None:
+        """登记当前租户的一个新临时分配（本进程创建的分配立即生效，无需等待重新装载）"""
+        if self._horizon_end is None or expires_at > self._horizon_end:
+            return
+        heapq.heappush(self._heap, (expires_at, get_tenant_id(), user_id, role_id))
+        if self._heap[0][0] == expires_at:
+            self._wakeup.set()
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="role-expiry")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _load(self) -> None:
+        """装载所有租户 horizon 时间窗内（含已过期未清理）的临时分配"""
+        horizon_end = datetime.now(timezone.utc) + self.horizon
+        async with database.AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(
+                    user_roles.c.expires_at,
+                    user_roles.c.tenant_id,
+                    user_roles.c.user_id,
+                    user_roles.c.role_id,
+                )
+                .where(
+                    user_roles.c.expires_at.is_not(None),
+                    user_roles.c.expires_at <= horizon_end,
+                )
+                .order_by(user_roles.c.expires_at)
+            )
+            rows = [tuple(row) for row in result.all()]
+        self._heap = rows  # 已按 expires_at 排序，满足堆性质
+        self._horizon_end = horizon_end
+        log.debug(f"角色过期调度：装载 {len(rows)} 个临时分配")
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                if (
+                    self._horizon_end is None
+                    or datetime.now(timezone.utc) >= self._horizon_end
+                ):
+                    await self._load()
+
+                now = datetime.now(timezone.utc)
+                due: dict[int, list[tuple[int, int]]] = {}
+                while self._heap and self._heap[0][0] <= now:
+                    _, tenant_id, user_id, role_id = heapq.heappop(self._heap)
+                    due.setdefault(tenant_id, []).append((user_id, role_id))
+                if due:
+                    for tenant_id, pairs in due.items():
+                        with tenant_scope(tenant_id):
+                            async with database.AsyncSessionLocal() as db:
+                                user_ids = await rbac.expire_role_assignments(db, pairs)
+                        if user_ids:
+                            log.info(
+                                f"角色过期调度：租户 {tenant_id} 中 {len(user_ids)} 个用户的临时角色已到期"
+                            )
+                    continue
+
+                assert self._horizon_end is not None
+                next_at = self._heap[0][0] if self._heap else self._horizon_end
+                timeout = (min(next_at, self._horizon_end) - now).total_seconds()
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=max(timeout, 0))
+                except asyncio.TimeoutError:
+                    pass
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log.error(f"角色过期调度失败：{str(e)}", exc_info=True)
+                self._horizon_end = None
+                await asyncio.sleep(settings.ROLE_EXPIRY_RETRY_SECONDS)
+
+
+role_expiry = RoleExpiryScheduler(
+    horizon=timedelta(seconds=settings.ROLE_EXPIRY_HORIZON_SECONDS)
+)
@@ -0,0 +1,166 @@
+"""
+存活 / 就绪探针
+
+数据库连通性由后台任务每 HEALTH_CHECK_INTERVAL_SECONDS 执行一次 SELECT 1 并缓存结果，探针本身只读取缓存，
+不访问数据库；同一次循环中用 sleep 的超时量估算事件循环延迟（不依赖 LOOP_MONITOR_ENABLED）。
+
+就绪检查项：数据库最近一次探测成功且结果未过期、连接池占用率、事件循环延迟、定时任务调度器在运行。
+任一项不满足时 /api/health/ready 返回 503，负载均衡器据此摘除该 worker；应用关闭时立即变为未就绪。
+设置 SERVER_DRAIN_SECONDS 后，收到 SIGTERM 先变为未就绪并继续处理请求，等负载均衡器摘除后再开始关闭。
+"""
+
+import asyncio
+import logging
+import signal
+import threading
+import time
+from typing import Any, Callable, Optional
+
+from sqlalchemy import text
+
+from console_server.core.config import settings
+from console_server.db import database
+from console_server.env import SRC_LOG_LEVELS
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
+
+
+def _pool_saturation() -> tuple[int, int]:
+    """(已借出连接数, 连接池容量 = pool_size + max_overflow)"""
+    pool = database.engine.pool
+    capacity = pool.size() + max(getattr(pool, "_max_overflow", 0), 0)  # type: ignore[attr-defined]
+    return pool.checkedout(), capacity  # type: ignore[attr-defined]
+
+
+class HealthChecker:
+    def __init__(self, interval: float, db_timeout: float):
+        self.interval = interval
+        self.db_timeout = db_timeout
+        self._task: Optional[asyncio.Task] = None
+        self._draining = False
+        # 调度器等后台组件的运行状态：名称 -> 是否在运行
+        self._components: dict[str, Callable[[], bool]] = {}
+        # 最近一次数据库探测
+        self._db_ok = False
+        self._db_checked_at: Optional[float] = None
+        self._db_latency = 0.0
+        self._db_error: Optional[str] = None
+        self._loop_lag = 0.0
+
+    def register_component(self, name: str, is_running: Callable[[], bool]) -> None:
+        self._components[name] = is_running
+
+    def start(self) -> None:
+        self._draining = False
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="health-check")
+
+    async def stop(self) -> None:
+        """标记为未就绪（关闭期间不再接收新流量）并停止后台探测"""
+        self._draining = True
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def drain_on_sigterm(self, seconds: float) -> None:
+        """
+        接管 SIGTERM：先标记为未就绪，seconds 秒后再交给原来的处理函数（uvicorn 的优雅关闭）
+
+        需在 uvicorn 安装信号处理函数之后调用（lifespan 启动阶段）；排空期间再次收到 SIGTERM 时立即关闭。
+        """
+        if threading.current_thread() is not threading.main_thread():
+            return
+        previous = signal.getsignal(signal.SIGTERM)
+        if not callable(previous):
+            return
+        loop = asyncio.get_running_loop()
+
+        def handle(sig, frame) -> None:
+            if self._draining:
+                previous(sig, frame)
+                return
+            self._draining = True
+            log.info(f"收到 SIGTERM，{seconds} 秒后开始关闭")
+            loop.call_soon_threadsafe(loop.call_later, seconds, previous, sig, frame)
+
+        signal.signal(signal.SIGTERM, handle)
+
+    async def _check_db(self) -> None:
+        start = time.perf_counter()
+        try:
+            async with asyncio.timeout(self.db_timeout):
+                async with database.engine.connect() as conn:
+                    await conn.execute(text("SELECT 1"))
+        except Exception as e:
+            # 完整的异常信息只写入日志：状态变为不可用或首次探测即失败时记录
+            if self._db_ok or self._db_checked_at is None:
+                log.warning(f"健康检查：数据库不可用：{type(e).__name__}: {str(e)}")
+            self._db_ok = False
+            # 就绪接口无需登录，只返回异常类型；异常信息含主机、端口、用户名，只写入日志
+            self._db_error = type(e).__name__
+        else:
+            if not self._db_ok and self._db_checked_at is not None:
+                log.info("健康检查：数据库已恢复")
+            self._db_ok = True
+            self._db_error = None
+        self._db_latency = time.perf_counter() - start
+        self._db_checked_at = time.monotonic()
+
+    async def _run(self) -> None:
+        while True:
+            await self._check_db()
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            self._loop_lag = max(time.monotonic() - expected, 0.0)
+
+    def readiness(self) -> tuple[bool, dict[str, Any]]:
+        """返回 (是否就绪, 各检查项)，只读取缓存的状态"""
+        checks: dict[str, Any] = {}
+
+        age = (
+            time.monotonic() - self._db_checked_at
+            if self._db_checked_at is not None
+            else None
+        )
+        # 超过 3 个探测周期没有结果，说明探测任务本身卡住了
+        db_fresh = age is not None and age <= self.interval * 3 + self.db_timeout
+        checks["database"] = {
+            "ok": self._db_ok and db_fresh,
+            "checked_seconds_ago": round(age, 3) if age is not None else None,
+            "latency_ms": round(self._db_latency * 1000, 3),
+            "error": self._db_error,
+        }
+
+        checked_out, capacity = _pool_saturation()
+        saturation = checked_out / capacity if capacity else 0.0
+        checks["db_pool"] = {
+            "ok": saturation < settings.HEALTH_MAX_POOL_SATURATION,
+            "checked_out": checked_out,
+            "capacity": capacity,
+            "saturation": round(saturation, 3),
+        }
+
+        lag_ms = self._loop_lag * 1000
+        checks["event_loop"] = {
+            "ok": lag_ms < settings.HEALTH_MAX_LOOP_LAG_MS,
+            "lag_ms": round(lag_ms, 3),
+        }
+
+        for name, is_running in self._components.items():
+            checks[name] = {"ok": is_running()}
+
+        checks["draining"] = {"ok": not self._draining}
+
+        ready = all(check["ok"] for check in checks.values())
+        return ready, checks
+
+
+health_checker = HealthChecker(
+    interval=settings.HEALTH_CHECK_INTERVAL_SECONDS,
+    db_timeout=settings.HEALTH_DB_TIMEOUT_SECONDS,
+)
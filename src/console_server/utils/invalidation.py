@@ -0,0 +1,158 @@
+"""
+权限缓存跨进程失效
+
+permission_cache 在每个 worker 进程内，本进程的角色 / 权限变更提交后由 on_permissions_changed 立即失效。
+其他进程通过 PostgreSQL LISTEN/NOTIFY 得知变更：提交后向频道 PERMISSIONS_CHANNEL 发送
+{"origin", "tenant_id", "user_ids"}，每个进程用一条专用连接（不占用连接池）LISTEN，
+收到其他进程的通知后失效本地缓存。
+
+监听连接断开期间可能错过通知，重新连接后清空整个缓存；断开期间其他进程的变更最迟在
+PERMISSION_CACHE_TTL_SECONDS 秒后生效。非 PostgreSQL（基准测试的 SQLite）时不启用。
+"""
+
+import asyncio
+import json
+import logging
+import os
+import socket
+import uuid
+from typing import Any, Optional
+
+import asyncpg
+from sqlalchemy import func, select
+
+from console_server.db import database
+from console_server.env import SRC_LOG_LEVELS
+from console_server.utils.auth import invalidate_permission_cache, permission_cache
+from console_server.utils.rbac import on_permissions_changed
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["DB"])
+
+PERMISSIONS_CHANNEL = "console_permissions_changed"
+# NOTIFY 的 payload 上限为 8000 字节，用户过多时改为失效整个租户
+MAX_PAYLOAD_BYTES = 7000
+# 监听连接的存活检查间隔、断开后的重连间隔（秒）
+PING_INTERVAL = 30
+RECONNECT_DELAY = 5
+
+
+class PermissionCacheSync:
+    def __init__(self, channel: str):
+        self.channel = channel
+        self.origin = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._task: Optional[asyncio.Task] = None
+        # 提交后发起的 NOTIFY，保留引用直到完成
+        self._publishing: set[asyncio.Task] = set()
+
+    @property
+    def enabled(self) -> bool:
+        return database.engine.dialect.driver == "asyncpg"
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self) -> None:
+        if self._task is None and self.enabled:
+            self._task = asyncio.create_task(self._run(), name="permission-cache-sync")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._publishing:
+            await asyncio.gather(*self._publishing, return_exceptions=True)
+
+    def publish(self, tenant_id: int, user_ids: Optional[set[int]]) -> None:
+        """在事务提交后（同步回调中）通知其他进程，没有事件循环时（命令行）跳过"""
+        if not self.enabled:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        payload = json.dumps(
+            {
+                "origin": self.origin,
+                "tenant_id": tenant_id,
+                "user_ids": None if user_ids is None else sorted(user_ids),
+            }
+        )
+        if len(payload.encode()) > MAX_PAYLOAD_BYTES:
+            payload = json.dumps({"origin": self.origin, "tenant_id": tenant_id, "user_ids": None})
+        task = loop.create_task(self._notify(payload))
+        self._publishing.add(task)
+        task.add_done_callback(self._publishing.discard)
+
+    async def _notify(self, payload: str) -> None:
+        try:
+            async with database.engine.begin() as conn:
+                await conn.execute(select(func.pg_notify(self.channel, payload)))
+        except Exception as e:
+            log.warning(
+                f"发送权限变更通知失败，其他进程的缓存将按 TTL 过期：{str(e)}",
+                extra={"sample_key": "permission_notify_error"},
+            )
+
+    def _on_notify(self, conn: Any, pid: int, channel: str, payload: str) -> None:
+        try:
+            message = json.loads(payload)
+        except ValueError:
+            log.warning(f"无法解析的权限变更通知：{payload[:200]}")
+            return
+        if message.get("origin") == self.origin:
+            # 本进程的变更已在提交后失效
+            return
+        user_ids = message.get("user_ids")
+        invalidate_permission_cache(
+            int(message["tenant_id"]), None if user_ids is None else set(user_ids)
+        )
+
+    async def _run(self) -> None:
+        dsn = database.engine.url.set(drivername="postgresql").render_as_string(
+            hide_password=False
+        )
+        reconnect = False
+        while True:
+            try:
+                conn = await asyncpg.connect(dsn)
+            except Exception as e:
+                log.warning(f"连接权限变更通知频道失败，{RECONNECT_DELAY} 秒后重试：{str(e)}")
+                await asyncio.sleep(RECONNECT_DELAY)
+                continue
+            closed = asyncio.Event()
+            conn.add_termination_listener(lambda _: closed.set())
+            try:
+                await conn.add_listener(self.channel, self._on_notify)
+                if reconnect:
+                    # 断开期间可能错过通知
+                    permission_cache.clear()
+                    log.info("权限变更通知频道已重新连接，已清空权限缓存")
+                reconnect = True
+                while not closed.is_set():
+                    try:
+                        async with asyncio.timeout(PING_INTERVAL):
+                            await closed.wait()
+                    except TimeoutError:
+                        # 及时发现网络中断等未关闭套接字的断开
+                        await conn.execute("SELECT 1")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log.warning(f"权限变更通知频道断开：{str(e)}")
+            finally:
+                conn.terminate()
+            await asyncio.sleep(RECONNECT_DELAY)
+
+
+permission_sync = PermissionCacheSync(PERMISSIONS_CHANNEL)
+
+
+@on_permissions_changed
+def _publish_permissions_changed(tenant_id: int, user_ids: Optional[set[int]]) -> None:
+    permission_sync.publish(tenant_id, user_ids)
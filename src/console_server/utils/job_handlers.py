@@ -0,0 +1,147 @@
+"""
+内置的后台任务类型
+
+每批（JOB_BATCH_SIZE 个用户 / 行）一个事务并报告一次进度；任务中断后重新执行时，已完成的批次再执行一遍
+结果相同（分配角色为 upsert，禁用为幂等更新，清理黑名单只删除已过期的行）。
+
+分配角色、禁用 / 启用每批记录一条审计事件，操作人为提交任务的用户。
+"""
+
+from datetime import datetime, timezone
+
+from sqlalchemy import delete, func, select, update
+
+from console_server.core.config import settings
+from console_server.core.constants import (
+    ADMIN_PATH,
+    ADMIN_POST_API,
+    USER_PATH,
+    USER_POST_API,
+    USER_PUT_API,
+)
+from console_server.db import database
+from console_server.model.rbac import Role, User
+from console_server.model.token import TokenBlacklist
+from console_server.schema.job import (
+    BulkAssignRolesPayload,
+    BulkSetUserActivePayload,
+    CleanupTokenBlacklistPayload,
+)
+from console_server.socket.main import logout_users
+from console_server.utils import rbac
+from console_server.utils.audit import audit_log
+from console_server.utils.expiry import role_expiry
+from console_server.utils.jobs import JobContext, PermanentJobError, job_handler
+
+
+def _batches(ids: list[int]):
+    unique = list(dict.fromkeys(ids))
+    for start in range(0, len(unique), settings.JOB_BATCH_SIZE):
+        yield start + settings.JOB_BATCH_SIZE, unique[start : start + settings.JOB_BATCH_SIZE]
+
+
+@job_handler(
+    "bulk_assign_roles", BulkAssignRolesPayload, permission=(USER_PATH, USER_POST_API)
+)
+async def bulk_assign_roles(ctx: JobContext, payload: BulkAssignRolesPayload) -> dict:
+    """为一批用户分配同一组角色（已分配的更新过期时间），不存在或已归档的用户跳过"""
+    expires_at = payload.expires_at
+    if expires_at is not None:
+        if expires_at.tzinfo is None:
+            expires_at = expires_at.replace(tzinfo=timezone.utc)
+        if expires_at <= datetime.now(timezone.utc):
+            raise PermanentJobError("expires_at must be in the future")
+
+    async with database.AsyncSessionLocal() as db:
+        result = await db.execute(select(Role.id).where(Role.id.in_(payload.role_ids)))
+        role_ids = set(result.scalars().all())
+    missing_role_ids = set(payload.role_ids) - role_ids
+    if missing_role_ids:
+        raise PermanentJobError(f"Roles with IDs {sorted(missing_role_ids)} not found")
+
+    total = len(set(payload.user_ids))
+    assigned = 0
+    for done, user_ids in _batches(payload.user_ids):
+        async with database.AsyncSessionLocal() as db:
+            result = await db.execute(select(User.id).where(User.id.in_(user_ids)))
+            found_user_ids = list(result.scalars().all())
+            await rbac.assign_roles_to_users(db, found_user_ids, role_ids, expires_at)
+            await db.commit()
+        if expires_at is not None:
+            for user_id in found_user_ids:
+                for role_id in role_ids:
+                    role_expiry.schedule(user_id, role_id, expires_at)
+        await audit_log.record(
+            "user.assign_roles",
+            actor_id=ctx.created_by,
+            target_type="user",
+            detail={
+                "job_id": ctx.job_id,
+                "user_ids": found_user_ids,
+                "role_ids": sorted(role_ids),
+                "expires_at": expires_at.isoformat() if expires_at is not None else None,
+            },
+        )
+        assigned += len(found_user_ids)
+        await ctx.progress(min(done, total), total, f"已处理 {min(done, total)} / {total} 个用户")
+    return {"users": assigned, "skipped_users": total - assigned}
+
+
+@job_handler(
+    "bulk_set_user_active", BulkSetUserActivePayload, permission=(USER_PATH, USER_PUT_API)
+)
+async def bulk_set_user_active(ctx: JobContext, payload: BulkSetUserActivePayload) -> dict:
+    """批量禁用 / 启用用户"""
+    total = len(set(payload.user_ids))
+    updated = 0
+    for done, user_ids in _batches(payload.user_ids):
+        async with database.AsyncSessionLocal() as db:
+            result = await db.execute(
+                update(User)
+                .where(User.id.in_(user_ids))
+                .values(is_active=payload.is_active)
+                .returning(User.id)
+            )
+            changed_user_ids = list(result.scalars().all())
+            await db.commit()
+        await audit_log.record(
+            "user.enable" if payload.is_active else "user.disable",
+            actor_id=ctx.created_by,
+            target_type="user",
+            detail={"job_id": ctx.job_id, "user_ids": changed_user_ids},
+        )
+        if not payload.is_active:
+            await logout_users(changed_user_ids)
+        updated += len(changed_user_ids)
+        await ctx.progress(min(done, total), total, f"已处理 {min(done, total)} / {total} 个用户")
+    return {"users": updated, "skipped_users": total - updated}
+
+
+# token_blacklist 是全局表：需要管理员权限，同一租户不重复排队
+@job_handler(
+    "cleanup_token_blacklist",
+    CleanupTokenBlacklistPayload,
+    permission=(ADMIN_PATH, ADMIN_POST_API),
+    singleton=True,
+)
+async def cleanup_token_blacklist(
+    ctx: JobContext, payload: CleanupTokenBlacklistPayload
+) -> dict:
+    """分批删除已过期的黑名单 token（每批一个短事务，不长时间锁表）"""
+    expired = TokenBlacklist.expires_at < func.now()
+    async with database.AsyncSessionLocal() as db:
+        result = await db.execute(select(func.count(TokenBlacklist.id)).where(expired))
+        total = result.scalar_one()
+    deleted = 0
+    while True:
+        batch = select(TokenBlacklist.id).where(expired).limit(settings.JOB_BATCH_SIZE)
+        async with database.AsyncSessionLocal() as db:
+            result = await db.execute(
+                delete(TokenBlacklist).where(TokenBlacklist.id.in_(batch.scalar_subquery()))
+            )
+            await db.commit()
+        if result.rowcount == 0:  # type: ignore[attr-defined]
+            break
+        deleted += result.rowcount  # type: ignore[attr-defined]
+        await ctx.progress(min(deleted, total), total, f"已删除 {deleted} 个过期 token")
+    return {"deleted": deleted}
@@ -0,0 +1,447 @@
+"""
+后台任务队列
+
+耗时的管理操作（批量分配角色、批量禁用用户、清理 token 黑名单等）不在 HTTP 请求中执行：接口把任务写入
+background_jobs 后立即返回任务 ID，客户端轮询 /api/v1/job/{id} 查看状态和进度。
+
+- 每个 worker 进程启动 JOB_WORKER_CONCURRENCY 个消费协程，用 UPDATE ... WHERE id = (SELECT ... FOR UPDATE
+  SKIP LOCKED LIMIT 1) 领取任务，多个进程 / 节点之间不会重复领取。空闲时每 JOB_POLL_INTERVAL_SECONDS 轮询一次，
+  本进程提交的任务会立即唤醒消费者。
+- 执行期间每 JOB_LEASE_SECONDS / 3 续期 locked_until。进程崩溃后，过期的任务由定时任务 requeue_stale_jobs
+  放回队列；续期失败（任务已被回收）时放弃本次执行。
+- 处理函数抛出异常时按指数退避重试（JOB_RETRY_BASE_SECONDS * 2^(n-1)，不超过 JOB_RETRY_MAX_SECONDS，带随机抖动），
+  达到 max_attempts 或抛出 PermanentJobError 时标记为 failed。
+- 处理函数在任务所属租户的上下文中执行，通过 JobContext.progress 报告进度。
+
+新的任务类型用 @job_handler 注册（内置类型见 utils/job_handlers.py），payload 在提交时按注册的 pydantic 模型校验。
+"""
+
+import asyncio
+import logging
+import os
+import random
+import socket
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Optional
+
+from pydantic import BaseModel
+from sqlalchemy import Row, case, delete, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from console_server.core.config import settings
+from console_server.core.tenant import get_tenant_id, tenant_scope
+from console_server.db import database
+from console_server.env import SRC_LOG_LEVELS
+from console_server.model.job import (
+    JOB_CANCELLED,
+    JOB_FAILED,
+    JOB_FINISHED,
+    JOB_QUEUED,
+    JOB_RUNNING,
+    JOB_SUCCEEDED,
+    BackgroundJob,
+)
+from console_server.utils import metrics
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
+
+jobs = BackgroundJob.__table__
+
+
+class PermanentJobError(Exception):
+    """重试也不会成功的错误（如参数引用的角色不存在），任务直接标记为 failed"""
+
+
+class UnknownJobKind(ValueError):
+    pass
+
+
+class JobContext:
+    """传给处理函数的任务信息"""
+
+    def __init__(self, job_id: int, tenant_id: int, attempt: int, created_by: Optional[int]):
+        self.job_id = job_id
+        self.tenant_id = tenant_id
+        self.attempt = attempt  # 第几次执行，从 1 开始
+        self.created_by = created_by
+        self._reported_at = 0.0
+
+    async def progress(self, done: int, total: int, message: Optional[str] = None) -> None:
+        """报告进度，最多每 JOB_PROGRESS_INTERVAL_SECONDS 写一次数据库（完成时总会写入）"""
+        percent = 100 if total <= 0 else min(done * 100 // total, 100)
+        now = time.monotonic()
+        if percent < 100 and now - self._reported_at < settings.JOB_PROGRESS_INTERVAL_SECONDS:
+            return
+        self._reported_at = now
+        async with database.AsyncSessionLocal() as db:
+            await db.execute(
+                update(jobs)
+                .where(jobs.c.id == self.job_id, jobs.c.status == JOB_RUNNING)
+                .values(progress=percent, message=message)
+            )
+            await db.commit()
+
+
+JobHandler = Callable[[JobContext, Any], Awaitable[Optional[dict]]]
+
+
+@dataclass(frozen=True)
+class _Registration:
+    handler: JobHandler
+    payload_model: type[BaseModel]
+    # 提交该类型任务额外需要的权限 (path, permission)，与同步接口的要求一致
+    permission: Optional[tuple[str, str]] = None
+    # 为 True 时每个租户同时只保留一个等待中或执行中的任务，重复提交返回已有的任务
+    singleton: bool = False
+
+
+_handlers: dict[str, _Registration] = {}
+
+
+def job_handler(
+    kind: str,
+    payload_model: type[BaseModel],
+    *,
+    permission: Optional[tuple[str, str]] = None,
+    singleton: bool = False,
+):
+    """
+    注册任务类型：处理函数接收 (JobContext, payload 模型实例)，返回值（dict）保存为任务结果
+
+    permission 为提交该类型任务所需的 (path, permission)，由 POST /job 在 JOB_POST_API 之外校验。
+    singleton 为 True 时，当前租户已有等待中或执行中的同类任务时 submit 返回该任务，不再新增。
+    """
+
+    def decorator(handler: JobHandler) -> JobHandler:
+        _handlers[kind] = _Registration(handler, payload_model, permission, singleton)
+        return handler
+
+    return decorator
+
+
+def job_kinds() -> list[str]:
+    return sorted(_handlers)
+
+
+def job_permission(kind: str) -> Optional[tuple[str, str]]:
+    """提交该类型任务所需的 (path, permission)；类型未注册时抛出 UnknownJobKind"""
+    registration = _handlers.get(kind)
+    if registration is None:
+        raise UnknownJobKind(kind)
+    return registration.permission
+
+
+def validate_payload(kind: str, payload: dict) -> dict:
+    """按任务类型校验 payload，返回规范化后的 JSON；类型未注册时抛出 UnknownJobKind，校验失败时抛出 ValidationError"""
+    registration = _handlers.get(kind)
+    if registration is None:
+        raise UnknownJobKind(kind)
+    return registration.payload_model.model_validate(payload).model_dump(mode="json")
+
+
+async def submit(
+    kind: str,
+    payload: dict,
+    *,
+    created_by: Optional[int] = None,
+    max_attempts: Optional[int] = None,
+    run_at: Optional[datetime] = None,
+) -> BackgroundJob:
+    """在当前租户下提交任务（单独的事务，提交后唤醒本进程的消费者）"""
+    job = BackgroundJob(
+        kind=kind,
+        payload=validate_payload(kind, payload),
+        max_attempts=max_attempts or settings.JOB_MAX_ATTEMPTS,
+        created_by=created_by,
+    )
+    if run_at is not None:
+        job.run_at = run_at
+    async with database.AsyncSessionLocal() as db:
+        if _handlers[kind].singleton:
+            existing = await _find_unfinished(db, kind)
+            if existing is not None:
+                return existing
+        db.add(job)
+        await db.commit()
+        await db.refresh(job)
+    job_queue.notify()
+    return job
+
+
+async def _find_unfinished(db: AsyncSession, kind: str) -> Optional[BackgroundJob]:
+    """当前租户等待中或执行中的同类任务；先按 (租户, 类型) 加事务级咨询锁，并发提交时只有一个新增"""
+    if db.get_bind().dialect.name == "postgresql":
+        await db.execute(
+            select(func.pg_advisory_xact_lock(get_tenant_id(), func.hashtext(f"job:{kind}")))
+        )
+    result = await db.execute(
+        select(BackgroundJob)
+        .where(
+            BackgroundJob.kind == kind,
+            BackgroundJob.status.in_((JOB_QUEUED, JOB_RUNNING)),
+        )
+        .order_by(BackgroundJob.id)
+        .limit(1)
+    )
+    return result.scalar_one_or_none()
+
+
+def _backoff(attempt: int) -> float:
+    """第 attempt 次失败后的重试间隔：指数退避，随机取上限的 50%~100%"""
+    delay = min(
+        settings.JOB_RETRY_BASE_SECONDS * 2 ** (attempt - 1), settings.JOB_RETRY_MAX_SECONDS
+    )
+    return delay * random.uniform(0.5, 1.0)
+
+
+class JobQueue:
+    def __init__(self, concurrency: int, poll_interval: float, lease: float):
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.lease = lease
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._wakeup = asyncio.Event()
+        self._tasks: list[asyncio.Task] = []
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks) and all(not task.done() for task in self._tasks)
+
+    def notify(self) -> None:
+        """有新任务，唤醒空闲的消费者"""
+        self._wakeup.set()
+
+    async def start(self) -> None:
+        if self._tasks:
+            return
+        self._tasks = [
+            asyncio.create_task(self._consume(), name=f"job-consumer-{index}")
+            for index in range(self.concurrency)
+        ]
+
+    async def stop(self) -> None:
+        """停止消费，执行中的任务放回队列由其他进程重新执行"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _consume(self) -> None:
+        while True:
+            try:
+                job = await self._claim()
+                if job is not None:
+                    await self._execute(job)
+                    continue
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log.error(f"任务队列消费失败：{str(e)}", exc_info=True)
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+            except TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    async def _claim(self) -> Optional[Row]:
+        """领取一个到期的等待中任务"""
+        candidate = (
+            select(jobs.c.id)
+            .where(jobs.c.status == JOB_QUEUED, jobs.c.run_at <= func.now())
+            .order_by(jobs.c.run_at)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+        stmt = (
+            update(jobs)
+            .where(jobs.c.id == candidate)
+            .values(
+                status=JOB_RUNNING,
+                attempts=jobs.c.attempts + 1,
+                locked_by=self.worker_id,
+                locked_until=func.now() + timedelta(seconds=self.lease),
+                started_at=func.coalesce(jobs.c.started_at, func.now()),
+            )
+            .returning(
+                jobs.c.id,
+                jobs.c.tenant_id,
+                jobs.c.kind,
+                jobs.c.payload,
+                jobs.c.attempts,
+                jobs.c.max_attempts,
+                jobs.c.created_by,
+            )
+        )
+        async with database.AsyncSessionLocal() as db:
+            result = await db.execute(stmt.execution_options(all_tenants=True))
+            job = result.first()
+            await db.commit()
+        return job
+
+    async def _execute(self, job: Row) -> None:
+        start = time.perf_counter()
+        registration = _handlers.get(job.kind)
+        if registration is None:
+            await self._finish(job.id, status=JOB_FAILED, error=f"未知的任务类型 {job.kind}")
+            metrics.job_duration_seconds.observe(0, job.kind, "error")
+            return
+
+        ctx = JobContext(job.id, job.tenant_id, job.attempts, job.created_by)
+        with tenant_scope(job.tenant_id):
+            work = asyncio.create_task(
+                self._run_handler(registration, ctx, job.payload), name=f"job-{job.id}"
+            )
+            heartbeat = asyncio.create_task(
+                self._heartbeat(job.id), name=f"job-{job.id}-heartbeat"
+            )
+            try:
+                await asyncio.wait((work, heartbeat), return_when=asyncio.FIRST_COMPLETED)
+            except asyncio.CancelledError:
+                # 进程关闭：中止执行并放回队列（本次计入尝试次数）
+                work.cancel()
+                await self._finish(job.id, status=JOB_QUEUED, error="执行进程已关闭")
+                raise
+            finally:
+                heartbeat.cancel()
+
+        elapsed = time.perf_counter() - start
+        if not work.done():
+            work.cancel()
+            log.warning(f"任务 {job.id}（{job.kind}）已被回收，放弃本次执行")
+            metrics.job_duration_seconds.observe(elapsed, job.kind, "lost")
+            return
+
+        error = work.exception()
+        if error is None:
+            await self._finish(job.id, status=JOB_SUCCEEDED, result=work.result())
+            job_status = "ok"
+        elif job.attempts < job.max_attempts and not isinstance(error, PermanentJobError):
+            delay = _backoff(job.attempts)
+            log.warning(
+                f"任务 {job.id}（{job.kind}）第 {job.attempts} 次执行失败，{delay:.0f} 秒后重试：{str(error)}"
+            )
+            await self._finish(job.id, status=JOB_QUEUED, error=str(error), delay=delay)
+            job_status = "retry"
+        else:
+            log.error(f"任务 {job.id}（{job.kind}）执行失败：{str(error)}", exc_info=error)
+            await self._finish(job.id, status=JOB_FAILED, error=str(error))
+            job_status = "error"
+        metrics.job_duration_seconds.observe(elapsed, job.kind, job_status)
+
+    async def _run_handler(
+        self, registration: _Registration, ctx: JobContext, payload: dict
+    ) -> Optional[dict]:
+        return await registration.handler(ctx, registration.payload_model.model_validate(payload))
+
+    async def _heartbeat(self, job_id: int) -> None:
+        """定期续期，任务已不属于本进程时返回"""
+        while True:
+            await asyncio.sleep(self.lease / 3)
+            try:
+                async with database.AsyncSessionLocal() as db:
+                    result = await db.execute(
+                        update(jobs)
+                        .where(
+                            jobs.c.id == job_id,
+                            jobs.c.status == JOB_RUNNING,
+                            jobs.c.locked_by == self.worker_id,
+                        )
+                        .values(locked_until=func.now() + timedelta(seconds=self.lease))
+                    )
+                    await db.commit()
+            except Exception as e:
+                # 暂时失败，租约过期前还有两次机会
+                log.warning(f"任务 {job_id} 续期失败：{str(e)}")
+                continue
+            if result.rowcount == 0:  # type: ignore[attr-defined]
+                return
+
+    async def _finish(
+        self,
+        job_id: int,
+        *,
+        status: str,
+        result: Optional[dict] = None,
+        error: Optional[str] = None,
+        delay: float = 0,
+    ) -> None:
+        """结束本次执行：成功、失败，或放回队列（delay 秒后可再次领取）"""
+        values: dict[str, Any] = {"status": status, "locked_by": None, "locked_until": None}
+        if status == JOB_QUEUED:
+            values["run_at"] = func.now() + timedelta(seconds=delay)
+        else:
+            values["finished_at"] = func.now()
+        if status == JOB_SUCCEEDED:
+            values.update(progress=100, result=result, error=None)
+        if error is not None:
+            values["error"] = error
+        async with database.AsyncSessionLocal() as db:
+            await db.execute(
+                update(jobs)
+                .where(
+                    jobs.c.id == job_id,
+                    jobs.c.status == JOB_RUNNING,
+                    jobs.c.locked_by == self.worker_id,
+                )
+                .values(**values)
+            )
+            await db.commit()
+
+
+job_queue = JobQueue(
+    concurrency=settings.JOB_WORKER_CONCURRENCY,
+    poll_interval=settings.JOB_POLL_INTERVAL_SECONDS,
+    lease=settings.JOB_LEASE_SECONDS,
+)
+
+
+async def cancel(job_id: int) -> bool:
+    """取消当前租户中尚未开始执行（或等待重试）的任务"""
+    async with database.AsyncSessionLocal() as db:
+        result = await db.execute(
+            update(BackgroundJob)
+            .where(BackgroundJob.id == job_id, BackgroundJob.status == JOB_QUEUED)
+            .values(status=JOB_CANCELLED, finished_at=func.now())
+        )
+        await db.commit()
+    return result.rowcount > 0  # type: ignore[attr-defined]
+
+
+async def requeue_stale_jobs() -> int:
+    """回收执行者失联（租约过期）的任务：还有重试次数的放回队列，否则标记为 failed"""
+    exhausted = jobs.c.attempts >= jobs.c.max_attempts
+    async with database.AsyncSessionLocal() as db:
+        result = await db.execute(
+            update(jobs)
+            .where(jobs.c.status == JOB_RUNNING, jobs.c.locked_until < func.now())
+            .values(
+                status=case((exhausted, JOB_FAILED), else_=JOB_QUEUED),
+                finished_at=case((exhausted, func.now()), else_=None),
+                run_at=func.now(),
+                locked_by=None,
+                locked_until=None,
+                error="执行进程失联",
+            )
+            .execution_options(all_tenants=True)
+        )
+        await db.commit()
+    return result.rowcount  # type: ignore[attr-defined]
+
+
+async def purge_finished_jobs() -> int:
+    """删除结束超过 JOB_RETENTION_DAYS 天的任务"""
+    async with database.AsyncSessionLocal() as db:
+        result = await db.execute(
+            delete(jobs)
+            .where(
+                jobs.c.status.in_(JOB_FINISHED),
+                jobs.c.finished_at < func.now() - timedelta(days=settings.JOB_RETENTION_DAYS),
+            )
+            .execution_options(all_tenants=True)
+        )
+        await db.commit()
+    return result.rowcount  # type: ignore[attr-defined]
@@ -0,0 +1,152 @@
+"""
+定时任务选主
+
+每个 worker 都启动调度器，但只有持有 scheduler_leases 中未过期租约的进程真正执行任务（leader_only），
+避免多个 worker / 节点同时清理同一张表。
+
+租约通过一条 INSERT ... ON CONFLICT DO UPDATE 获取或续约：租约不存在、已过期或本来就属于自己时成功。
+所有进程每 SCHEDULER_LEASE_RENEW_SECONDS 尝试一次；持有者失联超过 SCHEDULER_LEASE_TTL_SECONDS 后，
+其他进程在下一次尝试时接管。正常关闭时主动释放租约，其他进程无需等待过期。
+
+本地判断是否为主时只相信上一次续约成功后 TTL - 续约间隔 的时长，进程卡顿导致续约不及时时自动放弃执行，
+不会与新的主节点同时执行任务。
+"""
+
+import asyncio
+import functools
+import logging
+import os
+import socket
+import time
+import uuid
+from datetime import timedelta
+from typing import Awaitable, Callable, Optional
+
+from sqlalchemy import case, delete, func, or_
+from sqlalchemy.dialects.postgresql import insert
+
+from console_server.core.config import settings
+from console_server.db import database
+from console_server.env import SRC_LOG_LEVELS
+from console_server.model.lease import SchedulerLease
+from console_server.utils import metrics
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
+
+
+class LeaderLease:
+    def __init__(self, name: str, ttl: float, renew_interval: float):
+        self.name = name
+        self.ttl = ttl
+        self.renew_interval = renew_interval
+        self.holder = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._valid_until = 0.0  # time.monotonic()，在此之前认为自己是主
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def is_leader(self) -> bool:
+        return time.monotonic() < self._valid_until
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="leader-lease")
+
+    async def stop(self) -> None:
+        """停止续约并释放租约（其他进程下一次尝试时即可接管）"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        if self._valid_until:
+            self._valid_until = 0.0
+            try:
+                await self._release()
+            except Exception as e:
+                log.warning(f"释放租约 {self.name} 失败：{str(e)}")
+
+    async def _acquire(self) -> bool:
+        """获取或续约，返回是否持有租约"""
+        lease = SchedulerLease.__table__
+        stmt = insert(lease).values(
+            name=self.name,
+            holder=self.holder,
+            expires_at=func.now() + timedelta(seconds=self.ttl),
+            acquired_at=func.now(),
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[lease.c.name],
+            set_={
+                "holder": stmt.excluded.holder,
+                "expires_at": stmt.excluded.expires_at,
+                # 续约时保留获得租约的时间
+                "acquired_at": case(
+                    (lease.c.holder == stmt.excluded.holder, lease.c.acquired_at),
+                    else_=stmt.excluded.acquired_at,
+                ),
+            },
+            where=or_(lease.c.holder == stmt.excluded.holder, lease.c.expires_at < func.now()),
+        ).returning(lease.c.holder)
+        async with database.AsyncSessionLocal() as db:
+            result = await db.execute(stmt)
+            await db.commit()
+            return result.scalar_one_or_none() is not None
+
+    async def _release(self) -> None:
+        lease = SchedulerLease.__table__
+        async with database.AsyncSessionLocal() as db:
+            await db.execute(
+                delete(lease).where(lease.c.name == self.name, lease.c.holder == self.holder)
+            )
+            await db.commit()
+
+    async def _run(self) -> None:
+        while True:
+            started = time.monotonic()
+            was_leader = self.is_leader
+            try:
+                acquired = await self._acquire()
+            except Exception as e:
+                # 数据库暂时不可用：本地有效期内仍视为主，过期后自然放弃
+                log.warning(f"续约租约 {self.name} 失败：{str(e)}")
+            else:
+                # 未获得时说明租约属于其他进程
+                self._valid_until = (
+                    started + self.ttl - self.renew_interval if acquired else 0.0
+                )
+            if self.is_leader != was_leader:
+                metrics.scheduler_leader_changes_total.inc()
+                log.info(
+                    f"{'成为' if self.is_leader else '不再是'}定时任务主节点（{self.holder}）"
+                )
+            await asyncio.sleep(self.renew_interval)
+
+
+leader_lease = LeaderLease(
+    "scheduler",
+    ttl=settings.SCHEDULER_LEASE_TTL_SECONDS,
+    renew_interval=settings.SCHEDULER_LEASE_RENEW_SECONDS,
+)
+
+metrics.scheduler_leader.set_function(lambda: {(): 1 if leader_lease.is_leader else 0})
+
+
+def leader_only(job: Callable[[], Awaitable[None]]) -> Callable[[], Awaitable[None]]:
+    """定时任务只在主节点执行，其他进程直接跳过（不记录耗时）"""
+
+    @functools.wraps(job)
+    async def wrapper() -> None:
+        if not leader_lease.is_leader:
+            log.debug(f"定时任务 {job.__name__}：本进程不是主节点，跳过")
+            return
+        await job()
+
+    return wrapper
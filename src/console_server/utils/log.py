@@ -0,0 +1,205 @@
+"""
+结构化日志
+
+所有日志（包括 utils/console.py 的 print_*）经 QueueHandler 放入队列，由后台线程的 QueueListener
+格式化并写出，请求路径上只做一次入队。默认输出 JSON 行（LOG_FORMAT=text 时为带颜色的文本，便于本地开发），
+带上请求 ID 以及通过 register_log_context 注册的上下文（租户、trace id）。
+
+高频事件（如认证失败）通过 extra={"sample_key": ...} 采样：每个 key 在每个窗口内最多输出
+LOG_SAMPLE_BURST 条，其余丢弃，丢弃的条数记在该 key 下一条输出的 suppressed 字段上。
+各来源的级别仍由 SRC_LOG_LEVELS 控制。
+"""
+
+import atexit
+import copy
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Callable, Optional
+
+from colorama import Back, Fore, Style
+
+# 当前请求 ID，由 RequestIdMiddleware 设置
+_request_id: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+# 附加到每条日志的上下文：字段名 -> 取值函数（在记录日志的线程/任务中调用）
+_context_getters: dict[str, Callable[[], Any]] = {}
+
+_listener: Optional[QueueListener] = None
+
+
+def get_request_id() -> Optional[str]:
+    return _request_id.get()
+
+
+def set_request_id(request_id: Optional[str]):
+    """设置当前请求 ID，返回值可用于 ContextVar.reset"""
+    return _request_id.set(request_id)
+
+
+def register_log_context(name: str, getter: Callable[[], Any]) -> None:
+    """注册附加到每条日志的上下文字段（值为 None 时不输出）"""
+    _context_getters[name] = getter
+
+
+class ContextFilter(logging.Filter):
+    """在记录日志的上下文中读取请求 ID 等字段（写出在后台线程中进行，届时已无法读取）"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = _request_id.get()
+        for name, getter in _context_getters.items():
+            setattr(record, name, getter())
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    def __init__(self, burst: int, window: float):
+        super().__init__()
+        self.burst = burst
+        self.window = window
+        # sample_key -> [窗口开始时间, 窗口内已输出条数, 已丢弃条数]
+        self._state: dict[str, list] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        key = getattr(record, "sample_key", None)
+        if key is None:
+            return True
+        now = time.monotonic()
+        with self._lock:
+            state = self._state.get(key)
+            if state is None or now - state[0] >= self.window:
+                suppressed = state[2] if state is not None else 0
+                state = self._state[key] = [now, 0, suppressed]
+            if state[1] >= self.burst:
+                state[2] += 1
+                return False
+            state[1] += 1
+            if state[2]:
+                record.suppressed = state[2]
+                state[2] = 0
+        return True
+
+
+class _QueueHandler(QueueHandler):
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """
+        只合并消息参数并格式化异常（参数和 traceback 可能在入队后被修改），
+        其余格式化留给后台线程
+        """
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+# 记录自带的属性，其余（extra 传入的）作为附加字段输出
+_RESERVED = set(vars(logging.makeLogRecord({}))) | {"message", "style", "sample_key"}
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        data: dict[str, Any] = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(
+                timespec="milliseconds"
+            ),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RESERVED and value is not None:
+                data[key] = value
+        if record.exc_text:
+            data["exc_info"] = record.exc_text
+        if record.stack_info:
+            data["stack_info"] = record.stack_info
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """与原 print_* 一致的彩色文本（NO_COLOR / RUNNING_IN_DOCKER 时不带颜色）"""
+
+    LEVELS = {
+        logging.DEBUG: ("DEBUG", Fore.WHITE),
+        logging.INFO: ("INFO", Fore.BLUE),
+        logging.WARNING: ("WARN", Fore.YELLOW),
+        logging.ERROR: ("ERROR", Fore.RED),
+        logging.CRITICAL: ("CRITICAL", Fore.RED),
+    }
+
+    def __init__(self):
+        super().__init__()
+        self.color = not (os.getenv("NO_COLOR") or os.getenv("RUNNING_IN_DOCKER"))
+
+    def format(self, record: logging.LogRecord) -> str:
+        style = getattr(record, "style", None)
+        if style == "success":
+            label, color = "OK", Fore.GREEN
+        else:
+            label, color = self.LEVELS.get(record.levelno, (record.levelname, ""))
+        text = f"[{label}] {record.getMessage()}"
+        if style == "highlight":
+            text, color = record.getMessage(), Back.CYAN + Fore.BLACK
+        if getattr(record, "suppressed", None):
+            text += f"（同类日志已省略 {record.suppressed} 条）"
+        if record.exc_text:
+            text += "\n" + record.exc_text
+        return f"{color}{text}{Style.RESET_ALL}" if self.color else text
+
+
+def setup_logging(
+    level: str,
+    fmt: str = "json",
+    sample_burst: int = 10,
+    sample_window: float = 60.0,
+) -> None:
+    """
+    将根日志器替换为队列处理器，并启动后台写出线程（重复调用时替换之前的配置）
+
+    uvicorn 的日志器也改为传递到根日志器，访问日志同样经过队列。
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    queue_handler = _QueueHandler(log_queue)
+    queue_handler.addFilter(ContextFilter())
+    queue_handler.addFilter(SamplingFilter(sample_burst, sample_window))
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(TextFormatter() if fmt == "text" else JsonFormatter())
+    _listener = QueueListener(log_queue, stream_handler)
+    _listener.start()
+
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+
+    for name in ("uvicorn", "uvicorn.error", "uvicorn.access"):
+        uvicorn_logger = logging.getLogger(name)
+        uvicorn_logger.handlers.clear()
+        uvicorn_logger.propagate = True
+
+
+def _flush() -> None:
+    """退出时写完队列中剩余的日志"""
+    if _listener is not None:
+        _listener.stop()
+
+
+atexit.register(_flush)
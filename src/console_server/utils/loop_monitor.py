@@ -0,0 +1,145 @@
+"""
+事件循环阻塞检测（LOOP_MONITOR_ENABLED 开启）
+
+事件循环上每 LOOP_MONITOR_INTERVAL_MS 执行一次心跳，实际执行时间与预期时间之差即循环延迟。
+看门狗线程发现心跳超过 LOOP_BLOCK_THRESHOLD_MS 未执行时，抓取事件循环线程当前的调用栈
+（此时正在执行的就是阻塞循环的代码，如 bcrypt、同步 IO），心跳恢复后把这次阻塞的时长记到该调用栈上。
+
+按调用栈聚合为 top blockers 报告（GET /api/v1/admin/loop-blockers），同时输出延迟直方图和阻塞计数指标。
+"""
+
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from typing import Optional
+
+from console_server.core.config import settings
+from console_server.env import SRC_LOG_LEVELS
+from console_server.utils import metrics
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
+
+Stack = tuple[str, ...]
+
+# 聚合的调用栈种类上限，超出后计入 OTHER，避免长期运行时无限增长
+MAX_STACKS = 200
+OTHER: Stack = ("<other>",)
+UNKNOWN: Stack = ("<unknown>",)
+
+
+def _summarize(frame, depth: int) -> Stack:
+    """取最内层 depth 帧，格式为 文件:行号 in 函数"""
+    frames = traceback.extract_stack(frame)[-depth:]
+    return tuple(f"{f.filename}:{f.lineno} in {f.name}" for f in reversed(frames))
+
+
+class LoopMonitor:
+    def __init__(self, interval: float, threshold: float, stack_depth: int = 12):
+        self.interval = interval
+        self.threshold = threshold
+        self.stack_depth = stack_depth
+        # 调用栈 -> [次数, 总阻塞秒数, 最长阻塞秒数]
+        self._blockers: dict[Stack, list] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._handle: Optional[asyncio.TimerHandle] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._expected = 0.0
+        self._last_beat = 0.0
+        # 看门狗线程写、循环线程读；单个属性赋值在 GIL 下是原子的
+        self._pending_stack: Optional[Stack] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._expected = self._last_beat + self.interval
+        self._handle = self._loop.call_later(self.interval, self._beat)
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._watch, name="loop-monitor", daemon=True
+        )
+        self._thread.start()
+        log.info(
+            f"事件循环监控已启动：间隔 {self.interval * 1000:.0f}ms，阈值 {self.threshold * 1000:.0f}ms"
+        )
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(timeout=1)
+        self._thread = None
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+
+    def _beat(self) -> None:
+        """心跳（事件循环线程）"""
+        now = time.monotonic()
+        lag = max(now - self._expected, 0.0)
+        metrics.event_loop_lag_seconds.observe(lag)
+        if lag >= self.threshold:
+            stack, self._pending_stack = self._pending_stack, None
+            self._record(stack or UNKNOWN, lag)
+        self._last_beat = now
+        self._expected = now + self.interval
+        assert self._loop is not None
+        self._handle = self._loop.call_later(self.interval, self._beat)
+
+    def _watch(self) -> None:
+        """看门狗（独立线程）：心跳超时时抓取循环线程的调用栈"""
+        while not self._stop.wait(self.interval / 2):
+            if self._pending_stack is not None:
+                continue
+            if time.monotonic() - self._last_beat < self.interval + self.threshold:
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id)  # type: ignore[arg-type]
+            if frame is not None:
+                self._pending_stack = _summarize(frame, self.stack_depth)
+
+    def _record(self, stack: Stack, seconds: float) -> None:
+        metrics.event_loop_blocked_total.inc()
+        metrics.event_loop_blocked_seconds_total.inc(amount=seconds)
+        if stack not in self._blockers and len(self._blockers) >= MAX_STACKS:
+            stack = OTHER
+        entry = self._blockers.get(stack)
+        if entry is None:
+            entry = self._blockers[stack] = [0, 0.0, 0.0]
+        entry[0] += 1
+        entry[1] += seconds
+        entry[2] = max(entry[2], seconds)
+        log.warning(f"事件循环被阻塞 {seconds * 1000:.1f}ms，位置：{stack[0]}")
+
+    def top_blockers(self, limit: int = 20) -> list[dict]:
+        """按总阻塞时长倒序返回调用栈"""
+        ranked = sorted(self._blockers.items(), key=lambda item: item[1][1], reverse=True)
+        return [
+            {
+                "stack": list(stack),
+                "count": count,
+                "total_ms": round(total * 1000, 3),
+                "max_ms": round(longest * 1000, 3),
+            }
+            for stack, (count, total, longest) in ranked[:limit]
+        ]
+
+    def reset(self) -> None:
+        self._blockers.clear()
+
+
+loop_monitor = LoopMonitor(
+    interval=settings.LOOP_MONITOR_INTERVAL_MS / 1000,
+    threshold=settings.LOOP_BLOCK_THRESHOLD_MS / 1000,
+)
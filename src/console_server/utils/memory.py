@@ -0,0 +1,162 @@
+"""
+内存分析
+
+tracemalloc 按需开启（开启后分配变慢，排查完应及时关闭），快照保存在进程内，最多保留
+MEMORY_SNAPSHOT_LIMIT 个。常驻内存和 GC 统计通过 /api/metrics 输出，不需要开启 tracemalloc。
+"""
+
+import gc
+import itertools
+import os
+import sys
+import tracemalloc
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+from console_server.core.config import settings
+from console_server.utils import metrics
+
+# 统计时忽略 tracemalloc 自身和导入机制的分配
+_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+GROUP_BY = ("lineno", "filename", "traceback")
+
+
+def rss_bytes() -> int:
+    """当前常驻内存（Linux 读取 /proc，其他平台退化为峰值常驻内存）"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        import resource
+
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # macOS 单位为字节，Linux 为 KB
+        return maxrss if sys.platform == "darwin" else maxrss * 1024
+
+
+class MemoryProfiler:
+    def __init__(self, max_snapshots: int):
+        self.max_snapshots = max_snapshots
+        self._ids = itertools.count(1)
+        # id -> (快照时间, 快照, 追踪到的字节数)
+        self._snapshots: OrderedDict[
+            int, tuple[datetime, tracemalloc.Snapshot, int]
+        ] = OrderedDict()
+
+    @property
+    def tracing(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def start(self, frames: int) -> None:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+
+    def stop(self) -> None:
+        """停止追踪并丢弃快照（快照与追踪数据一起占用大量内存）"""
+        tracemalloc.stop()
+        self._snapshots.clear()
+
+    def snapshot(self) -> dict:
+        """拍摄快照（需先 start），超出数量上限时丢弃最早的快照"""
+        if not tracemalloc.is_tracing():
+            raise RuntimeError("tracemalloc 未开启")
+        snapshot = tracemalloc.take_snapshot().filter_traces(_FILTERS)
+        snapshot_id = next(self._ids)
+        traced_bytes = sum(stat.size for stat in snapshot.statistics("filename"))
+        self._snapshots[snapshot_id] = (
+            datetime.now(timezone.utc),
+            snapshot,
+            traced_bytes,
+        )
+        while len(self._snapshots) > self.max_snapshots:
+            self._snapshots.popitem(last=False)
+        return self._describe(snapshot_id)
+
+    def _describe(self, snapshot_id: int) -> dict:
+        taken_at, _, traced_bytes = self._snapshots[snapshot_id]
+        return {"id": snapshot_id, "taken_at": taken_at, "traced_bytes": traced_bytes}
+
+    def snapshots(self) -> list[dict]:
+        return [self._describe(snapshot_id) for snapshot_id in self._snapshots]
+
+    def _get(self, snapshot_id: int) -> tracemalloc.Snapshot:
+        entry = self._snapshots.get(snapshot_id)
+        if entry is None:
+            raise KeyError(snapshot_id)
+        return entry[1]
+
+    def top(self, snapshot_id: int, group_by: str = "lineno", limit: int = 20) -> list[dict]:
+        """快照中占用最多的分配位置"""
+        stats = self._get(snapshot_id).statistics(group_by)
+        return [
+            {
+                "location": stat.traceback.format(),
+                "size_bytes": stat.size,
+                "count": stat.count,
+            }
+            for stat in stats[:limit]
+        ]
+
+    def diff(
+        self, base_id: int, target_id: int, group_by: str = "lineno", limit: int = 20
+    ) -> list[dict]:
+        """target 相对 base 增长最多的分配位置（按增长量绝对值排序）"""
+        stats = self._get(target_id).compare_to(self._get(base_id), group_by)
+        return [
+            {
+                "location": stat.traceback.format(),
+                "size_bytes": stat.size,
+                "count": stat.count,
+                "size_diff_bytes": stat.size_diff,
+                "count_diff": stat.count_diff,
+            }
+            for stat in stats[:limit]
+        ]
+
+    def status(self) -> dict:
+        traced, peak = tracemalloc.get_traced_memory()
+        return {
+            "rss_bytes": rss_bytes(),
+            "tracing": tracemalloc.is_tracing(),
+            "traceback_frames": tracemalloc.get_traceback_limit(),
+            "traced_bytes": traced,
+            "traced_peak_bytes": peak,
+            "tracemalloc_overhead_bytes": tracemalloc.get_tracemalloc_memory(),
+            "gc_counts": list(gc.get_count()),
+            "gc_stats": gc.get_stats(),
+            "snapshots": self.snapshots(),
+        }
+
+
+memory_profiler = MemoryProfiler(settings.MEMORY_SNAPSHOT_LIMIT)
+
+
+####################################
+# 指标（抓取时计算）
+####################################
+
+
+def _gc_stat(key: str) -> dict[tuple[str, ...], float]:
+    return {
+        (str(generation),): stats[key] for generation, stats in enumerate(gc.get_stats())
+    }
+
+
+metrics.process_resident_memory_bytes.set_function(lambda: {(): rss_bytes()})
+metrics.python_gc_count.set_function(
+    lambda: {(str(g),): count for g, count in enumerate(gc.get_count())}
+)
+metrics.python_gc_collections_total.set_function(lambda: _gc_stat("collections"))
+metrics.python_gc_objects_collected_total.set_function(lambda: _gc_stat("collected"))
+metrics.python_gc_objects_uncollectable_total.set_function(
+    lambda: _gc_stat("uncollectable")
+)
+metrics.python_tracemalloc_traced_bytes.set_function(
+    lambda: {(): tracemalloc.get_traced_memory()[0]}
+)
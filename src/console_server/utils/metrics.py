@@ -0,0 +1,293 @@
+"""
+进程内指标注册表，以 Prometheus 文本格式在 /api/metrics 输出
+
+只在事件循环线程中记录，不加锁；记录一次只是几次字典查找和整数加法（微秒级）。
+多 worker 部署时每个进程各自计数，由 Prometheus 按实例抓取后聚合。
+"""
+
+from bisect import bisect_left
+from typing import Callable, Iterable, Optional
+
+LabelValues = tuple[str, ...]
+
+# 默认延迟分桶（秒）
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Iterable[str], values: Iterable[str]) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def samples(self) -> list[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type}",
+            *self.samples(),
+        ]
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[LabelValues, float] = {}
+        self._function: Optional[Callable[[], dict[LabelValues, float]]] = None
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def get(self, *labels: str) -> float:
+        return self._values.get(labels, 0)
+
+    def set_function(self, function: Callable[[], dict[LabelValues, float]]) -> None:
+        """抓取时才读取的累计值（如 GC 回收次数），返回 {标签值元组: 数值}"""
+        self._function = function
+
+    def samples(self) -> list[str]:
+        values = self._function() if self._function is not None else self._values
+        return [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+            for labels, value in values.items()
+        ]
+
+
+class Gauge(_Metric):
+    type = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[LabelValues, float] = {}
+        self._function: Optional[Callable[[], dict[LabelValues, float]]] = None
+
+    def set(self, value: float, *labels: str) -> None:
+        self._values[labels] = value
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, *labels: str, amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) - amount
+
+    def set_function(self, function: Callable[[], dict[LabelValues, float]]) -> None:
+        """抓取时才计算的值（如连接池状态），返回 {标签值元组: 数值}"""
+        self._function = function
+
+    def samples(self) -> list[str]:
+        values = self._function() if self._function is not None else self._values
+        return [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+            for labels, value in values.items()
+        ]
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: Iterable[float] = LATENCY_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # 标签值 -> [各桶计数（非累积，最后一个是 +Inf）, 总和, 总数]
+        self._values: dict[LabelValues, list] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        entry = self._values.get(labels)
+        if entry is None:
+            entry = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        entry[0][bisect_left(self.buckets, value)] += 1
+        entry[1] += value
+        entry[2] += 1
+
+    def samples(self) -> list[str]:
+        lines = []
+        bounds = [*self.buckets, float("inf")]
+        for labels, (counts, total, count) in self._values.items():
+            cumulative = 0
+            for bound, bucket_count in zip(bounds, counts):
+                cumulative += bucket_count
+                label_str = _format_labels(
+                    (*self.labelnames, "le"), (*labels, _format_value(bound))
+                )
+                lines.append(f"{self.name}_bucket{label_str} {cumulative}")
+            label_str = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_str} {_format_value(total)}")
+            lines.append(f"{self.name}_count{label_str} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"指标 {metric.name} 已注册")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        return "\n".join(metric.render() for metric in self._metrics.values()) + "\n"
+
+
+REGISTRY = Registry()
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+####################################
+# 指标定义
+####################################
+
+http_requests_in_flight = REGISTRY.register(
+    Gauge("http_requests_in_flight", "正在处理的 HTTP 请求数")
+)
+http_request_duration_seconds = REGISTRY.register(
+    Histogram(
+        "http_request_duration_seconds",
+        "HTTP 请求耗时（秒），route 为路由模板",
+        ("method", "route", "status"),
+    )
+)
+auth_requests_total = REGISTRY.register(
+    Counter(
+        "auth_requests_total",
+        "AuthMiddleware 校验结果（ok/missing/invalid/expired/inactive/error）",
+        ("outcome",),
+    )
+)
+db_queries_per_request = REGISTRY.register(
+    Histogram(
+        "db_queries_per_request",
+        "每个请求执行的 SQL 语句数",
+        ("route",),
+        buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55),
+    )
+)
+db_query_budget_exceeded_total = REGISTRY.register(
+    Counter(
+        "db_query_budget_exceeded_total",
+        "SQL 语句数超过 query_budget 声明上限的请求数",
+        ("route",),
+    )
+)
+db_repeated_statements_total = REGISTRY.register(
+    Counter(
+        "db_repeated_statements_total",
+        "同一语句在一个请求中重复执行达到 N_PLUS_ONE_THRESHOLD 次的请求数（疑似 N+1）",
+        ("route",),
+    )
+)
+db_slow_queries_total = REGISTRY.register(
+    Counter("db_slow_queries_total", "耗时超过 SLOW_QUERY_MS 的 SQL 语句数")
+)
+db_pool_connections = REGISTRY.register(
+    Gauge(
+        "db_pool_connections",
+        "数据库连接池状态（size/checked_in/checked_out/overflow）",
+        ("state",),
+    )
+)
+event_loop_lag_seconds = REGISTRY.register(
+    Histogram(
+        "event_loop_lag_seconds",
+        "事件循环心跳延迟（秒），LOOP_MONITOR_ENABLED 开启时记录",
+        buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+    )
+)
+event_loop_blocked_total = REGISTRY.register(
+    Counter("event_loop_blocked_total", "事件循环阻塞超过 LOOP_BLOCK_THRESHOLD_MS 的次数")
+)
+event_loop_blocked_seconds_total = REGISTRY.register(
+    Counter("event_loop_blocked_seconds_total", "事件循环被阻塞的总时长（秒）")
+)
+process_resident_memory_bytes = REGISTRY.register(
+    Gauge("process_resident_memory_bytes", "进程常驻内存（字节）")
+)
+python_gc_count = REGISTRY.register(
+    Gauge("python_gc_count", "gc.get_count()：各代距上次回收的计数", ("generation",))
+)
+python_gc_collections_total = REGISTRY.register(
+    Counter("python_gc_collections_total", "各代 GC 回收次数", ("generation",))
+)
+python_gc_objects_collected_total = REGISTRY.register(
+    Counter("python_gc_objects_collected_total", "各代 GC 回收的对象数", ("generation",))
+)
+python_gc_objects_uncollectable_total = REGISTRY.register(
+    Counter(
+        "python_gc_objects_uncollectable_total", "各代 GC 发现的不可回收对象数", ("generation",)
+    )
+)
+python_tracemalloc_traced_bytes = REGISTRY.register(
+    Gauge("python_tracemalloc_traced_bytes", "tracemalloc 追踪到的内存（未开启时为 0）")
+)
+startup_phase_seconds = REGISTRY.register(
+    Gauge(
+        "startup_phase_seconds",
+        "启动各阶段耗时（秒）：import / ready 为从开始导入起的总耗时，其余为阶段本身的耗时",
+        ("phase",),
+    )
+)
+scheduler_leader = REGISTRY.register(
+    Gauge("scheduler_leader", "本进程是否持有定时任务租约（1 是，0 否）")
+)
+scheduler_leader_changes_total = REGISTRY.register(
+    Counter("scheduler_leader_changes_total", "本进程成为或不再是定时任务主节点的次数")
+)
+audit_queue_depth = REGISTRY.register(
+    Gauge("audit_queue_depth", "等待写入数据库的审计事件数（含写入失败待重试的）")
+)
+audit_events_dropped_total = REGISTRY.register(
+    Counter(
+        "audit_events_dropped_total",
+        "被丢弃的审计事件数：full 为队列已满，shutdown 为关闭时未能写入",
+        ("reason",),
+    )
+)
+audit_flush_seconds = REGISTRY.register(
+    Histogram("audit_flush_seconds", "审计事件批量写入耗时（秒）", ("status",))
+)
+user_activity_buffered = REGISTRY.register(
+    Gauge("user_activity_buffered", "等待写入 last_login_at / last_seen_at 的用户数")
+)
+user_activity_flush_seconds = REGISTRY.register(
+    Histogram("user_activity_flush_seconds", "用户活跃时间批量写入耗时（秒）", ("status",))
+)
+websocket_connections = REGISTRY.register(
+    Gauge("websocket_connections", "本进程的 Socket.IO 连接数")
+)
+job_duration_seconds = REGISTRY.register(
+    Histogram(
+        "job_duration_seconds",
+        "定时任务、后台任务耗时（秒），job 为任务名或后台任务类型",
+        ("job", "status"),
+        buckets=(0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0),
+    )
+)
@@ -0,0 +1,85 @@
+"""
+按需采样分析器
+
+在独立线程中按固定间隔读取所有线程（包括事件循环线程）的调用栈并计数，输出 collapsed stacks
+（每行 "帧1;帧2;...;帧N 次数"，可直接交给 flamegraph.pl / speedscope 生成火焰图）。
+只在调用 profile() 期间运行，未运行时没有任何开销。
+"""
+
+import sys
+import threading
+import time
+from typing import Optional
+
+# 单个调用栈最多保留的帧数
+MAX_DEPTH = 128
+
+
+class ProfilerBusy(RuntimeError):
+    """同一时刻只允许一个采样任务"""
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_qualname} ({code.co_filename}:{code.co_firstlineno})"
+
+
+def _collapse(frame, thread_label: str) -> str:
+    labels = []
+    while frame is not None and len(labels) < MAX_DEPTH:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    labels.append(thread_label)
+    return ";".join(reversed(labels))
+
+
+class SamplingProfiler:
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._lock.locked()
+
+    def profile(
+        self, seconds: float, interval: float, loop_thread_id: Optional[int] = None
+    ) -> dict[str, int]:
+        """
+        采样 seconds 秒（阻塞调用，需在线程池中执行），返回 {collapsed stack: 采样次数}
+
+        loop_thread_id 对应的线程标记为 event-loop，其余线程使用线程名。
+        """
+        if not self._lock.acquire(blocking=False):
+            raise ProfilerBusy("已有采样任务在运行")
+        try:
+            own_id = threading.get_ident()
+            counts: dict[str, int] = {}
+            deadline = time.monotonic() + seconds
+            while time.monotonic() < deadline:
+                names = {t.ident: t.name for t in threading.enumerate()}
+                for thread_id, frame in sys._current_frames().items():
+                    if thread_id == own_id:
+                        continue
+                    label = (
+                        "event-loop"
+                        if thread_id == loop_thread_id
+                        else names.get(thread_id, f"thread-{thread_id}")
+                    )
+                    stack = _collapse(frame, label)
+                    counts[stack] = counts.get(stack, 0) + 1
+                time.sleep(interval)
+            return counts
+        finally:
+            self._lock.release()
+
+
+def render_collapsed(counts: dict[str, int]) -> str:
+    """按次数倒序输出 collapsed stacks 文本"""
+    lines = [
+        f"{stack} {count}"
+        for stack, count in sorted(counts.items(), key=lambda item: item[1], reverse=True)
+    ]
+    return "\n".join(lines) + "\n"
+
+
+profiler = SamplingProfiler()
@@ -0,0 +1,615 @@
+from datetime import datetime, timezone
+from typing import Callable, Iterable, Optional
+
+from sqlalchemy import (
+    and_,
+    case,
+    delete,
+    event,
+    except_,
+    func,
+    literal,
+    or_,
+    select,
+    tuple_,
+    update,
+)
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from console_server.core.tenant import get_tenant_id
+from console_server.model.rbac import (
+    Role,
+    role_closure,
+    role_inheritance,
+    role_permissions,
+    user_effective_permissions,
+    user_roles,
+)
+
+
+####################################
+# 权限变更通知
+####################################
+
+# 回调参数为租户 ID 和该租户内受影响的用户 ID 集合，None 表示该租户的全部用户
+PermissionsChangedListener = Callable[[int, Optional[set[int]]], None]
+
+_listeners: list[PermissionsChangedListener] = []
+
+_CHANGED_KEY = "rbac_changed_user_ids"
+
+
+def on_permissions_changed(listener: PermissionsChangedListener):
+    """注册有效权限变更回调，在事务提交后调用（用于缓存失效等）"""
+    _listeners.append(listener)
+    return listener
+
+
+def _mark_changed(db: AsyncSession, user_ids: Optional[Iterable[int]]) -> None:
+    """记录本事务中当前租户有效权限发生变化的用户，提交后统一通知"""
+    changed = db.sync_session.info.setdefault(_CHANGED_KEY, {})
+    tenant_id = get_tenant_id()
+    if user_ids is None:
+        changed[tenant_id] = None
+    elif changed.get(tenant_id, set()) is not None:
+        changed.setdefault(tenant_id, set()).update(user_ids)
+
+
+@event.listens_for(Session, "after_commit")
+def _notify_after_commit(session: Session) -> None:
+    if _CHANGED_KEY not in session.info:
+        return
+    for tenant_id, user_ids in session.info.pop(_CHANGED_KEY).items():
+        if user_ids is not None and not user_ids:
+            continue
+        for listener in _listeners:
+            listener(tenant_id, user_ids)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_after_rollback(session: Session) -> None:
+    session.info.pop(_CHANGED_KEY, None)
+
+
+####################################
+# 有效权限物化表维护
+#
+# 以下函数都只作用于当前租户（core.tenant.get_tenant_id），所有语句都带 tenant_id 条件，
+# 关联表之间按 (tenant_id, id) 连接，查询只落在一个分区上。
+####################################
+
+
+def _live_assignment():
+    """未过期的角色分配"""
+    return or_(
+        user_roles.c.expires_at.is_(None),
+        user_roles.c.expires_at > func.now(),
+    )
+
+
+def _granted_pairs(tenant_id: int):
+    """
+    由角色推导出的 (user_id, permission_id)
+
+    user_roles ⋈ role_closure ⋈ role_permissions：用户持有的未过期角色及其继承的所有祖先角色的权限
+    """
+    return (
+        select(user_roles.c.user_id, role_permissions.c.permission_id)
+        .select_from(
+            user_roles.join(
+                role_closure,
+                and_(
+                    role_closure.c.tenant_id == user_roles.c.tenant_id,
+                    role_closure.c.role_id == user_roles.c.role_id,
+                ),
+            ).join(
+                role_permissions,
+                and_(
+                    role_permissions.c.tenant_id == role_closure.c.tenant_id,
+                    role_permissions.c.role_id == role_closure.c.ancestor_id,
+                ),
+            )
+        )
+        .where(user_roles.c.tenant_id == tenant_id, _live_assignment())
+    )
+
+
+def _expiry_expr():
+    """同一权限可能由多个角色分配支撑：有永久分配则永久，否则取最晚的过期时间"""
+    return case(
+        (func.bool_or(user_roles.c.expires_at.is_(None)), None),
+        else_=func.max(user_roles.c.expires_at),
+    )
+
+
+def _granted_rows(tenant_id: int):
+    """(tenant_id, user_id, permission_id, expires_at)，有效权限表的期望内容"""
+    return (
+        _granted_pairs(tenant_id)
+        .with_only_columns(
+            user_roles.c.tenant_id,
+            user_roles.c.user_id,
+            role_permissions.c.permission_id,
+            _expiry_expr().label("expires_at"),
+        )
+        .group_by(
+            user_roles.c.tenant_id,
+            user_roles.c.user_id,
+            role_permissions.c.permission_id,
+        )
+    )
+
+
+_UEP_COLUMNS = ["tenant_id", "user_id", "permission_id", "expires_at"]
+_CLOSURE_COLUMNS = ["tenant_id", "role_id", "ancestor_id", "depth"]
+
+
+async def grant_effective_permissions(
+    db: AsyncSession,
+    *,
+    user_ids: Optional[Iterable[int]] = None,
+    role_ids: Optional[Iterable[int]] = None,
+    source_role_ids: Optional[Iterable[int]] = None,
+    permission_ids: Optional[Iterable[int]] = None,
+) -> None:
+    """
+    将新增的角色/权限/继承关系写入有效权限表
+
+    在 user_roles / role_permissions / role_closure 插入或更新行之后调用，过滤条件用于限定本次变更影响的范围。
+    受影响的 (user_id, permission_id) 会按全部来源重新计算过期时间。
+
+    Args:
+        db: 数据库会话
+        user_ids: 只处理这些用户
+        role_ids: 只处理用户持有的这些角色
+        source_role_ids: 只处理直接授予权限的这些角色（继承它们的角色同样生效）
+        permission_ids: 只处理这些权限
+    """
+    tenant_id = get_tenant_id()
+    touched = _granted_pairs(tenant_id)
+    if user_ids is not None:
+        touched = touched.where(user_roles.c.user_id.in_(list(user_ids)))
+    if role_ids is not None:
+        touched = touched.where(user_roles.c.role_id.in_(list(role_ids)))
+    if source_role_ids is not None:
+        touched = touched.where(role_permissions.c.role_id.in_(list(source_role_ids)))
+    if permission_ids is not None:
+        touched = touched.where(
+            role_permissions.c.permission_id.in_(list(permission_ids))
+        )
+
+    uep = user_effective_permissions
+    rows = _granted_rows(tenant_id).where(
+        tuple_(user_roles.c.user_id, role_permissions.c.permission_id).in_(touched)
+    )
+    stmt = insert(uep).from_select(_UEP_COLUMNS, rows)
+    result = await db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[uep.c.tenant_id, uep.c.user_id, uep.c.permission_id],
+            set_={"expires_at": stmt.excluded.expires_at},
+            where=uep.c.expires_at.is_distinct_from(stmt.excluded.expires_at),
+        ).returning(uep.c.user_id)
+    )
+    _mark_changed(db, result.scalars().all())
+
+
+async def revoke_stale_effective_permissions(
+    db: AsyncSession,
+    *,
+    user_ids: Optional[Iterable[int]] = None,
+    role_ids: Optional[Iterable[int]] = None,
+    permission_ids: Optional[Iterable[int]] = None,
+) -> None:
+    """
+    删除不再有任何角色支撑的有效权限行，并重新计算剩余行的过期时间
+
+    在 user_roles / role_permissions / role_closure / roles 删除行之后调用（需先 flush）。
+    一个权限可能由多个角色同时授予，因此只删除已经没有来源的行。
+
+    Args:
+        db: 数据库会话
+        user_ids: 只检查这些用户
+        role_ids: 只检查当前持有这些角色的用户
+        permission_ids: 只检查这些权限
+    """
+    uep = user_effective_permissions
+    tenant_id = get_tenant_id()
+    scope = [uep.c.tenant_id == tenant_id]
+    if user_ids is not None:
+        scope.append(uep.c.user_id.in_(list(user_ids)))
+    if role_ids is not None:
+        scope.append(
+            uep.c.user_id.in_(
+                select(user_roles.c.user_id).where(
+                    user_roles.c.tenant_id == tenant_id,
+                    user_roles.c.role_id.in_(list(role_ids)),
+                )
+            )
+        )
+    if permission_ids is not None:
+        scope.append(uep.c.permission_id.in_(list(permission_ids)))
+
+    sources = _granted_pairs(tenant_id).where(
+        user_roles.c.user_id == uep.c.user_id,
+        role_permissions.c.permission_id == uep.c.permission_id,
+    )
+    deleted = await db.execute(
+        delete(uep)
+        .where(~sources.exists(), *scope)
+        .returning(uep.c.user_id)
+    )
+    changed = set(deleted.scalars().all())
+
+    # 剩余行的过期时间可能变短（例如移除了永久分配，只剩临时分配）
+    expiry = sources.with_only_columns(_expiry_expr()).scalar_subquery()
+    updated = await db.execute(
+        update(uep)
+        .where(uep.c.expires_at.is_distinct_from(expiry), *scope)
+        .values(expires_at=expiry)
+        .returning(uep.c.user_id)
+    )
+    changed.update(updated.scalars().all())
+    _mark_changed(db, changed)
+
+
+async def assign_user_roles(
+    db: AsyncSession,
+    user_id: int,
+    role_ids: Iterable[int],
+    expires_at: Optional[datetime] = None,
+) -> None:
+    """
+    为用户分配角色并同步有效权限
+
+    已分配的角色会更新过期时间（可用于延长或缩短临时授权）。
+
+    Args:
+        db: 数据库会话
+        user_id: 用户 ID
+        role_ids: 角色 ID 列表
+        expires_at: 过期时间，None 表示永久有效
+    """
+    await assign_roles_to_users(db, [user_id], role_ids, expires_at)
+
+
+async def assign_roles_to_users(
+    db: AsyncSession,
+    user_ids: Iterable[int],
+    role_ids: Iterable[int],
+    expires_at: Optional[datetime] = None,
+) -> None:
+    """为多个用户分配同一组角色并同步有效权限（批量任务按批调用，语义同 assign_user_roles）"""
+    uids = list(user_ids)
+    ids = list(role_ids)
+    if not uids or not ids:
+        return
+    tenant_id = get_tenant_id()
+    stmt = insert(user_roles).values(
+        [
+            {
+                "tenant_id": tenant_id,
+                "user_id": uid,
+                "role_id": rid,
+                "expires_at": expires_at,
+            }
+            for uid in uids
+            for rid in ids
+        ]
+    )
+    await db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[
+                user_roles.c.tenant_id,
+                user_roles.c.user_id,
+                user_roles.c.role_id,
+            ],
+            set_={"expires_at": stmt.excluded.expires_at},
+        )
+    )
+    # 缩短过期时间或从永久改为临时时，旧的过期时间需要重算
+    await grant_effective_permissions(db, user_ids=uids, role_ids=ids)
+    await revoke_stale_effective_permissions(db, user_ids=uids)
+
+
+async def expire_role_assignments(
+    db: AsyncSession, assignments: Iterable[tuple[int, int]]
+) -> set[int]:
+    """
+    移除已到期的角色分配并同步有效权限
+
+    只删除当前确实已过期的行，期间被重新分配（延长）的角色不受影响。
+    分配属于当前租户，跨租户的调用方需先用 tenant_scope 切换。
+
+    Args:
+        db: 数据库会话
+        assignments: (user_id, role_id) 列表
+
+    Returns:
+        受影响的用户 ID
+    """
+    pairs = list(assignments)
+    if not pairs:
+        return set()
+    result = await db.execute(
+        delete(user_roles)
+        .where(
+            user_roles.c.tenant_id == get_tenant_id(),
+            tuple_(user_roles.c.user_id, user_roles.c.role_id).in_(pairs),
+            user_roles.c.expires_at <= datetime.now(timezone.utc),
+        )
+        .returning(user_roles.c.user_id)
+    )
+    user_ids = set(result.scalars().all())
+    if user_ids:
+        await revoke_stale_effective_permissions(db, user_ids=user_ids)
+    await db.commit()
+    return user_ids
+
+
+async def get_role_descendant_ids(db: AsyncSession, role_id: int) -> list[int]:
+    """获取直接或间接继承该角色的所有角色 ID（不含自身）"""
+    result = await db.execute(
+        select(role_closure.c.role_id).where(
+            role_closure.c.tenant_id == get_tenant_id(),
+            role_closure.c.ancestor_id == role_id,
+            role_closure.c.depth > 0,
+        )
+    )
+    return list(result.scalars().all())
+
+
+async def get_role_ancestor_ids(db: AsyncSession, role_id: int) -> list[int]:
+    """获取该角色直接或间接继承的所有角色 ID（不含自身）"""
+    result = await db.execute(
+        select(role_closure.c.ancestor_id).where(
+            role_closure.c.tenant_id == get_tenant_id(),
+            role_closure.c.role_id == role_id,
+            role_closure.c.depth > 0,
+        )
+    )
+    return list(result.scalars().all())
+
+
+async def get_role_holder_ids(db: AsyncSession, role_ids: Iterable[int]) -> list[int]:
+    """获取持有这些角色的用户 ID"""
+    result = await db.execute(
+        select(user_roles.c.user_id)
+        .where(
+            user_roles.c.tenant_id == get_tenant_id(),
+            user_roles.c.role_id.in_(list(role_ids)),
+        )
+        .distinct()
+    )
+    return list(result.scalars().all())
+
+
+async def would_create_cycle(db: AsyncSession, role_id: int, parent_id: int) -> bool:
+    """
+    检查让 role_id 继承 parent_id 是否会形成环
+
+    如果 parent_id 已经（直接或间接）继承了 role_id，或两者相同，则会形成环。
+    """
+    if role_id == parent_id:
+        return True
+    result = await db.execute(
+        select(literal(1)).where(
+            role_closure.c.tenant_id == get_tenant_id(),
+            role_closure.c.role_id == parent_id,
+            role_closure.c.ancestor_id == role_id,
+        )
+    )
+    return result.scalar_one_or_none() is not None
+
+
+async def ensure_role_closure(db: AsyncSession, role_ids: Iterable[int]) -> None:
+    """为角色写入闭包表中的自身行（depth=0），新建角色后调用"""
+    tenant_id = get_tenant_id()
+    rows = [
+        {"tenant_id": tenant_id, "role_id": rid, "ancestor_id": rid, "depth": 0}
+        for rid in role_ids
+    ]
+    if rows:
+        await db.execute(insert(role_closure).values(rows).on_conflict_do_nothing())
+
+
+async def add_role_parent(db: AsyncSession, role_id: int, parent_id: int) -> None:
+    """
+    让 role_id 继承 parent_id，并增量更新闭包表和有效权限表
+
+    调用方需先通过 would_create_cycle 检查环。
+    """
+    tenant_id = get_tenant_id()
+    result = await db.execute(
+        insert(role_inheritance)
+        .values(tenant_id=tenant_id, role_id=role_id, parent_id=parent_id)
+        .on_conflict_do_nothing()
+        .returning(role_inheritance.c.role_id)
+    )
+    if result.scalar_one_or_none() is None:
+        # 继承关系已存在
+        return
+
+    # 新增闭包行：(role_id 的所有子孙, parent_id 的所有祖先)
+    descendant = role_closure.alias("descendant")
+    ancestor = role_closure.alias("ancestor")
+    new_pairs = select(
+        descendant.c.tenant_id,
+        descendant.c.role_id,
+        ancestor.c.ancestor_id,
+        descendant.c.depth + ancestor.c.depth + 1,
+    ).where(
+        descendant.c.tenant_id == tenant_id,
+        ancestor.c.tenant_id == tenant_id,
+        descendant.c.ancestor_id == role_id,
+        ancestor.c.role_id == parent_id,
+    )
+    stmt = insert(role_closure).from_select(_CLOSURE_COLUMNS, new_pairs)
+    await db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[
+                role_closure.c.tenant_id,
+                role_closure.c.role_id,
+                role_closure.c.ancestor_id,
+            ],
+            set_={"depth": func.least(role_closure.c.depth, stmt.excluded.depth)},
+        )
+    )
+
+    # 持有 role_id 及其子孙角色的用户获得 parent_id 一脉的权限
+    affected_role_ids = [role_id, *await get_role_descendant_ids(db, role_id)]
+    await grant_effective_permissions(db, role_ids=affected_role_ids)
+
+
+async def remove_role_parent(db: AsyncSession, role_id: int, parent_id: int) -> None:
+    """移除 role_id 对 parent_id 的继承，并增量更新闭包表和有效权限表"""
+    await db.execute(
+        delete(role_inheritance).where(
+            role_inheritance.c.tenant_id == get_tenant_id(),
+            role_inheritance.c.role_id == role_id,
+            role_inheritance.c.parent_id == parent_id,
+        )
+    )
+    # 其他路径可能仍然可达，因此对受影响的子孙角色重新计算闭包
+    affected_role_ids = [role_id, *await get_role_descendant_ids(db, role_id)]
+    await rebuild_role_closure(db, role_ids=affected_role_ids)
+    await revoke_stale_effective_permissions(db, role_ids=affected_role_ids)
+
+
+def _closure_walk(tenant_id: int, role_ids: Optional[list[int]] = None):
+    """沿 role_inheritance 递归展开的 (tenant_id, role_id, ancestor_id, depth)，不含自身行"""
+    seed = select(
+        role_inheritance.c.tenant_id,
+        role_inheritance.c.role_id,
+        role_inheritance.c.parent_id.label("ancestor_id"),
+        literal(1).label("depth"),
+    ).where(role_inheritance.c.tenant_id == tenant_id)
+    if role_ids is not None:
+        seed = seed.where(role_inheritance.c.role_id.in_(role_ids))
+    walk = seed.cte("walk", recursive=True)
+    walk = walk.union_all(
+        select(
+            walk.c.tenant_id,
+            walk.c.role_id,
+            role_inheritance.c.parent_id,
+            walk.c.depth + 1,
+        ).select_from(
+            walk.join(
+                role_inheritance,
+                and_(
+                    role_inheritance.c.tenant_id == walk.c.tenant_id,
+                    role_inheritance.c.role_id == walk.c.ancestor_id,
+                ),
+            )
+        )
+        # 常量条件让递归部分同样只扫描一个分区
+        .where(role_inheritance.c.tenant_id == tenant_id)
+    )
+    return select(
+        walk.c.tenant_id,
+        walk.c.role_id,
+        walk.c.ancestor_id,
+        func.min(walk.c.depth).label("depth"),
+    ).group_by(walk.c.tenant_id, walk.c.role_id, walk.c.ancestor_id)
+
+
+def _closure_self_rows(tenant_id: int):
+    """闭包表中 depth=0 的自身行"""
+    return select(Role.tenant_id, Role.id, Role.id, literal(0)).where(
+        Role.tenant_id == tenant_id
+    )
+
+
+async def rebuild_role_closure(
+    db: AsyncSession, role_ids: Optional[Iterable[int]] = None
+) -> None:
+    """
+    重新计算角色的闭包行
+
+    Args:
+        db: 数据库会话
+        role_ids: 只重算这些角色的祖先，None 表示全量重建
+    """
+    ids = list(role_ids) if role_ids is not None else None
+    tenant_id = get_tenant_id()
+    stmt = delete(role_closure).where(
+        role_closure.c.tenant_id == tenant_id, role_closure.c.depth > 0
+    )
+    if ids is not None:
+        if not ids:
+            return
+        stmt = stmt.where(role_closure.c.role_id.in_(ids))
+    await db.execute(stmt)
+    await db.execute(
+        insert(role_closure).from_select(
+            _CLOSURE_COLUMNS, _closure_walk(tenant_id, ids)
+        )
+    )
+    if ids is None:
+        await db.execute(
+            insert(role_closure)
+            .from_select(_CLOSURE_COLUMNS, _closure_self_rows(tenant_id))
+            .on_conflict_do_nothing()
+        )
+
+
+async def check_effective_permissions(db: AsyncSession) -> dict[str, int]:
+    """
+    一致性检查：对比当前租户的物化表与实时计算结果
+
+    Returns:
+        {
+            "missing": 有效权限表缺少的行数,
+            "extra": 有效权限表多出的行数,
+            "closure_missing": 闭包表缺少的行数,
+            "closure_extra": 闭包表多出的行数,
+        }
+    """
+    uep = user_effective_permissions
+    tenant_id = get_tenant_id()
+    expected = _granted_rows(tenant_id)
+    # 已过期但尚未清理的行在读取时会被忽略，不计入差异
+    actual = select(*(uep.c[name] for name in _UEP_COLUMNS)).where(
+        uep.c.tenant_id == tenant_id,
+        or_(uep.c.expires_at.is_(None), uep.c.expires_at > func.now()),
+    )
+
+    expected_closure = _closure_walk(tenant_id).union_all(
+        _closure_self_rows(tenant_id)
+    )
+    actual_closure = select(*(role_closure.c[name] for name in _CLOSURE_COLUMNS)).where(
+        role_closure.c.tenant_id == tenant_id
+    )
+
+    async def _count_except(a, b) -> int:
+        return (
+            await db.scalar(select(func.count()).select_from(except_(a, b).subquery()))
+        ) or 0
+
+    return {
+        "missing": await _count_except(expected, actual),
+        "extra": await _count_except(actual, expected),
+        "closure_missing": await _count_except(expected_closure, actual_closure),
+        "closure_extra": await _count_except(actual_closure, expected_closure),
+    }
+
+
+async def rebuild_effective_permissions(db: AsyncSession) -> int:
+    """
+    全量重建当前租户的角色闭包表和有效权限表
+
+    Returns:
+        重建后有效权限表的行数
+    """
+    uep = user_effective_permissions
+    tenant_id = get_tenant_id()
+    await rebuild_role_closure(db)
+    await db.execute(delete(uep).where(uep.c.tenant_id == tenant_id))
+    await db.execute(insert(uep).from_select(_UEP_COLUMNS, _granted_rows(tenant_id)))
+    _mark_changed(db, None)
+    await db.commit()
+    total = await db.scalar(
+        select(func.count()).select_from(uep).where(uep.c.tenant_id == tenant_id)
+    )
+    return total or 0
@@ -0,0 +1,74 @@
+"""
+启动耗时
+
+main.py 导入本模块时开始计时，记录导入、lifespan 以及延后启动的子系统各阶段的耗时，通过
+startup_phase_seconds 指标输出。逐模块的导入耗时使用 python -m console_server.cli.startup 查看。
+
+预热钩子（register_warmup）在每个 worker 的 lifespan 启动阶段、开始接收请求之前依次执行，
+失败只记录警告，不影响启动。
+
+只依赖标准库、env 和 utils/metrics，需在 main.py 中最先导入。
+"""
+
+import logging
+import time
+from contextlib import contextmanager
+from typing import Awaitable, Callable, Iterator
+
+from console_server.env import SRC_LOG_LEVELS
+from console_server.utils import metrics
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
+
+WarmupHook = Callable[[], Awaitable[None]]
+
+
+class StartupTimer:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases: dict[str, float] = {}
+
+    def mark(self, name: str) -> float:
+        """记录从开始计时到现在的总耗时（如 import、ready）"""
+        elapsed = self.phases[name] = time.perf_counter() - self.started
+        return elapsed
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """记录 with 块本身的耗时"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = time.perf_counter() - start
+
+    def summary(self) -> str:
+        return "，".join(
+            f"{name} {seconds * 1000:.0f}ms" for name, seconds in self.phases.items()
+        )
+
+
+startup_timer = StartupTimer()
+
+metrics.startup_phase_seconds.set_function(
+    lambda: {(name,): seconds for name, seconds in startup_timer.phases.items()}
+)
+
+
+# 预热钩子：名称 -> 钩子，按注册顺序执行
+_warmup_hooks: dict[str, WarmupHook] = {}
+
+
+def register_warmup(name: str, hook: WarmupHook) -> None:
+    _warmup_hooks[name] = hook
+
+
+async def run_warmup() -> None:
+    """依次执行预热钩子，每个钩子的耗时记为 warmup.<名称> 阶段"""
+    for name, hook in _warmup_hooks.items():
+        try:
+            with startup_timer.phase(f"warmup.{name}"):
+                await hook()
+        except Exception as e:
+            log.warning(f"预热 {name} 失败：{str(e)}")
@@ -0,0 +1,391 @@
+"""
+进程内请求链路追踪
+
+按 TRACE_SAMPLE_RATE 在请求入口做头部采样（请求头 traceparent 带 sampled 标志时沿用其 trace id），
+未采样的请求只多一次 ContextVar 读取。当前 span 通过 ContextVar 传递，子任务自动继承；
+SQL 语句作为 db.query 子 span 附加到执行时的 span 上。
+
+结束的 trace 保存在有界环形缓冲区中，通过 GET /api/v1/admin/traces 以 OTLP/JSON 格式查看，
+配置 TRACE_EXPORT_FILE 时同时按行追加到文件（与 OpenTelemetry Collector 的 file exporter 格式一致）。
+"""
+
+import asyncio
+import functools
+import inspect
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar, Token
+from typing import Any, Callable, Iterable, Optional
+
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from console_server.core.config import settings
+from console_server.db.slow_query import normalize_statement
+from console_server.env import SRC_LOG_LEVELS
+from console_server.utils.log import register_log_context
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
+
+SERVICE_NAME = "console_server"
+
+# W3C traceparent：版本-trace id-父 span id-标志
+_TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+# OTLP 状态码
+STATUS_UNSET = 0
+STATUS_ERROR = 2
+
+# OTLP span 类型
+KIND_INTERNAL = 1
+KIND_SERVER = 2
+KIND_CLIENT = 3
+
+
+def _new_id(nbytes: int) -> str:
+    return os.urandom(nbytes).hex()
+
+
+class Trace:
+    __slots__ = ("trace_id", "spans", "tenant_id")
+
+    def __init__(self, trace_id: str):
+        self.trace_id = trace_id
+        self.spans: list[Span] = []  # 子任务中创建的 span 也追加到这里
+        self.tenant_id: Optional[int] = None
+
+
+class Span:
+    __slots__ = (
+        "trace",
+        "span_id",
+        "parent_id",
+        "name",
+        "kind",
+        "start_ns",
+        "end_ns",
+        "attributes",
+        "status",
+        "message",
+    )
+
+    def __init__(
+        self,
+        trace: Trace,
+        name: str,
+        parent_id: Optional[str],
+        kind: int = KIND_INTERNAL,
+        attributes: Optional[dict[str, Any]] = None,
+        start_ns: Optional[int] = None,
+    ):
+        self.trace = trace
+        self.span_id = _new_id(8)
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.start_ns = start_ns if start_ns is not None else time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes = attributes or {}
+        self.status = STATUS_UNSET
+        self.message = ""
+        trace.spans.append(self)
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def set_error(self, exc: BaseException) -> None:
+        self.status = STATUS_ERROR
+        self.message = f"{type(exc).__name__}: {exc}"
+
+    def end(self, end_ns: Optional[int] = None) -> None:
+        if self.end_ns is None:
+            self.end_ns = end_ns if end_ns is not None else time.time_ns()
+
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def current_trace_id() -> Optional[str]:
+    span = _current_span.get()
+    return span.trace.trace_id if span is not None else None
+
+
+# 采样到的请求，日志带上 trace id，可与 /api/v1/admin/traces 对应
+register_log_context("trace_id", current_trace_id)
+
+
+class _SpanScope:
+    """with 块内把 span 设为当前 span，退出时结束并恢复父 span"""
+
+    __slots__ = ("span", "token")
+
+    def __init__(self, span: Span):
+        self.span = span
+        self.token: Optional[Token] = None
+
+    def __enter__(self) -> Span:
+        self.token = _current_span.set(self.span)
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc is not None:
+            self.span.set_error(exc)
+        self.span.end()
+        if self.token is not None:
+            _current_span.reset(self.token)
+
+
+class _NoopScope:
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        return None
+
+
+_NOOP = _NoopScope()
+
+
+def span(name: str, **attributes: Any):
+    """
+    在当前 trace 中创建子 span，未采样时不做任何事：
+
+        with tracing.span("auth.verify_password"):
+            ...
+    """
+    parent = _current_span.get()
+    if parent is None:
+        return _NOOP
+    return _SpanScope(Span(parent.trace, name, parent.span_id, attributes=attributes))
+
+
+def add_span(
+    name: str,
+    start_ns: int,
+    end_ns: int,
+    kind: int = KIND_INTERNAL,
+    **attributes: Any,
+) -> Optional[Span]:
+    """记录一个已经结束的子 span（如 SQL 语句）"""
+    parent = _current_span.get()
+    if parent is None:
+        return None
+    child = Span(parent.trace, name, parent.span_id, kind, attributes, start_ns)
+    child.end(end_ns)
+    return child
+
+
+def _parse_traceparent(value: Optional[str]) -> Optional[tuple[str, str, bool]]:
+    if not value:
+        return None
+    match = _TRACEPARENT.match(value.strip().lower())
+    if match is None:
+        return None
+    trace_id, parent_id, flags = match.groups()
+    return trace_id, parent_id, bool(int(flags, 16) & 0x01)
+
+
+def start_trace(
+    name: str, traceparent: Optional[str] = None, **attributes: Any
+) -> Optional[_SpanScope]:
+    """
+    在请求入口做采样，采样时返回根 span 的作用域，否则返回 None
+
+    上游带 traceparent 时服从其采样决定并沿用 trace id，便于与网关等外部链路拼接。
+    """
+    parent = _parse_traceparent(traceparent)
+    if parent is not None:
+        trace_id, parent_id, sampled = parent
+    else:
+        trace_id, parent_id = None, None
+        sampled = random.random() < settings.TRACE_SAMPLE_RATE
+    if not sampled:
+        return None
+    trace = Trace(trace_id or _new_id(16))
+    return _SpanScope(Span(trace, name, parent_id, KIND_SERVER, attributes))
+
+
+####################################
+# 导出
+####################################
+
+
+def _attribute_value(value: Any) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_span(s: Span) -> dict:
+    data = {
+        "traceId": s.trace.trace_id,
+        "spanId": s.span_id,
+        "name": s.name,
+        "kind": s.kind,
+        "startTimeUnixNano": str(s.start_ns),
+        "endTimeUnixNano": str(s.end_ns or s.start_ns),
+        "attributes": [
+            {"key": k, "value": _attribute_value(v)} for k, v in s.attributes.items()
+        ],
+        "status": {"code": s.status},
+    }
+    if s.parent_id:
+        data["parentSpanId"] = s.parent_id
+    if s.message:
+        data["status"]["message"] = s.message
+    return data
+
+
+def to_otlp(traces: Iterable[Trace]) -> dict:
+    """转换为 OTLP/JSON 的 ExportTraceServiceRequest"""
+    return {
+        "resourceSpans": [
+            {
+                "resource": {
+                    "attributes": [
+                        {"key": "service.name", "value": {"stringValue": SERVICE_NAME}},
+                        {"key": "service.version", "value": {"stringValue": settings.APP_VERSION or ""}},
+                    ]
+                },
+                "scopeSpans": [
+                    {
+                        "scope": {"name": __name__},
+                        "spans": [_otlp_span(s) for t in traces for s in t.spans],
+                    }
+                ],
+            }
+        ]
+    }
+
+
+class TraceExporter:
+    def __init__(self, maxlen: int, path: str = ""):
+        self._traces: deque[Trace] = deque(maxlen=maxlen)
+        self.path = path
+        self._file_lock = threading.Lock()
+
+    def export(self, trace: Trace) -> None:
+        self._traces.append(trace)
+        if self.path:
+            # 写文件放到线程池，不阻塞事件循环
+            line = json.dumps(to_otlp([trace]), ensure_ascii=False)
+            asyncio.get_running_loop().run_in_executor(None, self._write, line)
+
+    def _write(self, line: str) -> None:
+        try:
+            with self._file_lock, open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+        except OSError as e:
+            log.warning(f"链路追踪：写入 {self.path} 失败：{str(e)}")
+
+    def traces(self, tenant_id: Optional[int] = None, limit: Optional[int] = None) -> list[Trace]:
+        """按时间倒序返回 trace，tenant_id 为 None 时返回全部租户"""
+        result = [
+            t
+            for t in reversed(self._traces)
+            if tenant_id is None or t.tenant_id == tenant_id
+        ]
+        return result[:limit] if limit is not None else result
+
+
+exporter = TraceExporter(settings.TRACE_BUFFER_SIZE, settings.TRACE_EXPORT_FILE)
+
+
+def end_trace(root: _SpanScope, tenant_id: Optional[int]) -> None:
+    root.span.end()
+    trace = root.span.trace
+    trace.tenant_id = tenant_id
+    exporter.export(trace)
+
+
+####################################
+# SQL 与路由
+####################################
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_span.get() is None:
+        return
+    end_ns = time.time_ns()
+    duration_ns = int((time.perf_counter() - context._query_start) * 1e9)
+    add_span(
+        "db.query",
+        end_ns - duration_ns,
+        end_ns,
+        KIND_CLIENT,
+        **{"db.system": "postgresql", "db.statement": normalize_statement(statement)},
+    )
+
+
+def instrument(engine: Engine) -> None:
+    """为同步引擎注册 SQL span（需在 db.instrument.instrument() 之后，依赖其记录的开始时间）"""
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def _traced_endpoint(endpoint: Callable) -> Callable:
+    """把路由函数包在 handler span 中（functools.wraps 保留签名和 query_budget 等属性）"""
+    if inspect.iscoroutinefunction(endpoint):
+
+        @functools.wraps(endpoint)
+        async def async_wrapper(*args, **kwargs):
+            with span("handler"):
+                return await endpoint(*args, **kwargs)
+
+        return async_wrapper
+
+    @functools.wraps(endpoint)
+    def sync_wrapper(*args, **kwargs):
+        with span("handler"):
+            return endpoint(*args, **kwargs)
+
+    return sync_wrapper
+
+
+class TracedRoute(APIRoute):
+    """
+    记录 route（依赖解析 + handler + 序列化）、handler 和 serialize 三个 span
+
+    用法：APIRouter(..., route_class=TracedRoute)。serialize 从 handler 结束算到响应对象生成。
+    """
+
+    def __init__(self, path: str, endpoint: Callable, **kwargs: Any):
+        super().__init__(path, _traced_endpoint(endpoint), **kwargs)
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+
+        async def traced_handler(request: Request) -> Response:
+            scope = span("route")
+            if scope is _NOOP:
+                return await handler(request)
+            with scope as route_span:
+                response = await handler(request)
+                handler_spans = [
+                    s
+                    for s in route_span.trace.spans
+                    if s.name == "handler" and s.parent_id == route_span.span_id
+                ]
+                if handler_spans and handler_spans[-1].end_ns is not None:
+                    add_span("serialize", handler_spans[-1].end_ns, time.time_ns())
+                return response
+
+        return traced_handler
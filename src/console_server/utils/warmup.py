@@ -0,0 +1,91 @@
+"""
+连接池与缓存预热
+
+由 main.py 注册为启动预热钩子（utils/startup.py），在每个 worker 开始接收请求之前执行：
+
+- warm_pool：同时建立 WARMUP_DB_CONNECTIONS 个连接池连接，并在每个连接上执行一遍认证热路径的语句
+  （token 黑名单、按邮箱查询用户及其角色、有效权限）。连接建立、认证在这里完成，asyncpg 按连接缓存
+  预编译语句，SQLAlchemy 缓存编译后的 SQL，首批请求不再承担这些开销。
+- preload_rbac（WARMUP_PRELOAD_RBAC）：读取各租户的权限目录和启用的角色及其权限，使这些表进入数据库缓存。
+
+热点语句通过调用业务函数执行（参数取一个真实用户或空值），保证与请求中的语句完全相同。
+"""
+
+import asyncio
+import logging
+
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
+
+from console_server.core.config import settings
+from console_server.core.tenant import tenant_scope
+from console_server.db import database
+from console_server.env import SRC_LOG_LEVELS
+from console_server.model.rbac import Permission, Role, User
+from console_server.model.tenant import Tenant
+from console_server.utils import auth
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["DB"])
+
+
+async def _sample_email() -> str:
+    """默认租户中任意一个用户的邮箱（让 selectinload 等依赖结果的语句也被执行），没有用户时为空"""
+    async with database.AsyncSessionLocal() as db:
+        result = await db.execute(select(User.email).limit(1))
+        return result.scalar_one_or_none() or ""
+
+
+async def _warm_connection(email: str, barrier: asyncio.Barrier) -> None:
+    async with database.AsyncSessionLocal() as db:
+        # 所有会话同时持有连接，确保连接池建立的是不同的连接
+        await db.connection()
+        await barrier.wait()
+        await auth.is_token_blacklisted("", db)
+        user = await auth.get_user_with_roles(email, db)
+        if user is not None:
+            # 跳过缓存，每个连接都执行一次有效权限查询
+            auth.permission_cache.pop(user.tenant_id, user.id)  # type: ignore[arg-type]
+            await auth.get_permission_names(user, db)
+
+
+async def warm_pool() -> None:
+    """预先建立连接池连接，并在每个连接上预编译认证热路径的语句"""
+    count = min(settings.WARMUP_DB_CONNECTIONS, settings.DB_POOL_SIZE)
+    if count <= 0:
+        return
+    async with asyncio.timeout(settings.WARMUP_TIMEOUT_SECONDS):
+        with tenant_scope(settings.DEFAULT_TENANT_ID):
+            email = await _sample_email()
+            barrier = asyncio.Barrier(count)
+            # 任一连接失败时取消其余任务（否则会一直等在 barrier 上）
+            async with asyncio.TaskGroup() as group:
+                for _ in range(count):
+                    group.create_task(_warm_connection(email, barrier))
+    log.info(f"预热：已建立 {count} 个数据库连接")
+
+
+async def preload_rbac() -> None:
+    """读取各租户的权限目录和启用的角色及其权限"""
+    async with asyncio.timeout(settings.WARMUP_TIMEOUT_SECONDS):
+        async with database.AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(Tenant.id).where(Tenant.is_active.is_(True)).order_by(Tenant.id)
+            )
+            tenant_ids = list(result.scalars().all())
+            permissions = roles = 0
+            for tenant_id in tenant_ids:
+                with tenant_scope(tenant_id):
+                    result = await db.execute(select(Permission))
+                    permissions += len(result.scalars().all())
+                    result = await db.execute(
+                        select(Role)
+                        .where(Role.is_active.is_(True))
+                        .options(selectinload(Role.permissions))
+                    )
+                    roles += len(result.scalars().all())
+                # 只为预热，不保留对象
+                db.expunge_all()
+    log.info(
+        f"预热：已读取 {len(tenant_ids)} 个租户的 {permissions} 个权限、{roles} 个启用的角色"
+    )